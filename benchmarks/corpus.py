@@ -0,0 +1,184 @@
+"""
+benchmarks/corpus.py
+Deterministic generator for synthetic Jack classes, used to benchmark the tokenizer and compilation engine on inputs
+much larger than the nand2tetris test programs.
+
+The same seed and options always produce the same source. Run from the repository root to write a corpus:
+python -m benchmarks.corpus <output directory> --files 20 --subroutines 30
+"""
+import argparse
+from dataclasses import dataclass
+from pathlib import Path
+import random
+
+OPS: tuple = ("+", "-", "*", "/", "&", "|", "<", ">", "=")
+
+
+@dataclass(frozen=True)
+class CorpusOptions:
+    """
+    Size knobs for generated classes.
+    subroutines: subroutines per class
+    statements: statements per subroutine body
+    expression_depth: how deeply parenthesized expressions nest
+    statement_depth: how deeply if/while statements nest
+    comment_lines: comment lines written before every subroutine
+    fields: field declarations per class
+    locals: extra local variables declared in every subroutine, on top of the few every subroutine uses
+    """
+    subroutines: int = 10
+    statements: int = 20
+    expression_depth: int = 4
+    statement_depth: int = 2
+    comment_lines: int = 3
+    fields: int = 5
+    locals: int = 0
+
+
+class _ClassGenerator:
+    """
+    Generates one class. Every choice comes from a seeded random.Random, so output is reproducible.
+    """
+    def __init__(self, name: str, options: CorpusOptions, seed: int):
+        self.name = name
+        self.options = options
+        self.random = random.Random(seed)
+        self.fields = [f"field{i}" for i in range(options.fields)]
+        self.locals: list[str] = []
+        self.lines: list[str] = []
+
+    def generate(self) -> str:
+        self.lines.append(f"/** Generated class {self.name}. */")
+        self.lines.append(f"class {self.name} {{")
+        for field in self.fields:
+            self.lines.append(f"    field int {field};")
+        self.lines.append("    static Array table;")
+        for i in range(self.options.subroutines):
+            self._subroutine(i)
+        self.lines.append("}")
+        return "\n".join(self.lines) + "\n"
+
+    def _subroutine(self, number: int):
+        self.lines.append("")
+        self.lines.append("    /**")
+        for i in range(self.options.comment_lines):
+            self.lines.append(f"     * Comment line {i} for subroutine {number}: describes arguments and results.")
+        self.lines.append("     */")
+        kind = ("method", "function", "constructor")[number % 3] if number else "constructor"
+        return_type = self.name if kind == "constructor" else self.random.choice(("int", "void", "boolean"))
+        self.lines.append(f"    {kind} {return_type} run{number}(int a, int b, boolean flag) {{")
+        self.locals = ["a", "b", "i", "j"]
+        self.lines.append("        var int i, j;")
+        self.lines.append("        var Array items;")
+        if self.options.locals:
+            extra = [f"local{i}" for i in range(self.options.locals)]
+            self.lines.append(f"        var int {', '.join(extra)};")
+            self.locals += extra
+        self._statements(self.options.statements, 2, self.options.statement_depth)
+        if kind == "constructor":
+            self.lines.append("        return this;")
+        elif return_type == "void":
+            self.lines.append("        return;")
+        else:
+            self.lines.append(f"        return {self._expression(self.options.expression_depth)};")
+        self.lines.append("    }")
+
+    def _statements(self, count: int, indent: int, depth: int):
+        pad = "    " * indent
+        for _ in range(count):
+            choice = self.random.random()
+            if depth > 0 and choice < 0.15:
+                self.lines.append(f"{pad}if ({self._expression(self.options.expression_depth)}) {{")
+                self._statements(max(1, count // 4), indent + 1, depth - 1)
+                self.lines.append(f"{pad}}} else {{")
+                self._statements(max(1, count // 4), indent + 1, depth - 1)
+                self.lines.append(f"{pad}}}")
+            elif depth > 0 and choice < 0.25:
+                self.lines.append(f"{pad}while ({self._expression(1)}) {{")
+                self._statements(max(1, count // 4), indent + 1, depth - 1)
+                self.lines.append(f"{pad}}}")
+            elif choice < 0.45:
+                self.lines.append(f"{pad}do Output.printInt({self._expression(self.options.expression_depth)});")
+            elif choice < 0.55:
+                self.lines.append(f"{pad}// Line comment before an array assignment.")
+                self.lines.append(f"{pad}let items[{self._expression(1)}] = {self._expression(2)};")
+            else:
+                variable = self.random.choice(self.locals + self.fields)
+                self.lines.append(f"{pad}let {variable} = {self._expression(self.options.expression_depth)};")
+
+    def _expression(self, depth: int) -> str:
+        terms = [self._term(depth) for _ in range(self.random.randint(1, 3))]
+        parts = [terms[0]]
+        for term in terms[1:]:
+            parts.append(f" {self.random.choice(OPS)} {term}")
+        return "".join(parts)
+
+    def _term(self, depth: int) -> str:
+        choice = self.random.random()
+        if depth > 0 and choice < 0.35:
+            return f"({self._expression(depth - 1)})"
+        if depth > 0 and choice < 0.45:
+            return f"Math.max({self._expression(depth - 1)}, {self._expression(depth - 1)})"
+        if depth > 0 and choice < 0.5:
+            return f"{self.random.choice('-~')}{self._term(depth - 1)}"
+        if choice < 0.65:
+            return str(self.random.randint(0, 32767))
+        if choice < 0.7:
+            return self.random.choice(("true", "false", "null"))
+        if choice < 0.75:
+            return f"items[{self.random.choice(self.locals)}]"
+        if choice < 0.78:
+            return '"generated string"'
+        return self.random.choice(self.locals + self.fields)
+
+
+def generate_class(name: str, options: CorpusOptions = CorpusOptions(), seed: int = 0) -> str:
+    """
+    Returns the source of one generated class.
+    """
+    return _ClassGenerator(name, options, seed).generate()
+
+
+def write_corpus(directory: Path, files: int, options: CorpusOptions = CorpusOptions(), seed: int = 0) -> list[Path]:
+    """
+    Writes `files` generated classes into directory and returns their paths.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for number in range(files):
+        path = directory / f"Generated{number}.jack"
+        path.write_text(generate_class(f"Generated{number}", options, seed + number))
+        paths.append(path)
+    return paths
+
+
+def add_corpus_arguments(parser: argparse.ArgumentParser):
+    """
+    Adds the corpus size options to a command line parser.
+    """
+    defaults = CorpusOptions()
+    parser.add_argument("--files", type=int, default=10, help="Number of classes to generate.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed; the same seed gives the same corpus.")
+    for name in CorpusOptions.__dataclass_fields__:
+        parser.add_argument(f"--{name.replace('_', '-')}", type=int, default=getattr(defaults, name))
+
+
+def options_from_args(args: argparse.Namespace) -> CorpusOptions:
+    """
+    Builds CorpusOptions from parsed command line arguments.
+    """
+    return CorpusOptions(**{name: getattr(args, name) for name in CorpusOptions.__dataclass_fields__})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic Jack corpus.")
+    parser.add_argument("directory", type=Path, help="Where to write the generated .jack files.")
+    add_corpus_arguments(parser)
+    args = parser.parse_args()
+    paths = write_corpus(args.directory, args.files, options_from_args(args), args.seed)
+    print(f"Wrote {len(paths)} files to {args.directory}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+benchmarks/has_more_tokens_bench.py
+Micro-benchmark for has_more_tokens on comment-heavy input.
+
+Run from the repository root:
+python -m benchmarks.has_more_tokens_bench
+"""
+import argparse
+import contextlib
+import io
+from pathlib import Path
+import re
+import tempfile
+import timeit
+
+from src.tokenizer import Tokenizer, RegexTokenizer
+
+# The scan has_more_tokens used to repeat on every call: skip all whitespace and comments from the current position.
+SKIP_REGEX: re.Pattern = re.compile(r"(?:\s+|//[^\n]*|/\*.*?(?:\*/|\Z))*", re.DOTALL)
+
+
+class RescanningTokenizer(RegexTokenizer):
+    """
+    Reference tokenizer that rescans whitespace and comments on every has_more_tokens call.
+    """
+    def has_more_tokens(self) -> bool:
+        return SKIP_REGEX.match(self.open_file, self.current_index).end() < len(self.open_file)
+
+
+def comment_heavy_source(classes: int, comment_lines: int) -> str:
+    """
+    Builds Jack source where every declaration is preceded by a long block comment and line comments.
+    """
+    header = "/**\n" + "".join(f" * Documentation line {i} for the next declaration.\n" for i in range(comment_lines))
+    header += " */\n"
+    line_comments = "".join(f"// note {i}\n" for i in range(comment_lines))
+    parts = []
+    for i in range(classes):
+        parts.append(f"{header}class C{i} {{\n{line_comments}")
+        parts.append(f"{header}    field int x{i};\n")
+        parts.append(f"{header}    function void f{i}() {{ return; }}\n}}\n")
+    return "".join(parts)
+
+
+def run_tokenizer(tokenizer_class, jack_file: Path, checks_per_token: int) -> int:
+    """
+    Drives a tokenizer to the end, calling has_more_tokens several times per token like the parser loops do.
+    Returns the number of tokens read.
+    """
+    tokenizer = tokenizer_class(jack_file)
+    count = 0
+    while tokenizer.has_more_tokens():
+        for _ in range(checks_per_token - 1):
+            tokenizer.has_more_tokens()
+        tokenizer.advance()
+        count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark has_more_tokens on comment-heavy Jack source.")
+    parser.add_argument("--classes", type=int, default=20, help="Number of classes in the generated source.")
+    parser.add_argument("--comment-lines", type=int, default=200, help="Comment lines before each declaration.")
+    parser.add_argument("--checks", type=int, default=4, help="has_more_tokens calls per advance.")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing repetitions; the best one is reported.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        jack_file = Path(directory) / "Comments.jack"
+        jack_file.write_text(comment_heavy_source(args.classes, args.comment_lines))
+        print(f"Source: {jack_file.stat().st_size} bytes, {args.checks} has_more_tokens calls per token")
+
+        baseline = None
+        for tokenizer_class in (RescanningTokenizer, RegexTokenizer, Tokenizer):
+            with contextlib.redirect_stdout(io.StringIO()):
+                tokens = run_tokenizer(tokenizer_class, jack_file, args.checks)
+                best = min(timeit.repeat(lambda: run_tokenizer(tokenizer_class, jack_file, args.checks),
+                                         number=1, repeat=args.repeat))
+            baseline = baseline or best
+            print(f"{tokenizer_class.__name__:>20}: {tokens} tokens in {best * 1000:8.2f} ms "
+                  f"({baseline / best:5.1f}x vs rescanning)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+benchmarks/run_benchmarks.py
+Benchmark harness for the tokenizer and compilation engine.
+
+Generates a deterministic synthetic corpus (benchmarks/corpus.py), or uses an existing directory of .jack files,
+and measures each phase of a compile separately:
+read: reading the source file
+lex: lexing the source into the token arrays
+parse: parsing the token stream into a NullSink (no output)
+tree: parsing into an ElementTreeSink
+stream_xml: parsing and streaming XML to a file, i.e. what jack_analyzer does per file
+It reports tokens/second, files/second, peak traced memory of the stream_xml phase, and the time of each phase.
+Results can be saved as JSON and compared against a previous run to spot regressions between commits.
+
+Run from the repository root:
+python -m benchmarks.run_benchmarks --files 20 --output results.json --compare previous.json
+"""
+import argparse
+import json
+from pathlib import Path
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.corpus import add_corpus_arguments, options_from_args, write_corpus
+from src.compilation_engine import CompilationEngine
+from src.output_sink import ElementTreeSink, NullSink
+from src.tokenizer import Tokenizer
+from src.xml_writer import XmlStreamWriter
+
+
+def lexed_tokenizer(jack_file: Path) -> Tokenizer:
+    """
+    Returns a tokenizer whose token arrays are already built.
+    """
+    tokenizer = Tokenizer(jack_file)
+    tokenizer.has_more_tokens()
+    return tokenizer
+
+
+def count_tokens(jack_file: Path) -> int:
+    """
+    Returns the number of tokens in a file.
+    """
+    tokenizer = Tokenizer(jack_file)
+    CompilationEngine(tokenizer, NullSink()).compile_class()
+    return tokenizer.token_index + 1
+
+
+def stream_xml(jack_file: Path, output_dir: Path):
+    """
+    Compiles a file the way jack_analyzer does: streaming XML into an output file.
+    """
+    with open(output_dir / f"{jack_file.stem}.xml", "w", encoding="utf-8", newline="\n") as xml_file:
+        CompilationEngine(Tokenizer(jack_file), XmlStreamWriter(xml_file)).compile_class()
+
+
+def time_phase(jack_files: list[Path], run, repeat: int) -> float:
+    """
+    Runs `run(jack_file)` over the corpus `repeat` times and returns the best total time in seconds.
+    Phases that need a lexed tokenizer get one prepared outside the timed region.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        prepared = [run.prepare(jack_file) if hasattr(run, "prepare") else jack_file for jack_file in jack_files]
+        start = time.perf_counter()
+        for item in prepared:
+            run(item)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+class ParsePhase:
+    """
+    Times parsing alone: tokenizers are lexed in prepare, outside the timed region.
+    """
+    def __init__(self, sink_class):
+        self.sink_class = sink_class
+
+    def prepare(self, jack_file: Path) -> Tokenizer:
+        return lexed_tokenizer(jack_file)
+
+    def __call__(self, tokenizer: Tokenizer):
+        CompilationEngine(tokenizer, self.sink_class()).compile_class()
+
+
+def measure_peak_memory(jack_files: list[Path], output_dir: Path) -> int:
+    """
+    Returns the peak traced memory in bytes while compiling the corpus file by file.
+    """
+    tracemalloc.start()
+    for jack_file in jack_files:
+        stream_xml(jack_file, output_dir)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def git_commit() -> str | None:
+    """
+    Returns the current git commit, if the repository and git are available.
+    """
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=Path(__file__).parent, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+def run_benchmarks(jack_files: list[Path], repeat: int) -> dict:
+    """
+    Runs every phase over the corpus and returns the results.
+    """
+    tokens = sum(count_tokens(jack_file) for jack_file in jack_files)
+    source_bytes = sum(jack_file.stat().st_size for jack_file in jack_files)
+    with tempfile.TemporaryDirectory() as directory:
+        output_dir = Path(directory)
+        phases = {
+            "read": time_phase(jack_files, lambda jack_file: jack_file.read_text(), repeat),
+            "lex": time_phase(jack_files, lexed_tokenizer, repeat),
+            "parse": time_phase(jack_files, ParsePhase(NullSink), repeat),
+            "tree": time_phase(jack_files, ParsePhase(ElementTreeSink), repeat),
+            "stream_xml": time_phase(jack_files, lambda jack_file: stream_xml(jack_file, output_dir), repeat),
+        }
+        peak_memory = measure_peak_memory(jack_files, output_dir)
+
+    end_to_end = phases["stream_xml"]
+    return {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "files": len(jack_files),
+        "tokens": tokens,
+        "source_bytes": source_bytes,
+        "phases_seconds": phases,
+        "tokens_per_second": tokens / end_to_end,
+        "files_per_second": len(jack_files) / end_to_end,
+        "peak_memory_bytes": peak_memory,
+    }
+
+
+def print_results(results: dict, previous: dict | None = None):
+    """
+    Prints results, with the change against a previous run when one is given.
+    """
+    def change(new: float, old: float | None, lower_is_better: bool = True) -> str:
+        if not old:
+            return ""
+        percent = (new - old) / old * 100
+        if abs(percent) < 0.05:
+            return "  (unchanged)"
+        better = percent < 0 if lower_is_better else percent > 0
+        return f"  ({percent:+.1f}% {'better' if better else 'worse'})"
+
+    old_phases = previous.get("phases_seconds", {}) if previous else {}
+    print(f"Corpus: {results['files']} files, {results['tokens']} tokens, {results['source_bytes']} bytes")
+    for phase, seconds in results["phases_seconds"].items():
+        print(f"{phase:>12}: {seconds * 1000:10.2f} ms{change(seconds, old_phases.get(phase))}")
+    old = previous or {}
+    print(f"{'tokens/s':>12}: {results['tokens_per_second']:13,.0f}"
+          f"{change(results['tokens_per_second'], old.get('tokens_per_second'), False)}")
+    print(f"{'files/s':>12}: {results['files_per_second']:13,.1f}"
+          f"{change(results['files_per_second'], old.get('files_per_second'), False)}")
+    print(f"{'peak memory':>12}: {results['peak_memory_bytes'] / 1024:10.1f} KiB"
+          f"{change(results['peak_memory_bytes'], old.get('peak_memory_bytes'))}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Jack tokenizer and compilation engine.")
+    parser.add_argument("--corpus", type=Path, help="Benchmark an existing directory of .jack files instead.")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing repetitions per phase; the best is kept.")
+    parser.add_argument("--output", type=Path, help="Save the results to this JSON file.")
+    parser.add_argument("--compare", type=Path, help="A previous results JSON file to compare against.")
+    add_corpus_arguments(parser)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        if args.corpus:
+            jack_files = sorted(args.corpus.glob("*.jack"))
+        else:
+            jack_files = write_corpus(Path(directory), args.files, options_from_args(args), args.seed)
+        results = run_benchmarks(jack_files, args.repeat)
+
+    if not args.corpus:
+        results["corpus_options"] = {**vars(options_from_args(args)), "files": args.files, "seed": args.seed}
+    previous = json.loads(args.compare.read_text()) if args.compare else None
+    print_results(results, previous)
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+        print(f"Saved results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+benchmarks/server_bench.py
+Benchmark for the per-request latency of the compile server.
+
+Compiles each file of a generated corpus to XML, timing every request, in three ways:
+spawn: running jack_analyzer.py on the file, a new process per request
+client: running jack_client.py against a running jack_server.py, which still starts a small process per request
+connection: sending requests over one open connection, as an editor integration would
+
+Run from the repository root:
+python -m benchmarks.server_bench --files 10 --repeat 3
+"""
+import argparse
+from pathlib import Path
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.corpus import add_corpus_arguments, options_from_args, write_corpus
+from src.compile_client import CompileClient
+
+ROOT: Path = Path(__file__).resolve().parent.parent
+
+
+def latencies(jack_files: list[Path], repeat: int, request) -> list[float]:
+    """
+    Returns the latency of every request in ms.
+    """
+    times = []
+    for _ in range(repeat):
+        for jack_file in jack_files:
+            start = time.perf_counter()
+            request(jack_file)
+            times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark compile server latency against spawning the analyzer.")
+    add_corpus_arguments(parser)
+    parser.add_argument("--repeat", type=int, default=3, help="Number of times each file is compiled.")
+    # Editor-sized classes by default: the time saved per request doesn't depend on the file's size.
+    parser.set_defaults(subroutines=3, statements=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        directory = Path(directory)
+        jack_files = write_corpus(directory / "corpus", args.files, options_from_args(args), args.seed)
+        socket_path = directory / "server.sock"
+        server = subprocess.Popen([sys.executable, str(ROOT / "jack_server.py"), str(socket_path)],
+                                  stdout=subprocess.PIPE, text=True)
+        try:
+            # The server prints its first line once it is listening.
+            server.stdout.readline()
+
+            def spawn(jack_file: Path):
+                # Run in the temporary directory, so the analyzer's output folder is created there.
+                subprocess.run([sys.executable, str(ROOT / "jack_analyzer.py"), str(jack_file), "--no-cache"],
+                               cwd=directory, stdout=subprocess.DEVNULL, check=True)
+
+            def client(jack_file: Path):
+                subprocess.run([sys.executable, str(ROOT / "jack_client.py"), str(socket_path), str(jack_file)],
+                               stdout=subprocess.DEVNULL, check=True)
+
+            with CompileClient(socket_path) as connection:
+                def request(jack_file: Path):
+                    if not connection.request(path=str(jack_file))["ok"]:
+                        raise RuntimeError(f"Compiling {jack_file} failed")
+
+                results = {name: latencies(jack_files, args.repeat, run)
+                           for name, run in (("spawn", spawn), ("client", client), ("connection", request))}
+                connection.request(shutdown=True)
+        finally:
+            server.wait(timeout=10)
+
+    print(f"{args.files} files, {args.repeat} requests each")
+    baseline = statistics.median(results["spawn"])
+    for name, times in results.items():
+        median = statistics.median(times)
+        p95 = statistics.quantiles(times, n=20)[-1] if len(times) > 1 else times[0]
+        print(f"{name:>10}: median {median:8.2f} ms, p95 {p95:8.2f} ms ({baseline / median:6.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
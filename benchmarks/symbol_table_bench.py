@@ -0,0 +1,114 @@
+"""
+benchmarks/symbol_table_bench.py
+Benchmark for symbol table lookups on classes with many variables.
+
+Compares SymbolTable against a reference table that keeps each scope as a list and scans it on every lookup, first on
+raw lookups of every identifier in a generated class, then on VM code generation for the whole corpus.
+
+Run from the repository root:
+python -m benchmarks.symbol_table_bench --fields 300 --locals 300
+"""
+import argparse
+import io
+from pathlib import Path
+import tempfile
+import timeit
+
+from benchmarks.corpus import add_corpus_arguments, options_from_args, write_corpus
+from src.code_generator import VmSink
+from src.compilation_engine import CompilationEngine
+from src.symbol_table import CLASS_KINDS, Symbol, SymbolTable
+from src.tokenizer import Tokenizer
+
+
+class LinearSymbolTable(SymbolTable):
+    """
+    Reference table that keeps each scope as a list of Symbols and scans it on every lookup.
+    """
+    def __init__(self):
+        super().__init__()
+        self.class_list: list[Symbol] = []
+        self.subroutine_list: list[Symbol] = []
+
+    def start_subroutine(self):
+        super().start_subroutine()
+        self.subroutine_list = []
+
+    def define(self, name: str, type_name: str, kind: str) -> Symbol:
+        symbol = super().define(name, type_name, kind)
+        (self.class_list if kind in CLASS_KINDS else self.subroutine_list).append(symbol)
+        return symbol
+
+    def lookup(self, name: str) -> Symbol | None:
+        for scope in (self.subroutine_list, self.class_list):
+            for symbol in scope:
+                if symbol.name == name:
+                    return symbol
+        return None
+
+
+def identifiers(jack_file: Path) -> list[str]:
+    """
+    Returns every identifier token in a file, as the tokenizer produces them (not interned).
+    """
+    tokenizer = Tokenizer(jack_file)
+    values = []
+    while tokenizer.has_more_tokens():
+        tokenizer.advance()
+        if tokenizer.current_token_type == "identifier":
+            values.append(tokenizer.current_token_value)
+    return values
+
+
+def fill_table(table: SymbolTable, fields: int, locals_count: int) -> SymbolTable:
+    """
+    Defines the same variables the corpus generator declares in a subroutine.
+    """
+    for i in range(fields):
+        table.define(f"field{i}", "int", "field")
+    table.define("table", "Array", "static")
+    table.start_subroutine()
+    for name in ("a", "b"):
+        table.define(name, "int", "arg")
+    table.define("flag", "boolean", "arg")
+    for name in ("i", "j", *(f"local{i}" for i in range(locals_count))):
+        table.define(name, "int", "var")
+    table.define("items", "Array", "var")
+    return table
+
+
+def generate_vm(jack_files: list[Path], table_class):
+    """
+    Generates VM code for every file into memory.
+    """
+    for jack_file in jack_files:
+        CompilationEngine(Tokenizer(jack_file), VmSink(io.StringIO(), table_class())).compile_class()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark symbol table lookups on classes with many variables.")
+    add_corpus_arguments(parser)
+    parser.add_argument("--repeat", type=int, default=5, help="Timing repetitions; the best one is reported.")
+    parser.set_defaults(files=5, fields=300, locals=300)
+    args = parser.parse_args()
+    options = options_from_args(args)
+
+    with tempfile.TemporaryDirectory() as directory:
+        jack_files = write_corpus(Path(directory), args.files, options, args.seed)
+        names = identifiers(jack_files[0])
+        print(f"{args.files} files, {options.fields} fields, {options.locals} extra locals per subroutine, "
+              f"{len(names)} identifiers in the first file")
+
+        baseline = None
+        for table_class in (LinearSymbolTable, SymbolTable):
+            table = fill_table(table_class(), options.fields, options.locals)
+            lookups = min(timeit.repeat(lambda: [table.lookup(name) for name in names], number=1, repeat=args.repeat))
+            generate = min(timeit.repeat(lambda: generate_vm(jack_files, table_class), number=1, repeat=args.repeat))
+            baseline = baseline or (lookups, generate)
+            print(f"{table_class.__name__:>18}: lookups {len(names) / lookups / 1e6:6.2f} M/s "
+                  f"({baseline[0] / lookups:5.1f}x), VM generation {generate * 1000:8.2f} ms "
+                  f"({baseline[1] / generate:5.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
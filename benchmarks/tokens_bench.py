@@ -0,0 +1,103 @@
+"""
+benchmarks/tokens_bench.py
+Benchmark for token mode output (jack_analyzer.py --tokens) on classes of growing size.
+
+Each class is twice the size of the one before. For each, it measures the time per token and the peak traced memory
+of writing its token list XML:
+stream: token mode into a TokenXmlWriter on a file, reading the source through an MmapTokenizer (--tokens --mmap)
+arrays: the same with the default Tokenizer, which keeps the source and its token arrays in memory (--tokens)
+minidom: with --minidom, the old token mode for reference: an ElementTree of the tokens written to a file, read back
+and pretty-printed with xml.dom.minidom. It is slow under tracemalloc, so keep the classes small.
+Linear time shows as a flat time per token; constant memory as a flat peak.
+
+Run from the repository root:
+python -m benchmarks.tokens_bench
+python -m benchmarks.tokens_bench --minidom --steps 2 --repeat 1
+"""
+import argparse
+from pathlib import Path
+import tempfile
+import time
+import tracemalloc
+import xml.dom.minidom
+import xml.etree.ElementTree as element_tree
+
+from benchmarks.corpus import CorpusOptions, generate_class
+from src.compilation_engine import CompilationEngine
+from src.tokenizer import MmapTokenizer, Tokenizer
+from src.xml_writer import TokenXmlWriter
+
+
+def stream_tokens(jack_file: Path, output_file: Path, tokenizer_class=MmapTokenizer):
+    """
+    Writes the token list the way jack_analyzer --tokens does.
+    """
+    with open(output_file, "w", encoding="utf-8", newline="\n") as stream:
+        CompilationEngine(tokenizer_class(jack_file), TokenXmlWriter(stream)).compile_class(token_mode=True)
+
+
+def minidom_tokens(jack_file: Path, output_file: Path):
+    """
+    Writes the token list the way the old token mode did.
+    """
+    tokenizer = Tokenizer(jack_file)
+    root = element_tree.Element("tokens")
+    while tokenizer.has_more_tokens():
+        tokenizer.advance()
+        element_tree.SubElement(root, tokenizer.token_type()).text = f" {tokenizer.current_token_value} "
+    element_tree.ElementTree(root).write(output_file, encoding="utf-8")
+    with open(output_file, "r", encoding="utf-8") as file:
+        xml.dom.minidom.parseString(file.read()).toprettyxml(indent="  ")
+
+
+def measure(run, jack_file: Path, output_file: Path, repeat: int) -> tuple[float, int]:
+    """
+    Returns the best time in seconds over repeat runs, and the peak traced memory in bytes of one more run.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run(jack_file, output_file)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    run(jack_file, output_file)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark token mode output on classes of growing size.")
+    parser.add_argument("--subroutines", type=int, default=25, help="Subroutines in the smallest class.")
+    parser.add_argument("--steps", type=int, default=4, help="Number of sizes; each doubles the one before.")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing repetitions; the best one is reported.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed; the same seed gives the same classes.")
+    parser.add_argument("--minidom", action="store_true",
+                        help="Also measure the old minidom token mode. It takes minutes at the default sizes.")
+    args = parser.parse_args()
+
+    runs = {
+        "stream": stream_tokens,
+        "arrays": lambda jack_file, output_file: stream_tokens(jack_file, output_file, Tokenizer),
+    }
+    if args.minidom:
+        runs["minidom"] = minidom_tokens
+    with tempfile.TemporaryDirectory() as directory:
+        directory = Path(directory)
+        output_file = directory / "MainT.xml"
+        for step in range(args.steps):
+            jack_file = directory / "Main.jack"
+            options = CorpusOptions(subroutines=args.subroutines * 2 ** step)
+            jack_file.write_text(generate_class("Main", options, args.seed))
+            stream_tokens(jack_file, output_file)
+            # One line per token, plus the tokens element's two
+            tokens = len(output_file.read_text(encoding="utf-8").splitlines()) - 2
+            line = f"{jack_file.stat().st_size / 1e6:6.2f} MB, {tokens:8} tokens:"
+            for name, run in runs.items():
+                elapsed, peak = measure(run, jack_file, output_file, args.repeat)
+                line += f"  {name} {elapsed / tokens * 1e9:6.0f} ns/token {peak / 1e6:7.2f} MB"
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
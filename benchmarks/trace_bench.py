@@ -0,0 +1,53 @@
+"""
+benchmarks/trace_bench.py
+Measures tokenizer + parser throughput in tokens/second with tracing off and on.
+
+Run from the repository root:
+python -m benchmarks.trace_bench
+"""
+import argparse
+import os
+from pathlib import Path
+import time
+
+from src import trace
+from src.compilation_engine import CompilationEngine
+from src.tokenizer import Tokenizer
+
+INPUT_DIR: Path = Path(__file__).parent.parent / "input" / "full_tests"
+
+
+def compile_corpus(jack_files: list[Path], rounds: int) -> tuple[int, float]:
+    """
+    Compiles every file `rounds` times. Returns the number of tokens read and the elapsed seconds.
+    """
+    tokens = 0
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for jack_file in jack_files:
+            tokenizer = Tokenizer(jack_file)
+            CompilationEngine(tokenizer).compile_class()
+            tokens += tokenizer.token_index + 1
+    return tokens, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the cost of tracing in the tokenizer and parser.")
+    parser.add_argument("--rounds", type=int, default=50, help="How many times to compile the corpus per setting.")
+    args = parser.parse_args()
+
+    jack_files = sorted(INPUT_DIR.rglob("*.jack"))
+    settings = [("off", None), ("parser", trace.PARSER_LEVEL), ("tokens", trace.TOKEN_LEVEL)]
+    with open(os.devnull, "w") as devnull:
+        for name, level in settings:
+            if level is None:
+                trace.disable()
+            else:
+                trace.enable(level, devnull)
+            tokens, elapsed = compile_corpus(jack_files, args.rounds)
+            print(f"trace {name:>6}: {tokens / elapsed:12,.0f} tokens/s ({tokens} tokens in {elapsed:.3f} s)")
+    trace.disable()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,65 +1,359 @@
 """
 jack_analyzer.py
-Opens and writes XML files for the compiler.
+Opens .jack files and writes their parse tree XML or, with --vm, their Hack VM code.
 """
 
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import cProfile
+from functools import partial
+import os
 from pathlib import Path
 import sys
-import xml.etree.ElementTree as element_tree
+import time
 
-from src.tokenizer import Tokenizer
+from src import trace
+from src.atomic_file import open_atomic
+from src.build_cache import BuildCache
+from src.code_generator import VmSink
+from src.constant_folder import ConstantFolder
+from src.dead_code import DeadCodeEliminator
+from src.peephole import PeepholeOptimizer
+from src.token_stream import write_tokens
+from src.tokenizer import MmapTokenizer, Tokenizer
+from src.watcher import FileWatcher
 from src.compilation_engine import CompilationEngine
+from src.output_sink import NullSink
+from src.profiler import Profiler
+from src.xml_writer import TokenXmlWriter, XmlStreamWriter
 
+# Part of every build cache key. Bump it whenever a change to the analyzer changes its output.
+ANALYZER_VERSION: str = "1.1"
 
-def check_args():
-    if len(sys.argv) < 2:
-        print("Usage: python jack_analyzer.py <input path>")
-        sys.exit(1)
-    path = Path(sys.argv[1])
-    print(f"Current path: {path}")
-    return path
+
+def check_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="jack_analyzer.py", description="Compiles Jack files to parse tree XML or Hack VM code.")
+    parser.add_argument("path", type=Path, help="A .jack file or a directory containing .jack files.")
+    parser.add_argument("--trace", action="count", default=0,
+                        help="Trace parser decisions. Pass twice to also trace every token.")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="Number of worker processes. 0 uses one per CPU core.")
+    parser.add_argument("--check", action="store_true",
+                        help="Only check the syntax: parse every file without writing any output.")
+    parser.add_argument("--vm", action="store_true",
+                        help="Generate Hack VM code (.vm files) instead of parse tree XML.")
+    parser.add_argument("--tokens", action="store_true",
+                        help="Write each file's tokens as <name>T.xml, the token list format of the Jack test files, "
+                             "instead of parse tree XML.")
+    parser.add_argument("--token-stream", action="store_true",
+                        help="Write each file's tokens in the binary .jtok format instead of parse tree XML.")
+    parser.add_argument("--optimize", "-O", action="store_true",
+                        help="With --vm, fold constant expressions and run the peephole optimizer on the VM code.")
+    parser.add_argument("--prune", action="store_true",
+                        help="With --vm, treat the files as one program: remove subroutines that can't be reached "
+                             "from Main.main and statements after a return.")
+    parser.add_argument("--mmap", action="store_true",
+                        help="Memory-map the source files and lex them as bytes, for very large files.")
+    parser.add_argument("--profile", action="store_true",
+                        help="Time each phase and compile_* method, per file and for the whole build.")
+    parser.add_argument("--profile-collapsed", type=Path, metavar="FILE",
+                        help="Also write the --profile timings as collapsed stacks, for flame graph tools.")
+    parser.add_argument("--profile-pstats", type=Path, metavar="FILE",
+                        help="Run the build under cProfile and dump the stats to FILE. Implies --jobs 1.")
+    parser.add_argument("--watch", action="store_true",
+                        help="After building, keep running and recompile files as their content changes.")
+    parser.add_argument("--poll-interval", type=float, default=0.5, metavar="SECONDS",
+                        help="How often --watch checks the files for changes (default: 0.5).")
+    parser.add_argument("--no-cache", action="store_true", help="Compile every file, ignoring the build cache.")
+    parser.add_argument("--cache-dir", type=Path, default=Path(".jack_cache"),
+                        help="Where the build cache is kept (default: .jack_cache).")
+    args = parser.parse_args(argv)
+    if args.vm + args.tokens + args.token_stream > 1:
+        parser.error("--vm, --tokens and --token-stream select different outputs; use one of them")
+    if args.optimize and not args.vm:
+        parser.error("--optimize only applies to VM code; use it with --vm")
+    if args.prune and not args.vm:
+        parser.error("--prune only applies to VM code; use it with --vm")
+    print(f"Current path: {args.path}")
+    return args
 
 
-def check_files(path) -> list[str]:
+def check_files(path, verbose: bool = True) -> list[str]:
     if path.is_dir():
-        print("Found directory:")
-        files = [f for f in path.glob("*.jack")]
-        print(files)
+        files = sorted(path.glob("*.jack"))
+        if verbose:
+            print("Found directory:")
+            print(files)
     elif path.is_file() and path.suffix == ".jack":
-        print("Found file:")
         files = [path]
-        print(files)
+        if verbose:
+            print("Found file:")
+            print(files)
     else:
         raise ValueError("Invalid input: must be a .jack file or a directory containing .jack files.")
 
     return files
 
 
+def output_file_for(jack_file, kind: str = "xml") -> Path:
+    """
+    Returns where the output of the given kind ("xml", "vm", "jtok" or "tokens") for a .jack file is written:
+    output/<directory name>/<class name>.<kind>, or output/<directory name>/<class name>T.xml for tokens
+    """
+    file_path = Path(jack_file)
+    name = f"{file_path.stem}T.xml" if kind == "tokens" else f"{file_path.stem}.{kind}"
+    return Path("output") / file_path.parent.name / name
+
+
+def compile_file(jack_file, check_only: bool = False, profile: bool = False, kind: str = "xml",
+                 optimize: bool = False, prune: bool = False, mmap: bool = False) -> tuple:
+    """
+    Compiles one .jack file and writes its XML, its VM code if kind is "vm", its token list XML if kind is "tokens",
+    or its token stream if kind is "jtok" (see src/token_stream.py). The last two only lex the file. With check_only,
+    the file is parsed into a NullSink and nothing is written. With profile, the engine is instrumented and the
+    timings are returned. With optimize, constant expressions are folded and the VM code goes through the peephole
+    optimizer. With prune, statements after a return are dropped (unreachable subroutines are removed once the whole
+    program is compiled). With mmap, the file is read through an MmapTokenizer.
+    Returns (jack file, output file, elapsed seconds, error message or None, statistics dict). The statistics hold
+    "profile" when profiling, "folded" and "peephole", the number of operations and commands removed, when
+    optimizing, and "dead_statements" when pruning. Errors are returned rather than raised so a worker process can
+    report them back in order with everything else.
+    """
+    file_path = Path(jack_file)
+    output_file = output_file_for(file_path, kind)
+    profiler = Profiler(file_path.name)
+    folder = ConstantFolder() if optimize else None
+    peephole = PeepholeOptimizer() if optimize else None
+    dead_code = DeadCodeEliminator() if prune else None
+    start = time.perf_counter()
+    try:
+        starting_path = fr"{file_path.parent.parent}"
+        if trace.parser:
+            trace.logger.debug("Starting path: %s", starting_path)
+        with profiler.phase("read"):
+            tokenizer = MmapTokenizer(file_path) if mmap else Tokenizer(file_path)
+        with profiler.phase("lex"):
+            tokenizer.has_more_tokens()
+        with profiler.phase("compile"):
+            if check_only:
+                compile_into(tokenizer, NullSink(), profiler if profile else None)
+            elif kind == "jtok":
+                write_tokens(tokenizer, output_file)
+            else:
+                # The output is streamed to the file as it is parsed, so no tree is built for it.
+                with open_atomic(output_file, "w", encoding="utf-8", newline="\n") as output_stream:
+                    if kind == "vm":
+                        sink = VmSink(output_stream, folder=folder, peephole=peephole, dead_code=dead_code)
+                    elif kind == "tokens":
+                        sink = TokenXmlWriter(output_stream)
+                    else:
+                        sink = XmlStreamWriter(output_stream)
+                    compile_into(tokenizer, sink, profiler if profile else None, token_mode=kind == "tokens")
+        error = None
+    except Exception as exception:
+        error = f"{type(exception).__name__}: {exception}"
+    statistics = {}
+    if profile:
+        statistics["profile"] = profiler.to_dict()
+    if optimize:
+        statistics["folded"] = folder.removed
+        statistics["peephole"] = peephole.removed
+    if prune:
+        statistics["dead_statements"] = dead_code.statements
+    return file_path, output_file, time.perf_counter() - start, error, statistics
+
+
+def compile_into(tokenizer: Tokenizer, sink, profiler: Profiler | None = None, token_mode: bool = False):
+    """
+    Compiles a class from tokenizer into sink, instrumenting the engine if there is a profiler. In token mode the
+    tokens are sent to the sink without being parsed.
+    """
+    compiler = CompilationEngine(tokenizer, sink)
+    if profiler is not None:
+        profiler.instrument(compiler)
+    compiler.compile_class(token_mode=token_mode)
+
+
+def report_results(results, cache: BuildCache | None = None, check_only: bool = False,
+                   profiler: Profiler | None = None, kind: str = "xml") -> int:
+    """
+    Prints each file's result in order, with errors going to stderr. Returns the number of failed files.
+    Successfully compiled files are added to the build cache, if there is one, and per-file timings are merged into
+    profiler, if there is one.
+    """
+    failures = 0
+    folded = peephole = dead_statements = 0
+    for jack_file, output_file, elapsed, error, statistics in results:
+        if error is None and check_only:
+            print(f"{jack_file}: OK ({elapsed * 1000:.1f} ms)")
+        elif error is None:
+            details = f"{elapsed * 1000:.1f} ms"
+            if "folded" in statistics:
+                details += f", {statistics['folded']} operations folded, {statistics['peephole']} commands removed"
+                folded += statistics["folded"]
+                peephole += statistics["peephole"]
+            dead_statements += statistics.get("dead_statements", 0)
+            print(f"{jack_file} -> {output_file} ({details})")
+            if cache is not None:
+                cache.store(jack_file, output_file, kind)
+        else:
+            failures += 1
+            print(f"{jack_file}: {error} ({elapsed * 1000:.1f} ms)", file=sys.stderr)
+        if profiler is not None and "profile" in statistics:
+            file_profiler = Profiler(Path(jack_file).name)
+            file_profiler.merge(statistics["profile"])
+            print(f"    {file_profiler.summary()}")
+            profiler.merge(statistics["profile"])
+    if folded or peephole:
+        print(f"Constant folding removed {folded} operations; the peephole optimizer removed {peephole} commands.")
+    if dead_statements:
+        print(f"Removed {dead_statements} statements after a return.")
+    return failures
+
+
+def prune_program(files: list, failures: int):
+    """
+    Removes the subroutines that can't be reached from Main.main from the program's .vm files. Skipped if any file
+    failed to compile, since a missing file's calls would be missing from the call graph.
+    """
+    if failures:
+        print("Not removing unreachable subroutines: the program didn't compile completely.")
+        return
+    dead_code = DeadCodeEliminator()
+    if not dead_code.prune_program(output_file_for(jack_file, "vm") for jack_file in files):
+        print("Not removing unreachable subroutines: the program has no Main.main.")
+        return
+    print(f"Removed {len(dead_code.subroutines)} unreachable subroutines", end="")
+    print(f": {', '.join(dead_code.subroutines)}" if dead_code.subroutines else ".")
+
+
+def restore_unpruned(files: list, compile_one, cache: BuildCache | None, kind: str) -> int:
+    """
+    Puts back the unpruned VM output of files that weren't recompiled, so the program can be pruned again as a whole:
+    a subroutine removed by an earlier prune may be called now. Each file's output is restored from the build cache,
+    or recompiled if it isn't cached. Returns the number of files that failed to recompile.
+    """
+    stale_files = [jack_file for jack_file in files
+                   if cache is None or not cache.restore(jack_file, output_file_for(jack_file, "vm"), kind)]
+    return report_results(map(compile_one, stale_files), cache, kind=kind)
+
+
+def watch(args: argparse.Namespace, watcher: FileWatcher, compile_one, cache: BuildCache | None, kind: str):
+    """
+    Recompiles files as their content changes until interrupted with Ctrl+C, reporting the latency from each save to
+    its output being written. Everything runs in this process, so imports and the build cache stay loaded.
+    """
+    print(f"Watching {args.path} every {args.poll_interval} s. Press Ctrl+C to stop.")
+    try:
+        while True:
+            time.sleep(args.poll_interval)
+            changed, removed = watcher.poll()
+            for jack_file in removed:
+                print(f"{jack_file} was removed.")
+            if not changed:
+                continue
+            results = []
+            latencies = []
+            for jack_file, modified in changed:
+                results.append(compile_one(jack_file))
+                if results[-1][3] is None:
+                    latencies.append(time.time() - modified)
+            failures = report_results(results, cache, args.check, kind=kind)
+            if args.prune and not args.check:
+                # The unchanged files on disk were pruned by the last build.
+                changed_files = {jack_file for jack_file, _ in changed}
+                unchanged_files = [jack_file for jack_file in sorted(watcher.snapshots)
+                                   if jack_file not in changed_files]
+                restore_failures = restore_unpruned(unchanged_files, compile_one, cache, kind)
+                prune_program(sorted(watcher.snapshots), failures + restore_failures)
+            if cache is not None:
+                cache.save()
+            summary = f"Rebuilt {len(results) - failures}/{len(results)} changed files"
+            if latencies:
+                summary += (f"; save to output took {max(latencies) * 1000:.0f} ms at most, "
+                            f"{sum(latencies) / len(latencies) * 1000:.0f} ms on average")
+            print(f"{summary}.")
+    except KeyboardInterrupt:
+        print("Stopped watching.")
+
+
+def _init_worker(trace_level: int):
+    """
+    Sets up tracing in a worker process the same way as in the parent.
+    """
+    if trace_level:
+        trace.enable(trace_level)
+
+
 def main():
     """
     Handles the main compiler loop.
     """
 
-    path = check_args()
-    files = check_files(path)
+    args = check_args()
+    trace_level = trace.level_for_verbosity(args.trace) if args.trace else 0
+    if trace_level:
+        trace.enable(trace_level)
+    files = check_files(args.path)
+    # Taken before the first build, so edits saved while it runs are picked up by the first poll.
+    watcher = FileWatcher(lambda: check_files(args.path, verbose=False)) if args.watch else None
+    # A syntax check writes nothing, so there is nothing to cache.
+    cache = None if args.no_cache or args.check else BuildCache(args.cache_dir, ANALYZER_VERSION)
 
-    for jack_files in files:
-        file_path = Path(jack_files)
-        starting_path = fr"{file_path.parent.parent}"
-        output_path = Path(fr"output\{file_path.parent.name}")
-        print(starting_path)
-        tokenizer = Tokenizer(jack_files)
-        compiler = CompilationEngine(tokenizer)
+    kind = "vm" if args.vm else "tokens" if args.tokens else "jtok" if args.token_stream else "xml"
+    # Optimized and unoptimized VM code are different outputs of the same source, so they are cached separately.
+    cache_kind = kind + ("-optimized" if args.optimize else "") + ("-pruned" if args.prune else "")
+
+    start = time.perf_counter()
+    stale_files = []
+    for jack_file in files:
+        output_file = output_file_for(jack_file, kind)
+        if cache is not None and cache.restore(jack_file, output_file, cache_kind):
+            print(f"{jack_file} -> {output_file} (cached)")
+        else:
+            stale_files.append(jack_file)
 
-        compiler.compile_class()
+    jobs = args.jobs if args.jobs > 0 else os.cpu_count() or 1
+    # cProfile only sees the process it runs in, so the pstats dump needs every file compiled in this one.
+    jobs = 1 if args.profile_pstats else min(jobs, len(stale_files)) or 1
+    profile = args.profile or args.profile_collapsed is not None
+    profiler = Profiler() if profile else None
+    compile_one = partial(compile_file, check_only=args.check, profile=profile, kind=kind, optimize=args.optimize,
+                          prune=args.prune, mmap=args.mmap)
+    if jobs == 1:
+        c_profile = cProfile.Profile() if args.profile_pstats else None
+        if c_profile is not None:
+            c_profile.enable()
+        failures = report_results(map(compile_one, stale_files), cache, args.check, profiler, cache_kind)
+        if c_profile is not None:
+            c_profile.disable()
+            c_profile.dump_stats(args.profile_pstats)
+    else:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(trace_level,)) as executor:
+            # map hands results back in input order, so output and errors are reported deterministically.
+            failures = report_results(executor.map(compile_one, stale_files), cache, args.check,
+                                      profiler, cache_kind)
 
-        tree = element_tree.ElementTree(compiler.root)
-        element_tree.indent(tree)
-        output_path.mkdir(parents=True, exist_ok=True)
-        tree.write(fr"{output_path}\{file_path.stem}.xml", encoding="utf-8", short_empty_elements=False)
-        xml_str = element_tree.tostring(compiler.root, encoding="unicode", method="html")
+    if args.prune and not args.check:
+        prune_program(files, failures)
 
-        print("XML file parsed and formatted.")
+    verb = "Checked" if args.check else "Compiled"
+    print(f"{verb} {len(files) - failures}/{len(files)} files in {time.perf_counter() - start:.3f} s "
+          f"using {jobs} job{'s' if jobs > 1 else ''}.")
+    if profiler is not None:
+        print(profiler.report())
+        if args.profile_collapsed is not None:
+            args.profile_collapsed.write_text(profiler.collapsed_stacks())
+            print(f"Collapsed stacks written to {args.profile_collapsed}")
+    if args.profile_pstats:
+        print(f"cProfile stats written to {args.profile_pstats}")
+    if cache is not None:
+        cache.save()
+        print(cache.statistics())
+    if watcher is not None:
+        watch(args, watcher, compile_one, cache, cache_kind)
+    elif failures:
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
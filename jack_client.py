@@ -0,0 +1,45 @@
+"""
+jack_client.py
+Sends a .jack file to a running jack_server.py and prints its XML or VM code, or the server's diagnostics.
+"""
+
+import argparse
+from pathlib import Path
+import sys
+
+from src.compile_client import CompileClient
+
+
+def check_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="jack_client.py", description="Compiles a .jack file on a compile server.")
+    parser.add_argument("socket", type=Path, help="The server's socket.")
+    parser.add_argument("path", type=Path, nargs="?",
+                        help="The .jack file to compile. Omit it to read the source from standard input.")
+    parser.add_argument("--vm", action="store_true", help="Print Hack VM code instead of parse tree XML.")
+    parser.add_argument("--optimize", "-O", action="store_true",
+                        help="Fold constants and run the peephole optimizer on VM code. Requires --vm.")
+    parser.add_argument("--shutdown", action="store_true", help="Stop the server instead of compiling.")
+    args = parser.parse_args(argv)
+    if args.optimize and not args.vm:
+        parser.error("--optimize requires --vm")
+    return args
+
+
+def main():
+    """
+    Sends one request and prints the response. Exits with 1 if the compile failed.
+    """
+    args = check_args()
+    with CompileClient(args.socket) as client:
+        if args.shutdown:
+            client.request(shutdown=True)
+            return
+        # The server may run in another directory, so paths are sent absolute.
+        source = {"path": str(args.path.resolve())} if args.path else {"source": sys.stdin.read()}
+        response = client.request(**source, kind="vm" if args.vm else "xml", optimize=args.optimize)
+    if not response["ok"]:
+        sys.exit(response["error"])
+    sys.stdout.write(response["output"])
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+jack_server.py
+Runs a long-lived compile server on a Unix domain socket. See src/compile_server.py for the protocol, and
+jack_client.py for a client.
+"""
+
+import argparse
+from pathlib import Path
+import socketserver
+import sys
+
+from src import trace
+
+
+def check_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="jack_server.py", description="Serves Jack compile requests on a Unix domain socket.")
+    parser.add_argument("socket", type=Path, help="Path of the socket to listen on. An existing file there is replaced.")
+    parser.add_argument("--trace", action="count", default=0,
+                        help="Trace parser decisions. Pass twice to also trace every token.")
+    return parser.parse_args(argv)
+
+
+def main():
+    """
+    Serves requests until a client asks the server to shut down or it is interrupted.
+    """
+    args = check_args()
+    if not hasattr(socketserver, "UnixStreamServer"):
+        sys.exit("jack_server.py needs Unix domain sockets, which this platform doesn't support.")
+    # Imported here so the message above is shown instead of an ImportError.
+    from src.compile_server import CompileServer
+
+    if args.trace:
+        trace.enable(trace.level_for_verbosity(args.trace))
+    with CompileServer(args.socket) as server:
+        print(f"Listening on {args.socket}", flush=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    print("Server stopped.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+src/atomic_file.py
+Writes output files atomically: everything goes to a temporary file next to the target, which is renamed into place
+once it is complete. Readers never see a half written file, even if a build is interrupted.
+"""
+from contextlib import contextmanager
+import os
+from pathlib import Path
+import stat
+import tempfile
+
+
+def _read_umask() -> int:
+    """
+    Returns the process umask. The only way to read it is to set it, so this runs once at import.
+    """
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+UMASK = _read_umask()
+
+
+@contextmanager
+def open_atomic(output_file: Path, mode: str = "wb", **kwargs):
+    """
+    Opens a temporary file for writing and moves it over output_file when the block exits without an error.
+    Extra keyword arguments are passed to open, e.g. encoding or buffering.
+    The file ends up with the permissions open would give it: the target's if it exists, otherwise 0o666 less the
+    umask. mkstemp alone would leave it readable only by its owner.
+    """
+    output_file = Path(output_file)
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    handle, temp_name = tempfile.mkstemp(dir=output_file.parent, prefix=f".{output_file.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(handle, mode, **kwargs) as temp_file:
+            yield temp_file
+        try:
+            permissions = stat.S_IMODE(os.stat(output_file).st_mode)
+        except FileNotFoundError:
+            permissions = 0o666 & ~UMASK
+        os.chmod(temp_name, permissions)
+        os.replace(temp_name, output_file)
+    except BaseException:
+        os.unlink(temp_name)
+        raise
+
+
+def write_atomic(output_file: Path, data: bytes):
+    """
+    Writes data to output_file atomically.
+    """
+    with open_atomic(output_file) as temp_file:
+        temp_file.write(data)
@@ -0,0 +1,92 @@
+"""
+src/build_cache.py
+Incremental build cache for the analyzer.
+
+Each compiled output is stored under objects/<key> in the cache directory, where the key is a hash of the analyzer
+version, the output kind and the .jack file's content. manifest.json records which source and output each key was
+built from. A file whose key is already in the manifest doesn't need to be tokenized or parsed again; its output is
+restored from the cached copy if it is missing or different.
+"""
+import hashlib
+import json
+from pathlib import Path
+
+from src.atomic_file import write_atomic
+
+MANIFEST_NAME: str = "manifest.json"
+
+
+class BuildCache:
+    """
+    Represents an on-disk build cache.
+    """
+    def __init__(self, cache_dir: Path, version: str):
+        self.cache_dir = Path(cache_dir)
+        self.objects_dir = self.cache_dir / "objects"
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        self.entries: dict = {}
+        self._keys: dict = {}
+
+        manifest_file = self.cache_dir / MANIFEST_NAME
+        if manifest_file.exists():
+            try:
+                manifest = json.loads(manifest_file.read_text(encoding="utf-8"))
+            except ValueError:
+                manifest = {}
+            # Entries from another analyzer version can never hit, so they are dropped here rather than kept around.
+            if manifest.get("version") == self.version:
+                self.entries = manifest.get("entries", {})
+
+    def key_for(self, jack_file: Path, kind: str = "xml") -> str:
+        """
+        Returns the cache key for a source file: a hash of the analyzer version, the output kind and its content.
+        The key is remembered so store doesn't need to read the file again.
+        """
+        digest = hashlib.sha256(f"{self.version}\0{kind}\0".encode("utf-8"))
+        digest.update(Path(jack_file).read_bytes())
+        key = digest.hexdigest()
+        self._keys[(str(jack_file), kind)] = key
+        return key
+
+    def restore(self, jack_file: Path, output_file: Path, kind: str = "xml") -> bool:
+        """
+        Checks whether jack_file's output is cached. On a hit, makes sure output_file holds the cached output.
+        Returns True on a hit and False on a miss.
+        """
+        key = self.key_for(jack_file, kind)
+        cached_file = self.objects_dir / key
+        if key not in self.entries or not cached_file.exists():
+            self.misses += 1
+            return False
+
+        cached = cached_file.read_bytes()
+        output_file = Path(output_file)
+        if not output_file.exists() or output_file.read_bytes() != cached:
+            write_atomic(output_file, cached)
+        self.hits += 1
+        return True
+
+    def store(self, jack_file: Path, output_file: Path, kind: str = "xml"):
+        """
+        Saves a freshly compiled output_file in the cache under jack_file's key.
+        """
+        key = self._keys.get((str(jack_file), kind)) or self.key_for(jack_file, kind)
+        write_atomic(self.objects_dir / key, Path(output_file).read_bytes())
+        self.entries[key] = {"source": str(jack_file), "output": str(output_file), "kind": kind}
+
+    def save(self):
+        """
+        Writes the manifest to disk.
+        """
+        manifest = {"version": self.version, "entries": self.entries}
+        write_atomic(self.cache_dir / MANIFEST_NAME, json.dumps(manifest, indent=2, sort_keys=True).encode("utf-8"))
+
+    def statistics(self) -> str:
+        """
+        Returns a one-line summary of cache hits and misses.
+        """
+        total = self.hits + self.misses
+        rate = self.hits / total * 100 if total else 0.0
+        return f"Cache: {self.hits} hits, {self.misses} misses ({rate:.0f}% hit rate)"
@@ -0,0 +1,426 @@
+"""
+src/code_generator.py
+Generates Hack VM code from the compilation engine's parse, in the same pass as parsing.
+
+VmSink is an OutputSink, so the engine drives it exactly like the XML sinks. It builds a small tree of NonTerminal
+nodes for the declaration being parsed, with terminals kept as (token_type, value) tuples. When a classVarDec ends,
+its variables go into the symbol table; when a subroutineDec ends, CodeGenerator writes its VM code. Either way the
+node is then dropped, so only one subroutine's tree is in memory at a time and no XML is ever produced.
+
+Labels are numbered per subroutine, since VM labels are local to the function they appear in. If a ConstantFolder is
+given, each subroutine's expressions are folded before its code is generated, and if a DeadCodeEliminator is given,
+statements after a return are dropped. If a PeepholeOptimizer is given, each subroutine's commands are buffered and
+optimized before they are written.
+"""
+from functools import partial
+import io
+import sys
+from typing import TextIO
+
+from src.constant_folder import ConstantFolder
+from src.dead_code import DeadCodeEliminator
+from src.jack_ast import NonTerminal
+from src.output_sink import OutputSink
+from src.peephole import PeepholeOptimizer
+from src.symbol_table import Symbol, SymbolTable
+from src.vm_writer import VMWriter
+
+BINARY_OPS: dict = {"+": "add", "-": "sub", "&": "and", "|": "or", "<": "lt", ">": "gt", "=": "eq"}
+# Multiplication and division are done by the OS.
+CALL_OPS: dict = {"*": "Math.multiply", "/": "Math.divide"}
+UNARY_OPS: dict = {"-": "neg", "~": "not"}
+
+
+class CodeGenerator:
+    """
+    Represents the code generator for one class.
+    """
+    def __init__(self, writer: VMWriter, class_name: str, symbols: SymbolTable | None = None,
+                 folder: ConstantFolder | None = None, dead_code: DeadCodeEliminator | None = None):
+        self.writer = writer
+        self.class_name = class_name
+        self.symbols = symbols if symbols is not None else SymbolTable()
+        self.folder = folder
+        self.dead_code = dead_code
+        self.subroutine_name = ""
+        self._labels = 0
+
+    def compile_class_var_dec(self, node: NonTerminal):
+        """
+        Defines the variables of a class variable declaration.
+        ('static'|'field') type varName (',' varName)* ';'
+        """
+        children = node.children
+        kind, type_name = children[0][1], children[1][1]
+        for token_type, value in children[2:]:
+            if token_type == "identifier":
+                self.symbols.define(value, type_name, kind)
+
+    def compile_subroutine(self, node: NonTerminal):
+        """
+        Writes the VM function for a subroutine declaration.
+        ('constructor'|'method'|'function') ('void'|type) subroutineName '('parameterList')' subroutineBody
+        """
+        if self.dead_code is not None:
+            self.dead_code.prune_statements(node)
+        if self.folder is not None:
+            self.folder.fold(node)
+        children = node.children
+        subroutine_kind, self.subroutine_name = children[0][1], children[2][1]
+        self.symbols.start_subroutine()
+        self._labels = 0
+        if subroutine_kind == "method":
+            self.symbols.define("this", self.class_name, "arg")
+
+        body = None
+        for child in children:
+            if child.__class__ is NonTerminal:
+                if child.kind == "parameterList":
+                    self._define_parameters(child)
+                elif child.kind == "subroutineBody":
+                    body = child
+
+        statements = None
+        for child in body.children:
+            if child.__class__ is NonTerminal:
+                if child.kind == "varDec":
+                    type_name = child.children[1][1]
+                    for token_type, value in child.children[2:]:
+                        if token_type == "identifier":
+                            self.symbols.define(value, type_name, "var")
+                elif child.kind == "statements":
+                    statements = child
+
+        self.writer.write_function(f"{self.class_name}.{self.subroutine_name}", self.symbols.var_count("var"))
+        if subroutine_kind == "constructor":
+            self.writer.write_push("constant", self.symbols.var_count("field"))
+            self.writer.write_call("Memory.alloc", 1)
+            self.writer.write_pop("pointer", 0)
+        elif subroutine_kind == "method":
+            self.writer.write_push("argument", 0)
+            self.writer.write_pop("pointer", 0)
+        if statements is not None:
+            self.compile_statements(statements)
+
+    def _define_parameters(self, node: NonTerminal):
+        """
+        Defines the arguments of a parameter list.
+        ((type varName) (',' type varName)*)?
+        """
+        names = [value for token_type, value in node.children if value != ","]
+        for type_name, name in zip(names[::2], names[1::2]):
+            self.symbols.define(name, type_name, "arg")
+
+    def compile_statements(self, node: NonTerminal):
+        """
+        Writes the code for each statement in turn.
+        """
+        for statement in node.children:
+            match statement.kind:
+                case "letStatement":
+                    self.compile_let(statement)
+                case "doStatement":
+                    self.compile_do(statement)
+                case "ifStatement":
+                    self.compile_if(statement)
+                case "whileStatement":
+                    self.compile_while(statement)
+                case "returnStatement":
+                    self.compile_return(statement)
+
+    def compile_let(self, node: NonTerminal):
+        """
+        'let' varName ('['expression']')? '=' expression ';'
+        """
+        children = node.children
+        name = children[1][1]
+        if children[2] == ("symbol", "["):
+            # The target address is computed first, but can only be stored in pointer 1 once the value has been
+            # computed, since the value may itself use an array.
+            self._push_variable(name)
+            self.compile_expression(children[3])
+            self.writer.write_arithmetic("add")
+            self.compile_expression(children[6])
+            self.writer.write_pop("temp", 0)
+            self.writer.write_pop("pointer", 1)
+            self.writer.write_push("temp", 0)
+            self.writer.write_pop("that", 0)
+        else:
+            self.compile_expression(children[3])
+            symbol = self._variable(name)
+            self.writer.write_pop(symbol.segment, symbol.index)
+
+    def compile_do(self, node: NonTerminal):
+        """
+        'do' subroutineCall ';'
+        The return value is discarded.
+        """
+        self.compile_call(node.children[1:-1])
+        self.writer.write_pop("temp", 0)
+
+    def compile_if(self, node: NonTerminal):
+        """
+        'if' '('expression')' '{'statements'}' ('else' '{'statements'}')?
+        """
+        condition = None
+        branches = [None, None]
+        has_else = False
+        for child in node.children:
+            if child.__class__ is NonTerminal:
+                if child.kind == "expression":
+                    condition = child
+                else:
+                    branches[has_else] = child
+            elif child == ("keyword", "else"):
+                has_else = True
+
+        else_label, end_label = self._new_labels("IF_ELSE", "IF_END")
+        self.compile_expression(condition)
+        self.writer.write_arithmetic("not")
+        self.writer.write_if(else_label if has_else else end_label)
+        if branches[0] is not None:
+            self.compile_statements(branches[0])
+        if has_else:
+            self.writer.write_goto(end_label)
+            self.writer.write_label(else_label)
+            if branches[1] is not None:
+                self.compile_statements(branches[1])
+        self.writer.write_label(end_label)
+
+    def compile_while(self, node: NonTerminal):
+        """
+        'while' '('expression')' '{'statements'}'
+        """
+        condition = body = None
+        for child in node.children:
+            if child.__class__ is NonTerminal:
+                if child.kind == "expression":
+                    condition = child
+                else:
+                    body = child
+
+        loop_label, end_label = self._new_labels("WHILE_EXP", "WHILE_END")
+        self.writer.write_label(loop_label)
+        self.compile_expression(condition)
+        self.writer.write_arithmetic("not")
+        self.writer.write_if(end_label)
+        if body is not None:
+            self.compile_statements(body)
+        self.writer.write_goto(loop_label)
+        self.writer.write_label(end_label)
+
+    def compile_return(self, node: NonTerminal):
+        """
+        'return' expression?';'
+        Void subroutines return 0.
+        """
+        if node.children[1].__class__ is NonTerminal:
+            self.compile_expression(node.children[1])
+        else:
+            self.writer.write_push("constant", 0)
+        self.writer.write_return()
+
+    def compile_expression(self, node: NonTerminal):
+        """
+        term (op term)*
+        Jack has no operator precedence, so operators are applied left to right.
+        """
+        self._generate([node])
+
+    def compile_term(self, node: NonTerminal):
+        """
+        integerConstant | stringConstant | keywordConstant | varName | varName'['expression']' | '('expression')'|
+        (unaryOp term) | subroutineCall
+        """
+        self._generate([node])
+
+    def compile_call(self, parts: list):
+        """
+        subroutineName '('expressionList')' | (className|varName)'.'subroutineName'('expressionList')'
+        Calls on a variable or on this pass the object as a hidden first argument.
+        """
+        stack = []
+        self._expand_call(parts, stack)
+        self._generate(stack)
+
+    def _generate(self, stack: list):
+        """
+        Writes the code for the expressions and terms on stack, last first, without recursing.
+
+        Each expression or term popped writes what comes before its operands straight away and pushes the rest: its
+        operands, and a deferred write, such as the operator, that must follow them. Nesting depth is only limited by
+        memory, like the compilation engine's expression parser.
+        """
+        while stack:
+            item = stack.pop()
+            if item.__class__ is not NonTerminal:
+                item()
+            elif item.kind == "expression":
+                self._expand_expression(item, stack)
+            else:
+                self._expand_term(item, stack)
+
+    def _expand_expression(self, node: NonTerminal, stack: list):
+        """
+        Pushes an expression's terms, each op after the term it applies to.
+        """
+        children = node.children
+        for position in range(len(children) - 2, 0, -2):
+            op = children[position][1]
+            if op in CALL_OPS:
+                stack.append(partial(self.writer.write_call, CALL_OPS[op], 2))
+            else:
+                stack.append(partial(self.writer.write_arithmetic, BINARY_OPS[op]))
+            stack.append(children[position + 1])
+        stack.append(children[0])
+
+    def _expand_term(self, node: NonTerminal, stack: list):
+        """
+        Writes a term's code, or its code up to the expression or term nested in it.
+        """
+        children = node.children
+        if not children:
+            raise ValueError(f"Empty term in {self.class_name}.{self.subroutine_name}")
+        match children[0]:
+            case ("integerConstant", value):
+                self.writer.write_push("constant", int(value))
+            case ("stringConstant", value):
+                self.writer.write_push("constant", len(value))
+                self.writer.write_call("String.new", 1)
+                for character in value:
+                    self.writer.write_push("constant", ord(character))
+                    self.writer.write_call("String.appendChar", 2)
+            case ("keyword", "true"):
+                self.writer.write_push("constant", 0)
+                self.writer.write_arithmetic("not")
+            case ("keyword", "false" | "null"):
+                self.writer.write_push("constant", 0)
+            case ("keyword", "this"):
+                self.writer.write_push("pointer", 0)
+            case ("symbol", "("):
+                stack.append(children[1])
+            case ("symbol", "-" | "~" as op):
+                stack.append(partial(self.writer.write_arithmetic, UNARY_OPS[op]))
+                stack.append(children[1])
+            case ("identifier", name):
+                if len(children) == 1:
+                    self._push_variable(name)
+                elif children[1] == ("symbol", "["):
+                    self._push_variable(name)
+                    stack.append(self._read_array_element)
+                    stack.append(children[2])
+                else:
+                    self._expand_call(children, stack)
+            case _:
+                raise ValueError(f"Unexpected term {children[0]} in {self.class_name}.{self.subroutine_name}")
+
+    def _read_array_element(self):
+        """
+        Replaces the array address and index on the stack with the element's value.
+        """
+        self.writer.write_arithmetic("add")
+        self.writer.write_pop("pointer", 1)
+        self.writer.write_push("that", 0)
+
+    def _expand_call(self, parts: list, stack: list):
+        """
+        Writes the hidden first argument of a call, if it has one, and pushes its arguments and the call itself.
+        """
+        expressions = [child for child in parts[-2].children if child.__class__ is NonTerminal]
+        if parts[1] == ("symbol", "."):
+            target, subroutine_name = parts[0][1], parts[2][1]
+            symbol = self.symbols.lookup(target)
+            if symbol is None:
+                name, n_args = f"{target}.{subroutine_name}", len(expressions)
+            else:
+                self.writer.write_push(symbol.segment, symbol.index)
+                name, n_args = f"{symbol.type}.{subroutine_name}", len(expressions) + 1
+        else:
+            self.writer.write_push("pointer", 0)
+            name, n_args = f"{self.class_name}.{parts[0][1]}", len(expressions) + 1
+        stack.append(partial(self.writer.write_call, name, n_args))
+        stack.extend(reversed(expressions))
+
+    def _variable(self, name: str) -> Symbol:
+        """
+        Returns the Symbol of a variable.
+        """
+        symbol = self.symbols.lookup(name)
+        if symbol is None:
+            raise ValueError(f"Undefined variable {name} in {self.class_name}.{self.subroutine_name}")
+        return symbol
+
+    def _push_variable(self, name: str):
+        """
+        Pushes the value of a variable.
+        """
+        symbol = self._variable(name)
+        self.writer.write_push(symbol.segment, symbol.index)
+
+    def _new_labels(self, *prefixes: str) -> list[str]:
+        """
+        Returns a fresh set of labels, one per prefix, sharing a number that is unique within the subroutine.
+        """
+        number = self._labels
+        self._labels += 1
+        return [f"{prefix}{number}" for prefix in prefixes]
+
+
+class VmSink(OutputSink):
+    """
+    Writes VM code for each subroutine as soon as the engine has parsed it.
+    """
+    def __init__(self, stream: TextIO, symbols: SymbolTable | None = None, folder: ConstantFolder | None = None,
+                 peephole: PeepholeOptimizer | None = None, dead_code: DeadCodeEliminator | None = None):
+        """
+        symbols: the table to use for the class, e.g. one being reused. Defaults to a new SymbolTable.
+        folder: folds constants in each subroutine before its code is generated. Defaults to no folding.
+        peephole: optimizes each subroutine's commands before they are written. Defaults to no optimization.
+        dead_code: drops statements after a return before code is generated. Defaults to keeping them.
+        """
+        self.stream = stream
+        self.peephole = peephole
+        self._buffer = io.StringIO() if peephole is not None else None
+        self.writer = VMWriter(self._buffer if peephole is not None else stream)
+        self.symbols = symbols if symbols is not None else SymbolTable()
+        self.folder = folder
+        self.dead_code = dead_code
+        self.generator: CodeGenerator | None = None
+        self._open: list[NonTerminal] = []
+
+    def start_nonterminal(self, tag: str):
+        node = NonTerminal(tag)
+        if self._open:
+            self._open[-1].children.append(node)
+        self._open.append(node)
+
+    def end_nonterminal(self, tag: str):
+        node = self._open.pop()
+        if tag == "classVarDec" or tag == "subroutineDec":
+            class_children = self._open[-1].children
+            class_children.pop()
+            if self.generator is None:
+                # 'class' className '{' are the class's first children.
+                self.generator = CodeGenerator(self.writer, class_children[1][1], self.symbols, self.folder,
+                                               self.dead_code)
+            if tag == "classVarDec":
+                self.generator.compile_class_var_dec(node)
+            else:
+                self.generator.compile_subroutine(node)
+                if self.peephole is not None:
+                    self._flush()
+
+    def _flush(self):
+        """
+        Optimizes the buffered subroutine and writes it to the stream.
+        """
+        commands = self.peephole.optimize_function(self._buffer.getvalue().splitlines())
+        self.stream.write("".join(f"{command}\n" for command in commands))
+        self._buffer.seek(0)
+        self._buffer.truncate()
+
+    def terminal(self, token_type: str, value: str, index: int):
+        if token_type == "identifier":
+            # Interned like the symbol table's names, so variable lookups compare by identity.
+            value = sys.intern(value)
+        self._open[-1].children.append((token_type, value))
@@ -12,25 +12,56 @@ x?: x appears 0-1 times
 x*: x appears 0 or more times
 """
 from pathlib import Path
-import xml.etree.ElementTree as element_tree
-import xml.dom.minidom
 
+from src import trace
 from src.tokenizer import Tokenizer
+from src.output_sink import ElementTreeSink, OutputSink
+
+# Token values that start or continue each construct. The tokenizer interns keywords and symbols, so membership tests
+# only compare cached hashes and identities.
+CLASS_VAR_KEYWORDS: frozenset = frozenset({"static", "field"})
+SUBROUTINE_KEYWORDS: frozenset = frozenset({"constructor", "function", "method"})
+STATEMENT_KEYWORDS: frozenset = frozenset({"let", "do", "if", "while", "return"})
+OPS: frozenset = frozenset({"+", "-", "*", "/", "&", "|", "<", ">", "="})
+UNARY_OPS: frozenset = frozenset({"-", "~"})
+KEYWORD_CONSTANTS: frozenset = frozenset({"true", "false", "null", "this"})
+EXPRESSION_LIST_ENDS: frozenset = frozenset({")", "]"})
+
+# Frames on the expression parser's stack: the construct enclosing the term or expression being parsed. A term handler
+# returns the frame it opens, or None for a term that is already complete.
+UNARY: int = 0  # the term of a unary operation
+PARENTHESES: int = 1  # the expression of a parenthesized term
+INDEX: int = 2  # the expression of an array index
+CALL: int = 3  # an expression in a subroutine call's expression list
+TERM_ROOT: int = 4  # compile_term's term
+EXPRESSION_ROOT: int = 5  # compile_expression's expression
+LIST_ROOT: int = 6  # an expression in compile_expression_list's list
 
 
 class CompilationEngine:
     """
     Represents a compilation engine object.
     """
-    def __init__(self, tokenizer: Tokenizer):
+    def __init__(self, tokenizer: Tokenizer, sink: OutputSink | None = None):
+        """
+        sink: receives the parse as start/end non-terminal and terminal events.
+        Defaults to an ElementTreeSink, whose tree is available as self.root.
+        """
         self.tokenizer = tokenizer
-        self.tokens_root = element_tree.Element("tokens")
-        self.root = element_tree.Element("class")
+        self.sink = sink if sink is not None else ElementTreeSink()
+
+    @property
+    def root(self):
+        """
+        Returns the root of whatever the sink built: the class element for an ElementTreeSink, the class node for an
+        AstSink, or None for sinks that don't keep the parse.
+        """
+        return getattr(self.sink, "root", None)
 
     def compile_class(self, token_mode=False):
         """
         Compiles a class and starts the compilation process.
-        Token_mode: if True, runs a basic parse in token mode so we can get a handle on the number of tokens.
+        Token_mode: if True, only sends the tokens to the sink, see _token_mode.
         Grammar:
         'class' className '{' classVarDec* subroutineDec* '}'
         """
@@ -42,263 +73,269 @@ class CompilationEngine:
         # Advance tokenizer and assert first token is in fact class
         self.tokenizer.advance()  # Starts the token advancing
         assert self.tokenizer.current_token_value == "class"
+        self.sink.start_nonterminal("class")
 
         while self.tokenizer.has_more_tokens():
             match self.tokenizer.current_token_value:
                 case "static" | "field":
-                    self.compile_class_var_dec(self.root)
+                    self.compile_class_var_dec()
                 case "function" | "method" | "constructor":
-                    self.compile_subroutine(self.root)
+                    self.compile_subroutine()
                 case _:
-                    self.write_token(self.root)
+                    self.write_token()
                     self.tokenizer.advance()
 
         # Final token write
-        self.write_token(self.root)
-        self.root.tail = "\n"
+        self.write_token()
+        self.sink.end_nonterminal("class")
 
-    def compile_class_var_dec(self, parent):
+    def compile_class_var_dec(self):
         """
         Compiles the variable declarations for a class.
         ('static'|'field') type varName (',' varName)* ';'
         """
-        class_var_dec_element = element_tree.SubElement(parent, "classVarDec")
-        assert self.tokenizer.current_token_value in ["static", "field"]
+        self.sink.start_nonterminal("classVarDec")
+        assert self.tokenizer.current_token_value in CLASS_VAR_KEYWORDS
 
         while self.tokenizer.current_token_value != ";":
-            self.write_token(class_var_dec_element)
+            self.write_token()
             self.tokenizer.advance()
-        self.write_token(class_var_dec_element)
+        self.write_token()
         self.tokenizer.advance()
+        self.sink.end_nonterminal("classVarDec")
 
-    def compile_subroutine(self, parent):
+    def compile_subroutine(self):
         """
         Compiles the start of a subroutine.
         ('constructor'|'method'|'function') ('void'|type) subroutineName '('parameterList')' subroutineBody
         """
-        subroutine_element = element_tree.SubElement(parent, "subroutineDec")
-        assert self.tokenizer.current_token_value in ["function", "method", "constructor"]
+        self.sink.start_nonterminal("subroutineDec")
+        assert self.tokenizer.current_token_value in SUBROUTINE_KEYWORDS
 
         while self.tokenizer.current_token_value != ")":
             if self.tokenizer.current_token_value == "(":
-                self.write_token(subroutine_element)  # Writes (
+                self.write_token()  # Writes (
                 self.tokenizer.advance()
-                self.compile_parameter_list(subroutine_element)
-                self.write_token(subroutine_element)  # Writes ) once parameters are dealt with
+                self.compile_parameter_list()
+                self.write_token()  # Writes ) once parameters are dealt with
                 self.tokenizer.advance()
 
                 break
-            self.write_token(subroutine_element)
+            self.write_token()
             self.tokenizer.advance()
-        self.compile_subroutine_body(subroutine_element)
+        self.compile_subroutine_body()
+        self.sink.end_nonterminal("subroutineDec")
 
-    def compile_parameter_list(self, parent):
+    def compile_parameter_list(self):
         """
         Compiles the parameter list of a subroutine.
         ((type varName) (',' type varName)*)?
         """
-        parameter_list_element = element_tree.SubElement(parent, "parameterList")
+        self.sink.start_nonterminal("parameterList")
         # Writes the token after the (. If it'
 
         if self.tokenizer.current_token_value == ")":
+            self.sink.end_nonterminal("parameterList")
             return  # Parent method will handle writing the closing ")"
 
         while self.tokenizer.current_token_value != ")":
-            self.write_token(parameter_list_element)
+            self.write_token()
             self.tokenizer.advance()
+        self.sink.end_nonterminal("parameterList")
 
-
-    def compile_subroutine_body(self, parent):
+    def compile_subroutine_body(self):
         """
         Compiles the body of a subroutine.
         '{'varDec* statements '}'
         """
-        subroutine_body_element = element_tree.SubElement(parent, "subroutineBody")
+        self.sink.start_nonterminal("subroutineBody")
         while self.tokenizer.current_token_value != "}":
             # Match case won't work here because case doesn't support finding items within a list like if statements do.
             if self.tokenizer.current_token_value == "var":
-                self.compile_var_dec(subroutine_body_element)
-            elif self.tokenizer.current_token_value in ["let", "do", "if", "while", "return"]:
-                self.compile_statements(subroutine_body_element)
+                self.compile_var_dec()
+            elif self.tokenizer.current_token_value in STATEMENT_KEYWORDS:
+                self.compile_statements()
             else:
-                self.write_token(subroutine_body_element)
+                self.write_token()
                 self.tokenizer.advance()
-        print(f"END OF STATEMENT {self.tokenizer.current_token_value}")
-        self.write_token(subroutine_body_element)
+        if trace.parser:
+            trace.logger.debug("END OF SUBROUTINE BODY: %s", self.tokenizer.current_token_value)
+        self.write_token()
         self.tokenizer.advance()
+        self.sink.end_nonterminal("subroutineBody")
 
-    def compile_var_dec(self, parent):
+    def compile_var_dec(self):
         """
         Compiles the variable declaration of a subroutine.
         'var' type varName (',' varName)* ';'
         """
-        subroutine_var_dec = element_tree.SubElement(parent, "varDec")
+        self.sink.start_nonterminal("varDec")
 
         assert self.tokenizer.current_token_value == "var"
         while self.tokenizer.current_token_value != ";":
-            self.write_token(subroutine_var_dec)
+            self.write_token()
             self.tokenizer.advance()
-        self.write_token(subroutine_var_dec)
+        self.write_token()
         self.tokenizer.advance()
+        self.sink.end_nonterminal("varDec")
 
-    def compile_statements(self, parent):
+    def compile_statements(self):
         """
         Compiles statements
         statement*
         """
-        statements_list: list[str] = ["let", "do", "if", "while", "return"]
-        if self.tokenizer.current_token_value in statements_list:
-            statements_element = element_tree.SubElement(parent, "statements")
+        if self.tokenizer.current_token_value in STATEMENT_KEYWORDS:
+            self.sink.start_nonterminal("statements")
 
-            while self.tokenizer.current_token_value in statements_list:
-                print(f"CURRENT TOKEN: {self.tokenizer.current_token_value}")
+            while self.tokenizer.current_token_value in STATEMENT_KEYWORDS:
+                if trace.parser:
+                    trace.logger.debug("STATEMENT: %s", self.tokenizer.current_token_value)
                 match self.tokenizer.current_token_value:
                     case "let":
-                        self.compile_let_statement(statements_element)
+                        self.compile_let_statement()
                     case "do":
-                        self.compile_do_statement(statements_element)
+                        self.compile_do_statement()
                     case "if":
-                        self.compile_if_statement(statements_element)
+                        self.compile_if_statement()
                     case "while":
-                        self.compile_while_statement(statements_element)
+                        self.compile_while_statement()
                     case "return":
-                        self.compile_return_statement(statements_element)
+                        self.compile_return_statement()
+            self.sink.end_nonterminal("statements")
 
-    def compile_let_statement(self, parent):
+    def compile_let_statement(self):
         """
         Compiles a let statement.
         'let' varName ('['expression']')? '=' expression ';'
         """
-        let_statement_element = element_tree.SubElement(parent, "letStatement")
+        self.sink.start_nonterminal("letStatement")
 
         while self.tokenizer.current_token_value != ";":
             match self.tokenizer.current_token_value:
                 case "[":
-                    self.write_token(let_statement_element)
+                    self.write_token()
                     self.tokenizer.advance()
-                    self.compile_expression(let_statement_element)
+                    self.compile_expression()
                 case "=":
-                    self.write_token(let_statement_element)
+                    self.write_token()
                     self.tokenizer.advance()
-                    self.compile_expression(let_statement_element)
+                    self.compile_expression()
                 case ";":
-                    self.write_token(let_statement_element)
+                    self.write_token()
                     break
                 case _:
-                    self.write_token(let_statement_element)
+                    self.write_token()
                     self.tokenizer.advance()
-        self.write_token(let_statement_element)  # Writes the ';'
+        self.write_token()  # Writes the ';'
         self.tokenizer.advance()
+        self.sink.end_nonterminal("letStatement")
 
-    def compile_do_statement(self, parent):
+    def compile_do_statement(self):
         """
         Compiles a do statement.
         'do' subroutineCall ';'
 
         subroutineCall -> subroutineName '('expressionList')' | (className|varName)'.'subroutineName'('expressionList')'
         """
-        do_statement_element = element_tree.SubElement(parent, "doStatement")
+        self.sink.start_nonterminal("doStatement")
 
         while self.tokenizer.current_token_value != ";":
             match self.tokenizer.current_token_value:
                 case "(":
-                    self.write_token(do_statement_element)
+                    self.write_token()
                     self.tokenizer.advance()
-                    self.compile_expression_list(do_statement_element)
+                    self.compile_expression_list()
                 case _:
-                    self.write_token(do_statement_element)
+                    self.write_token()
                     self.tokenizer.advance()
-        self.write_token(do_statement_element)  # Writes the ';'
+        self.write_token()  # Writes the ';'
         self.tokenizer.advance()
+        self.sink.end_nonterminal("doStatement")
 
-
-    def compile_if_statement(self, parent):
+    def compile_if_statement(self):
         """
         Compiles an if statement.
         'if' '('expression')' '{'statements'}' ('else' '{'statements'}')?
         """
-        if_statement_element = element_tree.SubElement(parent, "ifStatement")
+        self.sink.start_nonterminal("ifStatement")
 
         while self.tokenizer.current_token_value != "}":
             match self.tokenizer.current_token_value:
                 case "(":
-                    self.write_token(if_statement_element)
+                    self.write_token()
                     self.tokenizer.advance()
-                    self.compile_expression(if_statement_element)
-            self.write_token(if_statement_element) # ')'
+                    self.compile_expression()
+            self.write_token() # ')'
             self.tokenizer.advance()
-            self.compile_statements(if_statement_element)
-        self.write_token(if_statement_element)
+            self.compile_statements()
+        self.write_token()
         self.tokenizer.advance()
 
         if self.tokenizer.current_token_value == "else":
             while self.tokenizer.current_token_value != "}":
-                self.write_token(if_statement_element)
+                self.write_token()
                 self.tokenizer.advance()
-                self.compile_statements(if_statement_element)
+                self.compile_statements()
 
-            self.write_token(if_statement_element)
+            self.write_token()
             self.tokenizer.advance()
+        self.sink.end_nonterminal("ifStatement")
 
-    def compile_while_statement(self, parent):
+    def compile_while_statement(self):
         """
         Compiles a while statement
         'while' '('expression')' '{'statements'}'
         """
 
-        while_statement_element = element_tree.SubElement(parent, "whileStatement")
+        self.sink.start_nonterminal("whileStatement")
 
         while self.tokenizer.current_token_value != "}":
             match self.tokenizer.current_token_value:
                 case "(":
-                    self.write_token(while_statement_element)
+                    self.write_token()
                     self.tokenizer.advance()
-                    self.compile_expression(while_statement_element)
+                    self.compile_expression()
                 case "{":
-                    self.write_token(while_statement_element)
+                    self.write_token()
                     self.tokenizer.advance()
-                    self.compile_statements(while_statement_element)
+                    self.compile_statements()
                 case _:
-                    self.write_token(while_statement_element)
+                    self.write_token()
                     self.tokenizer.advance()
-        self.write_token(while_statement_element)
+        self.write_token()
         self.tokenizer.advance()
+        self.sink.end_nonterminal("whileStatement")
 
-
-    def compile_return_statement(self, parent):
+    def compile_return_statement(self):
         """
         Compiles a return statement.
         'return' expression?';'
         """
-        return_statement_element = element_tree.SubElement(parent, "returnStatement")
+        self.sink.start_nonterminal("returnStatement")
 
         while self.tokenizer.current_token_value != ";":
-            if self.tokenizer.current_token_value not in ["return"]:
-                self.compile_expression(return_statement_element)
+            if self.tokenizer.current_token_value != "return":
+                self.compile_expression()
                 break  # Stop here — compile_expression advances tokenizer internally
             else:
-                self.write_token(return_statement_element)
+                self.write_token()
                 self.tokenizer.advance()
-        self.write_token(return_statement_element)
+        self.write_token()
         self.tokenizer.advance()
+        self.sink.end_nonterminal("returnStatement")
 
-    def compile_expression(self, parent):
+    def compile_expression(self):
         """
         Compiles an expression.
         term (op term)*
         op -> '+' | '-' | '*' | '/' | '&' | '|' | '<' | '>' | '='
 
+        Jack has no operator precedence, so the terms and ops are siblings in the order they appear.
         """
-        expression_element = element_tree.SubElement(parent, "expression")
-        self.compile_term(expression_element)
-
-        while self.tokenizer.current_token_value in ["+", "-", "*", "/", "&", "|", "<", ">", "="]:
-            self.write_token(expression_element)
-            self.tokenizer.advance()
-
-            self.compile_term(expression_element)
+        self.sink.start_nonterminal("expression")
+        self._parse_expression([EXPRESSION_ROOT])
 
-    def compile_term(self, parent):
+    def compile_term(self):
         """
         Compiles a set of terms inside expressions to the specified values.
         integerConstant | stringConstant | keywordConstant | varName | varName'['expression']' | '('expression')'|(unaryOpTerm)|subroutineCall
@@ -308,108 +345,197 @@ class CompilationEngine:
 
         keywordConstant -> 'true' | 'false' | 'null' | 'this'
         """
-        term_element = element_tree.SubElement(parent, "term")
-
-        match self.tokenizer.current_token_type:
-            case "identifier":
-                print(f"Current token: {self.tokenizer.current_token_value}")
-                next_token_value = self.tokenizer.open_file[
-                                   self.tokenizer.current_index:self.tokenizer.current_index + 1]
-                print(f"Looking ahead. Next token value is: {next_token_value}")
-
-                match next_token_value:
-                    case ".":
-                        print("Subroutine Call.")
-                        while self.tokenizer.current_token_value != ";":
-                            self.write_token(term_element)
-                            self.tokenizer.advance()
-                            if self.tokenizer.current_token_value == "(":
-                                self.write_token(term_element)
-                                self.tokenizer.advance()
-                                self.compile_expression_list(term_element)
-
-                                if self.tokenizer.current_token_value == ")":
-                                    self.write_token(term_element)
-                                    self.tokenizer.advance()
-                                    break
-                    case "[":
-                        print("varName expression")
-                        while self.tokenizer.current_token_value != ";":
-                            self.write_token(term_element)
-                            self.tokenizer.advance()
-                            if self.tokenizer.current_token_value == "[":
-                                self.write_token(term_element)
-                                self.tokenizer.advance()
-                                self.compile_expression(term_element)
-                    case _:
-                        if self.tokenizer.current_token_value != "}":
-                            print("plain varname")
-                            self.write_token(term_element)
-                            self.tokenizer.advance()
-
-            case "stringConstant":
-                self.write_token(term_element)
+        self._parse_expression([TERM_ROOT])
+
+    def compile_expression_list(self):
+        """
+        Compiles an expression list
+        (expression(',' expression)*)?
+        """
+        if self._start_expression_list():
+            self._parse_expression([LIST_ROOT])
+
+    def _parse_expression(self, frames: list[int]):
+        """
+        Parses terms, expressions and expression lists until the construct at the bottom of frames is finished,
+        starting at a term.
+
+        This is the one place expressions nest, and it does so without recursion: frames holds what encloses the term
+        being parsed, the frame a term handler returns is pushed when the term opens one, and frames are popped as
+        their closing tokens are reached. A term inside an expression has the expression's frame on top, so nesting
+        depth is only limited by memory.
+        """
+        tokenizer = self.tokenizer
+        sink = self.sink
+        start_term = True
+        while True:
+            if start_term:
+                sink.start_nonterminal("term")
+                opened = None
+                match tokenizer.current_token_type:
+                    case "identifier":
+                        opened = self._compile_name_term()
+                    case "integerConstant" | "stringConstant":
+                        self._compile_single_token_term()
+                    case "keyword":
+                        if tokenizer.current_token_value in KEYWORD_CONSTANTS:
+                            self._compile_single_token_term()
+                    case "symbol":
+                        if tokenizer.current_token_value == "(":
+                            opened = self._compile_parenthesized_term()
+                        elif tokenizer.current_token_value in UNARY_OPS:
+                            opened = self._compile_unary_term()
+            if opened is not None:
+                frames.append(opened)
+                start_term = True
+                if opened == CALL:
+                    if not self._start_expression_list():
+                        frames.pop()
+                        opened = self._close_call_term()
+                        start_term = False
+                elif opened != UNARY:
+                    sink.start_nonterminal("expression")
+                continue
+
+            # The current term is complete; close what it completes until another term starts.
+            sink.end_nonterminal("term")
+            frame = frames[-1]
+            start_term = False
+            if frame == UNARY:
+                frames.pop()
+                continue
+            if frame == TERM_ROOT:
+                return
+            if tokenizer.current_token_value in OPS:
+                self.write_token()
+                tokenizer.advance()
+                start_term = True
+                continue
+            sink.end_nonterminal("expression")
+            if frame == PARENTHESES or frame == INDEX:
+                frames.pop()
+                self.write_token()  # ) or ]
+                tokenizer.advance()
+                continue
+            if frame == EXPRESSION_ROOT:
+                return
+            # The expression is in an expression list.
+            if tokenizer.current_token_value == ",":
+                self.write_token()
+                tokenizer.advance()
+                sink.start_nonterminal("expression")
+                start_term = True
+                continue
+            sink.end_nonterminal("expressionList")
+            if frame == LIST_ROOT:
+                return
+            frames.pop()
+            opened = self._close_call_term()
+
+    def _start_expression_list(self) -> bool:
+        """
+        Starts an expression list. Returns True if an expression follows, or ends the list and returns False if it's
+        empty.
+        """
+        self.sink.start_nonterminal("expressionList")
+        if trace.parser:
+            trace.logger.debug("EXPRESSION LIST: %s", self.tokenizer.current_token_value)
+        if self.tokenizer.current_token_value in EXPRESSION_LIST_ENDS:
+            self.sink.end_nonterminal("expressionList")
+            return False
+        self.sink.start_nonterminal("expression")
+        return True
+
+    def _compile_name_term(self) -> int | None:
+        """
+        Compiles a term that starts with a name.
+        varName | varName'['expression']' | subroutineCall
+        """
+        next_token = self.tokenizer.peek()
+        if trace.parser:
+            trace.logger.debug("TERM: %s | next token %s", self.tokenizer.current_token_value, next_token)
+
+        match next_token:
+            case ("symbol", "." | "("):
+                return self._compile_call_term()
+            case ("symbol", "["):
+                self.write_token()  # varName
                 self.tokenizer.advance()
-            case "keyword":
-                if self.tokenizer.current_token_value in ["true", "false", "null", "this"]:
-                    self.write_token(term_element)
-                    self.tokenizer.advance()
-            case "integerConstant":
-                self.write_token(term_element)
+                self.write_token()  # [
                 self.tokenizer.advance()
-            case "symbol":
-                if self.tokenizer.current_token_value == "(":
-                    self.write_token(term_element)  # write (
-                    self.tokenizer.advance()
-                    self.compile_expression(term_element)
-                    self.write_token(term_element)  # write )
-                    self.tokenizer.advance()
-                elif self.tokenizer.current_token_value in ["-", "~"]:
-                    self.write_token(term_element)  # Write the unary symbol
+                return INDEX
+            case _:
+                if self.tokenizer.current_token_value != "}":
+                    self.write_token()
                     self.tokenizer.advance()
-                    self.compile_term(term_element)  # Nest the next term inside
+        return None
 
-    def compile_expression_list(self, parent) -> int:
+    def _compile_call_term(self) -> int | None:
         """
-        Compiles an expression list
-        (expression(',' expression)*)?
+        Writes a subroutine call up to and including its '(', and opens its expression list.
         """
-        expression_list_element = element_tree.SubElement(parent, "expressionList")
-        count = 0
-        print(f"EXPR LIST ENTRY TOKEN: {self.tokenizer.current_token_value}")
-        if self.tokenizer.current_token_value in [")", "]"]:
-            return count
-        self.compile_expression(expression_list_element)
+        while self.tokenizer.current_token_value != ";":
+            self.write_token()
+            self.tokenizer.advance()
+            if self.tokenizer.current_token_value == "(":
+                self.write_token()
+                self.tokenizer.advance()
+                return CALL
+        return None
 
-        while self.tokenizer.current_token_value == ",":
-            self.write_token(expression_list_element)
+    def _close_call_term(self) -> int | None:
+        """
+        Writes the ')' after a subroutine call's expression list, or carries on writing the call if the list didn't
+        end at one.
+        """
+        if self.tokenizer.current_token_value == ")":
+            self.write_token()
             self.tokenizer.advance()
+            return None
+        return self._compile_call_term()
+
+    def _compile_single_token_term(self) -> None:
+        """
+        Compiles a term that is a single token.
+        integerConstant | stringConstant | keywordConstant
+        """
+        self.write_token()
+        self.tokenizer.advance()
+
+    def _compile_parenthesized_term(self) -> int:
+        """
+        Opens a parenthesized expression.
+        '('expression')'
+        """
+        self.write_token()  # write (
+        self.tokenizer.advance()
+        return PARENTHESES
 
-            self.compile_expression(expression_list_element)
-            count += 1
-        return count
+    def _compile_unary_term(self) -> int:
+        """
+        Opens a unary operation, whose term follows.
+        unaryOp term
+        """
+        self.write_token()  # Write the unary symbol
+        self.tokenizer.advance()
+        return UNARY
 
-    def write_token(self, parent_name):
+    def write_token(self):
         """
-        Writes a token to the XML.
+        Sends the current token to the sink as a terminal.
         """
-        element_tree.SubElement(parent_name, self.tokenizer.current_token_type).text = f" {self.tokenizer.current_token_value} "
+        self.sink.terminal(self.tokenizer.current_token_type, self.tokenizer.current_token_value,
+                           self.tokenizer.token_index)
 
     def _token_mode(self):
         """
-        Compiles to a basic XML for testing.
+        Sends every token to the sink as a terminal inside a single tokens non-terminal, without parsing.
+        With a TokenXmlWriter this streams the *T.xml format of the Jack test files.
         """
-        print(f"Writing in token mode")
+        if trace.parser:
+            trace.logger.debug("Writing in token mode")
+        self.sink.start_nonterminal("tokens")
         while self.tokenizer.has_more_tokens():
             self.tokenizer.advance()
-            self.write_token(self.root)
-            element_tree.SubElement(self.tokens_root, self.tokenizer.token_type()).text = f" {self.tokenizer.current_token_value} "
-
-        tree = element_tree.ElementTree(self.tokens_root)
-        tree.write("output.xml", encoding="utf-8")
-
-        with open("output.xml", "r", encoding="utf-8") as f:
-            content = f.read()
-            pretty = xml.dom.minidom.parseString(content).toprettyxml(indent="  ")
-            print("\n=== XML File Output ===")
-            print(pretty)
+            self.write_token()
+        self.sink.end_nonterminal("tokens")
@@ -0,0 +1,40 @@
+"""
+src/compile_client.py
+A client for the compile server in src/compile_server.py. It only uses the standard library, so a client process
+starts without importing the compiler.
+"""
+import json
+from pathlib import Path
+import socket
+
+
+class CompileClient:
+    """
+    Represents a connection to a compile server. Requests on one connection are answered in order.
+    """
+    def __init__(self, socket_path: Path, timeout: float | None = 30.0):
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.socket.settimeout(timeout)
+        self.socket.connect(str(socket_path))
+        self._file = self.socket.makefile("rwb")
+
+    def request(self, **request) -> dict:
+        """
+        Sends one request and returns the server's response.
+        """
+        self._file.write(json.dumps(request).encode("utf-8") + b"\n")
+        self._file.flush()
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("The compile server closed the connection")
+        return json.loads(line)
+
+    def close(self):
+        self._file.close()
+        self.socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,118 @@
+"""
+src/compile_server.py
+A long-lived compile server on a Unix domain socket, so editor integrations don't pay for starting Python and
+importing the compiler on every save.
+
+The protocol is one JSON object per line in each direction, and a connection can carry any number of requests.
+A request names either a file or the source text to compile:
+{"path": "/abs/path/Main.jack"} or {"source": "class Main { ... }", "name": "Main"}
+plus optionally "kind" ("xml", the default, or "vm") and "optimize" (fold constants and run the peephole optimizer
+on VM code). The response is {"ok": true, "output": "<xml or vm code>", "elapsed_ms": 1.2}, or
+{"ok": false, "error": "ValueError: ...", "elapsed_ms": 0.3} if the request or the Jack code is wrong.
+{"shutdown": true} stops the server. src/compile_client.py has a client.
+"""
+import io
+import json
+import os
+from pathlib import Path
+import socketserver
+import stat
+import threading
+import time
+
+from src.code_generator import VmSink
+from src.compilation_engine import CompilationEngine
+from src.constant_folder import ConstantFolder
+from src.peephole import PeepholeOptimizer
+from src.tokenizer import Tokenizer
+from src.xml_writer import XmlStreamWriter
+
+KINDS: tuple = ("xml", "vm")
+
+
+def compile_tokenizer(tokenizer: Tokenizer, kind: str = "xml", optimize: bool = False) -> str:
+    """
+    Compiles the class in tokenizer and returns its XML or VM code.
+    """
+    stream = io.StringIO()
+    if kind == "vm":
+        sink = VmSink(stream, folder=ConstantFolder() if optimize else None,
+                      peephole=PeepholeOptimizer() if optimize else None)
+    else:
+        sink = XmlStreamWriter(stream)
+    CompilationEngine(tokenizer, sink).compile_class()
+    return stream.getvalue()
+
+
+class CompileServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Represents the server. Each connection is handled on its own thread.
+    """
+    daemon_threads = True
+
+    def __init__(self, socket_path: Path):
+        self.socket_path = Path(socket_path)
+        # A socket left behind by a server that didn't shut down cleanly is replaced; anything else is left alone.
+        try:
+            mode = os.lstat(self.socket_path).st_mode
+        except FileNotFoundError:
+            pass
+        else:
+            if not stat.S_ISSOCK(mode):
+                raise FileExistsError(f"{self.socket_path} exists and isn't a socket")
+            self.socket_path.unlink()
+        super().__init__(str(self.socket_path), CompileRequestHandler)
+
+    def handle_request_data(self, request: dict) -> dict:
+        """
+        Compiles one request and returns the response.
+        """
+        start = time.perf_counter()
+        try:
+            kind = request.get("kind", "xml")
+            if kind not in KINDS:
+                raise ValueError(f"Unknown kind {kind!r}, expected one of {', '.join(KINDS)}")
+            if "path" in request:
+                tokenizer = Tokenizer(Path(request["path"]))
+            elif "source" in request:
+                tokenizer = Tokenizer.from_source(request["source"], request.get("name", "<source>"))
+            else:
+                raise ValueError("A request needs a 'path' or a 'source'")
+            output = compile_tokenizer(tokenizer, kind, bool(request.get("optimize")))
+            response = {"ok": True, "output": output}
+        except Exception as exception:
+            response = {"ok": False, "error": f"{type(exception).__name__}: {exception}"}
+        response["elapsed_ms"] = (time.perf_counter() - start) * 1000
+        return response
+
+    def server_close(self):
+        super().server_close()
+        if self.socket_path.exists():
+            os.unlink(self.socket_path)
+
+
+class CompileRequestHandler(socketserver.StreamRequestHandler):
+    """
+    Answers each line of a connection with one response line.
+    """
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+            except json.JSONDecodeError as exception:
+                response = {"ok": False, "error": f"Bad request: {exception}"}
+            else:
+                if not isinstance(request, dict):
+                    response = {"ok": False, "error": f"Bad request: expected a JSON object, got {type(request).__name__}"}
+                elif request.get("shutdown"):
+                    self._send({"ok": True})
+                    # shutdown waits for serve_forever to return, so it can't run on the serving thread.
+                    threading.Thread(target=self.server.shutdown).start()
+                    return
+                else:
+                    response = self.server.handle_request_data(request)
+            self._send(response)
+
+    def _send(self, response: dict):
+        self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+        self.wfile.flush()
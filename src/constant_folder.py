@@ -0,0 +1,228 @@
+"""
+src/constant_folder.py
+Constant folding and algebraic simplification of parsed expressions, run on each subroutine's tree before VmSink
+generates its code.
+
+Jack has no operator precedence: term (op term)* is evaluated strictly left to right. So constants can only be folded
+while they lead the expression ("2 * 16 + 1 + x" becomes "33 + x"); in "x + 2 * 16" the multiplication applies to
+x + 2 and nothing can be folded. Arithmetic follows the Hack platform's 16-bit two's complement semantics, with
+division truncating towards zero like Math.divide. Division by zero is never folded, so the program still fails at
+run time the way it would have.
+
+Jack has no negative literals, so a negative result is written as a unary minus applied to a constant. -32768 can't
+be written that way at all (32768 isn't a valid constant), so an operation giving -32768 is left alone.
+
+Identities that are removed: x + 0, x - 0, x | 0, x * 1, x / 1, 0 + x, 0 | x, 1 * x, ~~x, --x, and parentheses around
+a single term. Expressions are simplified in place; ConstantFolder.removed counts the VM operations (binary operators,
+unary operators, Math.multiply/Math.divide calls) that no longer need to run.
+"""
+from src.jack_ast import NonTerminal
+
+KEYWORD_VALUES: dict = {"true": -1, "false": 0}
+# Operations that leave the term before them unchanged when the constant after them is this value.
+RIGHT_IDENTITIES: dict = {"+": 0, "-": 0, "|": 0, "*": 1, "/": 1}
+# Operations that leave the term after them unchanged when the constant before them is this value.
+LEFT_IDENTITIES: dict = {"+": 0, "|": 0, "*": 1}
+
+
+def to_int16(value: int) -> int:
+    """
+    Wraps an integer to a signed 16-bit value.
+    """
+    value &= 0xFFFF
+    return value - 0x10000 if value & 0x8000 else value
+
+
+def evaluate(op: str, left: int, right: int) -> int | None:
+    """
+    Returns left op right with Hack semantics, or None if it mustn't be folded.
+    """
+    match op:
+        case "+":
+            return to_int16(left + right)
+        case "-":
+            return to_int16(left - right)
+        case "*":
+            return to_int16(left * right)
+        case "/":
+            if right == 0 or left == -32768:
+                return None
+            quotient = abs(left) // abs(right)
+            return to_int16(-quotient if (left < 0) != (right < 0) else quotient)
+        case "&":
+            return to_int16(left & right)
+        case "|":
+            return to_int16(left | right)
+        case "<":
+            return -1 if left < right else 0
+        case ">":
+            return -1 if left > right else 0
+        case "=":
+            return -1 if left == right else 0
+    return None
+
+
+def constant_children(value: int) -> list | None:
+    """
+    Returns the children of a term with the given value: an integer constant, or a unary minus applied to one.
+    Returns None for -32768, which has no such form.
+    """
+    if value >= 0:
+        return [("integerConstant", str(value))]
+    if value == -32768:
+        return None
+    term = NonTerminal("term")
+    term.children = [("integerConstant", str(-value))]
+    return [("symbol", "-"), term]
+
+
+class ConstantFolder:
+    """
+    Represents a folding pass. One folder can be used for many subroutines; removed keeps the running total.
+    """
+    def __init__(self):
+        self.removed = 0
+        # Folded term -> its _value, during a fold.
+        self._values: dict = {}
+
+    def fold(self, node: NonTerminal):
+        """
+        Folds every expression in a tree, e.g. a subroutineDec.
+        """
+        stack = [node]
+        while stack:
+            for child in stack.pop().children:
+                if child.__class__ is NonTerminal:
+                    if child.kind == "expression":
+                        self.fold_expression(child)
+                    else:
+                        stack.append(child)
+
+    def fold_expression(self, node: NonTerminal):
+        """
+        Folds an expression in place: its terms first, then its leading constants, then identities.
+        """
+        self._fold_nested(node)
+
+    def fold_term(self, node: NonTerminal):
+        """
+        Folds the expressions inside a term, then the term itself if it is a unary operation.
+        """
+        self._fold_nested(node)
+
+    def _fold_nested(self, root: NonTerminal):
+        """
+        Folds root and every expression and term nested in it without recursing: the nodes are listed parents first
+        with an explicit stack, then folded in reverse, so each node is folded after everything inside it. Nesting
+        depth is only limited by memory.
+        """
+        nodes = []
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            nodes.append(node)
+            children = node.children
+            if node.kind == "expression":
+                stack.extend(children[0::2])
+            elif children:
+                match children[0]:
+                    case ("symbol", "(" | "-" | "~"):
+                        stack.append(children[1])
+                    case ("identifier", _):
+                        for child in children[1:]:
+                            if child.__class__ is NonTerminal:
+                                if child.kind == "expression":
+                                    stack.append(child)
+                                else:
+                                    stack.extend(expression for expression in child.children
+                                                 if expression.__class__ is NonTerminal)
+        try:
+            for node in reversed(nodes):
+                if node.kind == "expression":
+                    self._fold_expression_node(node)
+                else:
+                    self._fold_term_node(node)
+                    self._values[node] = self._value(node)
+        finally:
+            self._values.clear()
+
+    def _fold_expression_node(self, node: NonTerminal):
+        """
+        Folds an expression whose terms are already folded.
+        """
+        children = node.children
+        # Leading constants: ((c0 op c1) op c2) ...
+        while len(children) >= 3:
+            left, right = self._value(children[0]), self._value(children[2])
+            if left is None or right is None:
+                break
+            result = evaluate(children[1][1], left[0], right[0])
+            replacement = constant_children(result) if result is not None else None
+            if replacement is None:
+                break
+            children[0].children = replacement
+            self.removed += 1 + left[1] + right[1] - (result < 0)
+            del children[1:3]
+
+        position = 1
+        while position < len(children):
+            op = children[position][1]
+            right = self._value(children[position + 1])
+            if right is not None and RIGHT_IDENTITIES.get(op) == right[0]:
+                del children[position:position + 2]
+                self.removed += 1 + right[1]
+            else:
+                position += 2
+        if len(children) >= 3:
+            left = self._value(children[0])
+            if left is not None and LEFT_IDENTITIES.get(children[1][1]) == left[0]:
+                del children[0:2]
+                self.removed += 1 + left[1]
+
+    def _fold_term_node(self, node: NonTerminal):
+        """
+        Folds a term whose nested expressions and terms are already folded.
+        """
+        children = node.children
+        if not children:
+            return
+        match children[0]:
+            case ("symbol", "("):
+                if len(children[1].children) == 1:
+                    node.children = children[1].children[0].children
+            case ("symbol", "-" | "~" as op):
+                inner = children[1]
+                value = self._value(inner)
+                if value is not None:
+                    result = to_int16(-value[0] if op == "-" else ~value[0])
+                    replacement = constant_children(result)
+                    if replacement is not None and (result < 0) < 1 + value[1]:
+                        node.children = replacement
+                        self.removed += 1 + value[1] - (result < 0)
+                elif inner.children and inner.children[0] == ("symbol", op):
+                    node.children = inner.children[1].children
+                    self.removed += 2
+
+    def _value(self, node: NonTerminal) -> tuple[int, int] | None:
+        """
+        Returns (value, operations needed to compute it) for a constant term, or None if the term isn't constant.
+        A constant is an integer constant, true or false, or a unary operator applied to a constant. The value of a
+        unary operation's term is looked up if it has already been folded, so long chains aren't walked again.
+        """
+        children = node.children
+        if not children:
+            return None
+        match children[0]:
+            case ("integerConstant", value):
+                value = int(value)
+                return (value, 0) if value <= 32767 else None
+            case ("keyword", keyword):
+                value = KEYWORD_VALUES.get(keyword)
+                return (value, int(keyword == "true")) if value is not None else None
+            case ("symbol", "-" | "~" as op):
+                inner = children[1]
+                inner = self._values[inner] if inner in self._values else self._value(inner)
+                if inner is None:
+                    return None
+                return to_int16(-inner[0] if op == "-" else ~inner[0]), inner[1] + 1
+        return None
@@ -0,0 +1,103 @@
+"""
+src/dead_code.py
+Dead code elimination for whole programs.
+
+Two kinds of dead code are removed:
+Statements after a return statement in the same statement list. These can never run, so they are dropped from each
+subroutine's tree before VmSink generates its code.
+Subroutines that can't be reached from the program's entry points. Once every file of a program has been compiled,
+the call graph is built from the call commands of each VM function (one for every subroutine call in a do statement
+or a term) and walked from Main.main, and from Sys.init if the program defines one. Jack has no function pointers, so
+a subroutine that isn't reached this way can never be called, and its function is removed from its .vm file.
+"""
+from collections.abc import Iterable
+from pathlib import Path
+
+from src.atomic_file import write_atomic
+from src.jack_ast import NonTerminal
+
+ENTRY_POINTS: tuple = ("Main.main", "Sys.init")
+
+
+def split_functions(commands: list[str]) -> dict[str, list[str]]:
+    """
+    Returns a VM file's commands grouped by function, in order. Each group starts with its function command.
+    """
+    functions = {}
+    current = None
+    for command in commands:
+        if command.startswith("function "):
+            current = functions[command.split()[1]] = []
+        if current is not None:
+            current.append(command)
+    return functions
+
+
+def call_graph(functions: dict[str, list[str]]) -> dict[str, set[str]]:
+    """
+    Returns the names each function calls.
+    """
+    return {name: {command.split()[1] for command in commands if command.startswith("call ")}
+            for name, commands in functions.items()}
+
+
+def reachable(graph: dict[str, set[str]], roots: Iterable[str]) -> set[str]:
+    """
+    Returns every function that can be reached from the roots. Calls to functions outside the graph, such as the OS,
+    are followed no further.
+    """
+    seen = set()
+    stack = [root for root in roots if root in graph]
+    while stack:
+        name = stack.pop()
+        if name not in seen:
+            seen.add(name)
+            stack.extend(callee for callee in graph[name] if callee in graph and callee not in seen)
+    return seen
+
+
+class DeadCodeEliminator:
+    """
+    Represents a dead code pass. statements counts the statements removed from trees, subroutines the names of the
+    subroutines removed from VM files.
+    """
+    def __init__(self):
+        self.statements = 0
+        self.subroutines: list[str] = []
+
+    def prune_statements(self, node: NonTerminal):
+        """
+        Removes the statements after a return statement in every statement list of a tree, e.g. a subroutineDec.
+        """
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            if current.kind == "statements":
+                for position, statement in enumerate(current.children):
+                    if statement.kind == "returnStatement":
+                        self.statements += len(current.children) - position - 1
+                        del current.children[position + 1:]
+                        break
+            stack.extend(child for child in current.children if child.__class__ is NonTerminal)
+
+    def prune_program(self, vm_files: Iterable[Path], roots: Iterable[str] = ENTRY_POINTS) -> bool:
+        """
+        Removes the functions that can't be reached from the roots from a program's .vm files, rewriting only the
+        files that change. Returns False, leaving every file alone, if the program defines none of the roots: a
+        library has no entry point, so nothing in it can be proven dead.
+        """
+        files = {Path(vm_file): split_functions(Path(vm_file).read_text(encoding="utf-8").splitlines())
+                 for vm_file in vm_files}
+        graph = {}
+        for functions in files.values():
+            graph.update(call_graph(functions))
+        live = reachable(graph, roots)
+        if not live:
+            return False
+        for vm_file, functions in files.items():
+            dead = [name for name in functions if name not in live]
+            if dead:
+                self.subroutines.extend(dead)
+                kept = [command for name, commands in functions.items() if name in live for command in commands]
+                write_atomic(vm_file, "".join(f"{command}\n" for command in kept).encode("utf-8"))
+        return True
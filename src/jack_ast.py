@@ -0,0 +1,83 @@
+"""
+src/jack_ast.py
+A compact parse tree for Jack classes.
+
+Each non-terminal is a NonTerminal with __slots__ for its kind (the grammar rule's tag, e.g. "letStatement") and a
+list of children. Terminals aren't objects at all: a child that is an int is the index of a token in the tokenizer's
+token stream, so no token text is copied into the tree. Nodes keep no parent pointers.
+
+The tree is serialized by replaying it into any OutputSink, which gives the same events the compilation engine
+would have sent, so an XmlStreamWriter reproduces the golden XML exactly.
+"""
+import io
+
+from src.output_sink import OutputSink
+from src.xml_writer import XmlStreamWriter
+
+
+class NonTerminal:
+    """
+    Represents a non-terminal node.
+    """
+    __slots__ = ("kind", "children")
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.children: list = []
+
+    def __repr__(self) -> str:
+        return f"NonTerminal({self.kind!r}, {len(self.children)} children)"
+
+
+class AstSink(OutputSink):
+    """
+    Builds the compact tree from the compilation engine's events. Terminals are stored as their token index.
+    """
+    def __init__(self):
+        self.root: NonTerminal | None = None
+        self._open: list[list] = []
+
+    def start_nonterminal(self, tag: str):
+        node = NonTerminal(tag)
+        if self._open:
+            self._open[-1].append(node)
+        else:
+            self.root = node
+        self._open.append(node.children)
+
+    def end_nonterminal(self, tag: str):
+        self._open.pop()
+
+    def terminal(self, token_type: str, value: str, index: int):
+        self._open[-1].append(index)
+
+
+def replay(root: NonTerminal, tokenizer, sink: OutputSink):
+    """
+    Sends the tree to a sink as start/end non-terminal and terminal events, looking token indexes up in tokenizer.
+    Walks the tree with an explicit stack, so arbitrarily deep trees don't hit the recursion limit.
+    """
+    sink.start_nonterminal(root.kind)
+    stack = [(root, iter(root.children))]
+    while stack:
+        node, children = stack[-1]
+        for child in children:
+            if child.__class__ is int:
+                token_type, value = tokenizer.token(child)
+                sink.terminal(token_type, value, child)
+            else:
+                sink.start_nonterminal(child.kind)
+                stack.append((child, iter(child.children)))
+                break
+        else:
+            stack.pop()
+            sink.end_nonterminal(node.kind)
+
+
+def to_xml(root: NonTerminal, tokenizer) -> str:
+    """
+    Serializes the tree to indented XML in the same format as the golden test files.
+    """
+    stream = io.StringIO()
+    replay(root, tokenizer, XmlStreamWriter(stream))
+    return stream.getvalue()
@@ -0,0 +1,79 @@
+"""
+src/output_sink.py
+Output sinks for the compilation engine.
+
+CompilationEngine doesn't build any output itself. It reports the parse to a sink as events:
+start_nonterminal(tag) when a grammar rule such as letStatement begins, end_nonterminal(tag) when it ends,
+and terminal(token_type, value, index) for every token, where index is the token's position in the token stream.
+Events always nest properly, so a sink can rely on end_nonterminal closing the innermost open non-terminal.
+
+Sinks:
+ElementTreeSink: builds an xml.etree.ElementTree tree (the default)
+XmlStreamWriter: writes indented XML straight to a file (src/xml_writer.py)
+NullSink: ignores everything, for parse-only syntax checks and benchmarks
+AstSink: builds a compact parse tree that refers to tokens by index (src/jack_ast.py)
+VmSink: generates Hack VM code one subroutine at a time (src/code_generator.py)
+"""
+from abc import ABC, abstractmethod
+import xml.etree.ElementTree as element_tree
+
+
+class OutputSink(ABC):
+    """
+    Represents something the compilation engine can report its parse to.
+    """
+    @abstractmethod
+    def start_nonterminal(self, tag: str):
+        """
+        Called when a non-terminal begins.
+        """
+
+    @abstractmethod
+    def end_nonterminal(self, tag: str):
+        """
+        Called when the innermost open non-terminal ends.
+        """
+
+    @abstractmethod
+    def terminal(self, token_type: str, value: str, index: int):
+        """
+        Called for every token written, inside the innermost open non-terminal.
+        """
+
+
+class ElementTreeSink(OutputSink):
+    """
+    Builds an ElementTree tree. Terminals get their value padded with a space on each side, like the Jack test files.
+    """
+    def __init__(self):
+        self.root: element_tree.Element | None = None
+        self._open: list[element_tree.Element] = []
+
+    def start_nonterminal(self, tag: str):
+        if self._open:
+            element = element_tree.SubElement(self._open[-1], tag)
+        else:
+            element = self.root = element_tree.Element(tag)
+        self._open.append(element)
+
+    def end_nonterminal(self, tag: str):
+        element = self._open.pop()
+        if not self._open:
+            element.tail = "\n"
+
+    def terminal(self, token_type: str, value: str, index: int):
+        element_tree.SubElement(self._open[-1], token_type).text = f" {value} "
+
+
+class NullSink(OutputSink):
+    """
+    Ignores every event. Compiling into a NullSink only checks the syntax.
+    """
+    def start_nonterminal(self, tag: str):
+        pass
+
+    def end_nonterminal(self, tag: str):
+        pass
+
+    def terminal(self, token_type: str, value: str, index: int):
+        pass
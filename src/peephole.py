@@ -0,0 +1,215 @@
+"""
+src/peephole.py
+Peephole optimization of generated VM commands.
+
+The code generator translates one statement at a time, so its output has redundant sequences where statements meet:
+a value pushed and popped straight back, not followed by not, jumps to the very next label, branches on constants
+that folding produced, and code after a return that can never run. PeepholeOptimizer removes them one function at a
+time, since VM labels are local to their function.
+
+Most patterns look at the last few commands while the output is built, so a match that exposes another one (a
+push/pop pair removed from between two others) is caught straight away; each of them removes at least one command
+whenever it matches. The patterns that need the whole function, jump threading and unused labels, run after that, and
+the two alternate until nothing changes.
+
+Every pattern has a name and the set to run is configurable. The optimizer counts the commands each one removed.
+
+Conditions aren't always 0 or -1 (Jack happily branches on an int), so a pattern must not change which values a
+branch takes. That rules out inverting branches: not; if-goto L jumps on anything but -1, while a bare if-goto jumps
+on anything but 0.
+"""
+from collections import Counter
+from collections.abc import Iterable
+
+# Pattern names in the order they are tried on each new command.
+PATTERNS: tuple = ("unreachable", "push_pop", "double_not", "double_neg", "constant_branch", "goto_next",
+                   "thread_jumps", "unused_labels")
+
+
+def _push_pop(out: list[str]) -> int:
+    """
+    push S i; pop S i -> nothing
+    """
+    if len(out) >= 2 and out[-2].startswith("push ") and out[-1] == f"pop {out[-2][5:]}":
+        del out[-2:]
+        return 2
+    return 0
+
+
+def _double_not(out: list[str]) -> int:
+    """
+    not; not -> nothing
+    """
+    if len(out) >= 2 and out[-1] == "not" and out[-2] == "not":
+        del out[-2:]
+        return 2
+    return 0
+
+
+def _double_neg(out: list[str]) -> int:
+    """
+    neg; neg -> nothing
+    """
+    if len(out) >= 2 and out[-1] == "neg" and out[-2] == "neg":
+        del out[-2:]
+        return 2
+    return 0
+
+
+def _constant_branch(out: list[str]) -> int:
+    """
+    push constant 0; if-goto L -> nothing
+    push constant n; if-goto L -> goto L, for n other than 0
+    push constant n; not; if-goto L -> goto L
+    if-goto jumps on any value other than 0, and not is bitwise, so not n is 0 only for n = -1, which isn't a
+    constant. (true is push constant 0; not.)
+    """
+    if len(out) < 2 or not out[-1].startswith("if-goto "):
+        return 0
+    label = out[-1][8:]
+    negated = out[-2] == "not"
+    push = out[-3] if negated and len(out) >= 3 else out[-2]
+    if not push.startswith("push constant "):
+        return 0
+    taken = negated or push != "push constant 0"
+    matched = 3 if negated else 2
+    del out[-matched:]
+    if taken:
+        out.append(f"goto {label}")
+        return matched - 1
+    return matched
+
+
+def _goto_next(out: list[str]) -> int:
+    """
+    goto L; label L -> label L
+    """
+    if len(out) >= 2 and out[-1].startswith("label ") and out[-2] == f"goto {out[-1][6:]}":
+        del out[-2]
+        return 1
+    return 0
+
+
+TAIL_PATTERNS: dict = {
+    "push_pop": _push_pop,
+    "double_not": _double_not,
+    "double_neg": _double_neg,
+    "constant_branch": _constant_branch,
+    "goto_next": _goto_next,
+}
+
+
+class PeepholeOptimizer:
+    """
+    Represents a peephole optimizer with a fixed set of patterns. statistics counts the commands each pattern
+    removed, across every function optimized.
+    """
+    def __init__(self, patterns: Iterable[str] = PATTERNS):
+        patterns = set(patterns)
+        unknown = patterns.difference(PATTERNS)
+        if unknown:
+            raise ValueError(f"Unknown peephole patterns: {', '.join(sorted(unknown))}")
+        self.patterns = patterns
+        self._tail_patterns = [(name, TAIL_PATTERNS[name]) for name in PATTERNS if name in TAIL_PATTERNS
+                               and name in patterns]
+        self.statistics: Counter = Counter()
+
+    @property
+    def removed(self) -> int:
+        """
+        Returns the total number of commands removed.
+        """
+        return sum(self.statistics.values())
+
+    def optimize(self, commands: list[str]) -> list[str]:
+        """
+        Returns an optimized copy of a list of VM commands, which may hold any number of functions.
+        """
+        result = []
+        start = 0
+        for position in range(1, len(commands) + 1):
+            if position == len(commands) or commands[position].startswith("function "):
+                result.extend(self.optimize_function(commands[start:position]))
+                start = position
+        return result
+
+    def optimize_function(self, commands: list[str]) -> list[str]:
+        """
+        Returns an optimized copy of one function's commands.
+        """
+        while True:
+            commands, changed = self._tail_pass(commands)
+            if "thread_jumps" in self.patterns:
+                changed |= self._thread_jumps(commands)
+            if "unused_labels" in self.patterns:
+                before = len(commands)
+                commands = self._unused_labels(commands)
+                changed |= len(commands) != before
+            if not changed:
+                return commands
+
+    def _tail_pass(self, commands: list[str]) -> tuple[list[str], bool]:
+        """
+        Rebuilds the command list, trying the tail patterns after every command added.
+        """
+        out: list[str] = []
+        changed = False
+        unreachable = "unreachable" in self.patterns
+        dead = False
+        for command in commands:
+            if dead:
+                # Nothing can jump into the middle of straight-line code, so it stays dead until the next label.
+                if not command.startswith("label ") and not command.startswith("function "):
+                    self.statistics["unreachable"] += 1
+                    changed = True
+                    continue
+                dead = False
+            out.append(command)
+            # A match can expose another one further back, e.g. removing a push/pop pair leaves not; not.
+            matched = True
+            while matched:
+                matched = False
+                for name, pattern in self._tail_patterns:
+                    removed = pattern(out)
+                    if removed:
+                        self.statistics[name] += removed
+                        changed = matched = True
+                        break
+            if unreachable and out and (out[-1] == "return" or out[-1].startswith("goto ")):
+                dead = True
+        return out, changed
+
+    def _thread_jumps(self, commands: list[str]) -> bool:
+        """
+        Retargets jumps to a label that is immediately followed by a goto, so they jump straight to its target.
+        This removes no commands itself, but can leave the intermediate label unused.
+        """
+        forwards = {}
+        for position in range(len(commands) - 1):
+            if commands[position].startswith("label ") and commands[position + 1].startswith("goto "):
+                forwards[commands[position][6:]] = commands[position + 1][5:]
+        if not forwards:
+            return False
+        changed = False
+        for position, command in enumerate(commands):
+            prefix, _, label = command.partition(" ")
+            if prefix in ("goto", "if-goto") and label in forwards:
+                target, seen = forwards[label], {label}
+                # Follow chains of forwarded labels, stopping at loops such as label L; goto L.
+                while target in forwards and target not in seen:
+                    seen.add(target)
+                    target = forwards[target]
+                if target != label:
+                    commands[position] = f"{prefix} {target}"
+                    changed = True
+        return changed
+
+    def _unused_labels(self, commands: list[str]) -> list[str]:
+        """
+        Returns the commands without labels that nothing jumps to.
+        """
+        used = {command.partition(" ")[2] for command in commands
+                if command.startswith("goto ") or command.startswith("if-goto ")}
+        kept = [command for command in commands if not command.startswith("label ") or command[6:] in used]
+        self.statistics["unused_labels"] += len(commands) - len(kept)
+        return kept
@@ -0,0 +1,142 @@
+"""
+src/profiler.py
+Built-in instrumentation for finding where compile time goes.
+
+A Profiler records wall time and call counts for named phases (reading, lexing, compiling) and for every
+compile_* method of a CompilationEngine, plus Tokenizer.advance and the output sink's events. Methods are
+instrumented by wrapping them on the instance, so an engine that isn't being profiled runs exactly the normal code.
+
+Method times are self times: time spent in a method minus the time spent in the instrumented methods it called, so
+they add up without double counting nested statements. compile_expression parses a whole expression without
+recursing, so its self time covers every term inside it. Self times are also kept per call stack, which can be
+written in the collapsed-stack format used by flamegraph.pl and speedscope.
+"""
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import wraps
+import time
+
+SINK_EVENTS: tuple = ("start_nonterminal", "end_nonterminal", "terminal")
+
+
+class Profiler:
+    """
+    Represents the timings collected for one file, or merged across many.
+    """
+    def __init__(self, root_frame: str = "build"):
+        self.root_frame = root_frame
+        self.phases: dict = defaultdict(lambda: [0.0, 0])
+        self.methods: dict = defaultdict(lambda: [0.0, 0])
+        self.stacks: dict = defaultdict(float)
+        self._stack: list[str] = [root_frame]
+        self._child_time: list[float] = [0.0]
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        Times a block as one call of the named phase. Instrumented methods called inside it appear under the phase
+        in the collapsed stacks.
+        """
+        self._stack.append(name)
+        self._child_time.append(0.0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stacks[";".join(self._stack)] += elapsed - self._child_time.pop()
+            self._child_time[-1] += elapsed
+            self._stack.pop()
+            entry = self.phases[name]
+            entry[0] += elapsed
+            entry[1] += 1
+
+    def instrument(self, engine):
+        """
+        Wraps the engine's compile_* methods, its tokenizer's advance and its sink's events on the instances.
+        """
+        for name in dir(engine):
+            if name.startswith("compile_"):
+                setattr(engine, name, self._wrap(getattr(engine, name), name))
+        engine.tokenizer.advance = self._wrap(engine.tokenizer.advance, "advance")
+        for name in SINK_EVENTS:
+            setattr(engine.sink, name, self._wrap(getattr(engine.sink, name), f"sink.{name}"))
+        return engine
+
+    def _wrap(self, method, name: str):
+        """
+        Returns a wrapper that records the method's calls and self time.
+        """
+        stack = self._stack
+        child_time = self._child_time
+        methods = self.methods
+        stacks = self.stacks
+
+        @wraps(method)
+        def wrapper(*args, **kwargs):
+            stack.append(name)
+            child_time.append(0.0)
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                self_time = elapsed - child_time.pop()
+                child_time[-1] += elapsed
+                entry = methods[name]
+                entry[0] += self_time
+                entry[1] += 1
+                stacks[";".join(stack)] += self_time
+                stack.pop()
+        return wrapper
+
+    def merge(self, other: "Profiler | dict"):
+        """
+        Adds another profiler's timings (or their to_dict form, e.g. from a worker process) into this one.
+        """
+        data = other.to_dict() if isinstance(other, Profiler) else other
+        for name, (seconds, calls) in data["phases"].items():
+            self.phases[name][0] += seconds
+            self.phases[name][1] += calls
+        for name, (seconds, calls) in data["methods"].items():
+            self.methods[name][0] += seconds
+            self.methods[name][1] += calls
+        for stack, seconds in data["stacks"].items():
+            self.stacks[stack] += seconds
+
+    def to_dict(self) -> dict:
+        """
+        Returns the timings as plain data that can be pickled or saved as JSON.
+        """
+        return {
+            "phases": {name: list(entry) for name, entry in self.phases.items()},
+            "methods": {name: list(entry) for name, entry in self.methods.items()},
+            "stacks": dict(self.stacks),
+        }
+
+    def summary(self) -> str:
+        """
+        Returns a one-line summary of the phase times.
+        """
+        return " | ".join(f"{name} {seconds * 1000:.1f} ms" for name, (seconds, calls) in self.phases.items())
+
+    def report(self) -> str:
+        """
+        Returns a table of phase times, then every instrumented method sorted by self time.
+        """
+        lines = [f"{'phase':<28}{'calls':>10}{'total ms':>12}"]
+        for name, (seconds, calls) in self.phases.items():
+            lines.append(f"{name:<28}{calls:>10}{seconds * 1000:>12.2f}")
+        lines.append("")
+        lines.append(f"{'method':<28}{'calls':>10}{'self ms':>12}{'us/call':>10}")
+        for name, (seconds, calls) in sorted(self.methods.items(), key=lambda item: item[1][0], reverse=True):
+            lines.append(f"{name:<28}{calls:>10}{seconds * 1000:>12.2f}{seconds / calls * 1e6:>10.2f}")
+        return "\n".join(lines)
+
+    def collapsed_stacks(self) -> str:
+        """
+        Returns the self time of every call stack in collapsed-stack format: frames joined by ';', then a space and
+        the time in microseconds.
+        """
+        return "".join(f"{stack} {round(seconds * 1e6)}\n" for stack, seconds in sorted(self.stacks.items())
+                       if round(seconds * 1e6) > 0)
@@ -0,0 +1,120 @@
+"""
+src/symbol_table.py
+Keeps track of the variables in scope while generating code for a class.
+
+There are two scopes. The class scope holds static and field variables and lives for the whole class. The subroutine
+scope holds arguments and local variables (kind "arg" and "var") and is emptied by start_subroutine. Each kind is
+numbered from 0 in the order its variables are defined, which is the index used in its VM segment.
+
+Both scopes are dicts from name to Symbol, so every lookup is O(1) however many variables a class has, and a Symbol
+carries its VM segment so the code generator needs a single lookup per variable. Names are interned when they are
+defined, so looking up an interned identifier (VmSink interns them as they are parsed) compares strings by identity.
+Resetting a scope clears its dict in place rather than allocating a new one.
+"""
+import sys
+
+CLASS_KINDS: tuple = ("static", "field")
+SUBROUTINE_KINDS: tuple = ("arg", "var")
+KIND_SEGMENTS: dict = {"static": "static", "field": "this", "arg": "argument", "var": "local"}
+
+
+class Symbol:
+    """
+    Represents one variable: its name, type, kind, index within its kind and VM segment.
+    """
+    __slots__ = ("name", "type", "kind", "index", "segment")
+
+    def __init__(self, name: str, type_name: str, kind: str, index: int):
+        self.name = name
+        self.type = type_name
+        self.kind = kind
+        self.index = index
+        self.segment = KIND_SEGMENTS[kind]
+
+    def __repr__(self) -> str:
+        return f"Symbol({self.name!r}, {self.type!r}, {self.kind!r}, {self.index})"
+
+
+class SymbolTable:
+    """
+    Represents the class and subroutine scopes of one class.
+    """
+    __slots__ = ("class_scope", "subroutine_scope", "counts")
+
+    def __init__(self):
+        self.class_scope: dict[str, Symbol] = {}
+        self.subroutine_scope: dict[str, Symbol] = {}
+        self.counts: dict[str, int] = dict.fromkeys(CLASS_KINDS + SUBROUTINE_KINDS, 0)
+
+    def start_subroutine(self):
+        """
+        Starts a new subroutine scope, forgetting the previous subroutine's arguments and local variables.
+        """
+        self.subroutine_scope.clear()
+        self.counts["arg"] = self.counts["var"] = 0
+
+    def clear(self):
+        """
+        Forgets every variable in both scopes, so the table can be reused for another class.
+        """
+        self.class_scope.clear()
+        self.subroutine_scope.clear()
+        for kind in self.counts:
+            self.counts[kind] = 0
+
+    def define(self, name: str, type_name: str, kind: str) -> Symbol:
+        """
+        Defines a new variable of the given type and kind, giving it the next index of its kind. Returns its Symbol.
+        """
+        if kind in CLASS_KINDS:
+            scope = self.class_scope
+        elif kind in SUBROUTINE_KINDS:
+            scope = self.subroutine_scope
+        else:
+            raise ValueError(f"Unknown variable kind: {kind}")
+        name = sys.intern(name)
+        if name in scope:
+            raise ValueError(f"Variable {name} is already defined")
+        symbol = scope[name] = Symbol(name, sys.intern(type_name), kind, self.counts[kind])
+        self.counts[kind] += 1
+        return symbol
+
+    def var_count(self, kind: str) -> int:
+        """
+        Returns the number of variables of the given kind defined in the current scopes.
+        """
+        return self.counts[kind]
+
+    def lookup(self, name: str) -> Symbol | None:
+        """
+        Returns the Symbol for a name, looking in the subroutine scope first, or None if it isn't defined.
+        """
+        return self.subroutine_scope.get(name) or self.class_scope.get(name)
+
+    def kind_of(self, name: str) -> str | None:
+        """
+        Returns the kind of a variable, or None if it isn't defined.
+        """
+        symbol = self.lookup(name)
+        return symbol.kind if symbol is not None else None
+
+    def type_of(self, name: str) -> str:
+        """
+        Returns the type of a variable.
+        """
+        return self._symbol(name).type
+
+    def index_of(self, name: str) -> int:
+        """
+        Returns the index of a variable within its kind.
+        """
+        return self._symbol(name).index
+
+    def _symbol(self, name: str) -> Symbol:
+        """
+        Looks a variable up, raising KeyError if it isn't defined.
+        """
+        symbol = self.lookup(name)
+        if symbol is None:
+            raise KeyError(f"Undefined variable: {name}")
+        return symbol
@@ -0,0 +1,148 @@
+"""
+src/token_stream.py
+A compact binary format for token streams, so a lexed file can be saved and loaded again without lexing it.
+
+A .jtok file is little-endian and has three parts:
+header: the magic bytes JTOK, the format version (u16), a reserved u16, the token count (u32) and the size of the
+string table in bytes (u32)
+records: one fixed-width record per token, three u32s: the type code (an index into TOKEN_TYPES), and the offset and
+length of the token's value in the string table
+string table: the UTF-8 values of the tokens. Each distinct value is stored once, so every "(" or "x" in a file
+shares one entry.
+
+TokenFileTokenizer maps a .jtok file and reads the records through a memoryview cast to u32s, so loading copies
+nothing and costs the same whatever the file's size.
+"""
+from array import array
+import mmap
+from pathlib import Path
+import struct
+import sys
+
+from src.atomic_file import write_atomic
+from src.tokenizer import TOKEN_TYPES, TYPE_CODES, Tokenizer
+
+MAGIC: bytes = b"JTOK"
+FORMAT_VERSION: int = 1
+HEADER: struct.Struct = struct.Struct("<4sHHII")
+RECORD_FIELDS: int = 3
+
+
+def encode_tokens(tokenizer: Tokenizer) -> bytes:
+    """
+    Returns the whole token stream of a tokenizer in the .jtok format, whatever its current position.
+    """
+    records = array("I")
+    strings = bytearray()
+    interned: dict[str, tuple[int, int]] = {}
+    tokenizer.has_more_tokens()
+    index = 0
+    while True:
+        try:
+            token_type, value = tokenizer.token(index)
+        except IndexError:
+            break
+        entry = interned.get(value)
+        if entry is None:
+            encoded = value.encode("utf-8")
+            entry = interned[value] = (len(strings), len(encoded))
+            strings += encoded
+        records.extend((TYPE_CODES[token_type], *entry))
+        index += 1
+    if sys.byteorder != "little":
+        records.byteswap()
+    return HEADER.pack(MAGIC, FORMAT_VERSION, 0, index, len(strings)) + records.tobytes() + strings
+
+
+def write_tokens(tokenizer: Tokenizer, token_file: Path):
+    """
+    Writes the token stream of a tokenizer to a .jtok file.
+    """
+    write_atomic(token_file, encode_tokens(tokenizer))
+
+
+class TokenFileTokenizer(Tokenizer):
+    """
+    Tokenizer over a saved token stream, given as a .jtok path or a buffer holding one. It has the same API as
+    Tokenizer and can be handed to CompilationEngine; there is no source text, so open_file is empty and current_index
+    is an offset into the string table.
+    """
+    def __init__(self, token_file, buffer=None):
+        self.jack_file = token_file
+        self._open_file = ""
+        self.current_index = 0
+        self.current_token_type = ""
+        self.current_token_value = ""
+        self._map = None
+        if buffer is None:
+            with open(token_file, "rb") as file:
+                # The mapping stays valid after the file is closed.
+                buffer = self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._load(memoryview(buffer))
+
+    def _load(self, view: memoryview):
+        """
+        Points the token arrays at the records and string table in view, after checking the header.
+        """
+        if len(view) < HEADER.size:
+            raise ValueError(f"{self.jack_file} is too short to be a token stream")
+        magic, version, _, count, table_size = HEADER.unpack_from(view)
+        if magic != MAGIC:
+            raise ValueError(f"{self.jack_file} is not a token stream")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"{self.jack_file} has token stream format version {version}, expected {FORMAT_VERSION}")
+        records_end = HEADER.size + count * RECORD_FIELDS * 4
+        if len(view) != records_end + table_size:
+            raise ValueError(f"{self.jack_file} is truncated or has trailing data")
+
+        records = view[HEADER.size:records_end].cast("I")
+        if sys.byteorder != "little":
+            records.release()
+            records = array("I")
+            records.frombytes(view[HEADER.size:records_end])
+            records.byteswap()
+        self.token_index = -1
+        self._token_types = records[0::RECORD_FIELDS]
+        self._token_starts = records[1::RECORD_FIELDS]
+        self._token_lengths = records[2::RECORD_FIELDS]
+        self._strings = view[records_end:]
+        # (offset, length) -> decoded value
+        self._values: dict[tuple[int, int], str] = {}
+        # Every view of the buffer, in the order they were made; they must all be released before it is unmapped.
+        self._views = [view, records, self._token_types, self._token_starts, self._token_lengths, self._strings]
+
+    def close(self):
+        """
+        Releases the views and unmaps the file, if it was mapped here. Tokens can't be read afterwards.
+        """
+        self._token_types = self._token_starts = self._token_lengths = array("B")
+        for view in reversed(self._views):
+            if isinstance(view, memoryview):
+                view.release()
+        if self._map is not None:
+            self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _reset_stream(self):
+        """
+        Forgets the loaded tokens, so the stream is lexed from open_file once it is given source text.
+        """
+        super()._reset_stream()
+        self._strings = None
+
+    def _token_at(self, index: int) -> tuple[str, str]:
+        """
+        Returns the (type, value) pair for a record. Values are decoded and interned once per string table entry.
+        """
+        if self._strings is None:
+            return super()._token_at(index)
+        entry = (self._token_starts[index], self._token_lengths[index])
+        value = self._values.get(entry)
+        if value is None:
+            value = self._values[entry] = sys.intern(str(self._strings[entry[0]:entry[0] + entry[1]], "utf-8"))
+        return TOKEN_TYPES[self._token_types[index]], value
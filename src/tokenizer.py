@@ -2,129 +2,229 @@
 src/tokenizer.py
 Handles tokenizing the input
 """
+from array import array
+from collections import deque
+import mmap
+import re
+import sys
+
+from src import trace
+
 KEYWORD_LIST: list = ["class", "constructor", "function", "method", "field", "static", "var", "int", "char", "boolean",
                       "void", "true", "false", "null", "this", "let", "do", "if", "else", "while", "return"]
 
 SYMBOL_LIST: list = ["{", "}", "(", ")", "[", "]", ".", ",", ";", "+", "-", "*", "/", "&", "|", "<", ">", "=", "~"]
 
+# One master pattern for the whole lexical grammar. Comments come before symbols so '/' doesn't win over '//' and '/*',
+# and keywords come before identifiers; the trailing \b keeps "classes" from matching the "class" keyword.
+TOKEN_REGEX: re.Pattern = re.compile(
+    rf"""
+    (?P<whitespace>\s+)
+    |(?P<line_comment>//[^\n]*)
+    |(?P<block_comment>/\*.*?(?:\*/|\Z))
+    |(?P<symbol>[{re.escape("".join(SYMBOL_LIST))}])
+    |(?P<keyword>(?:{"|".join(KEYWORD_LIST)})\b)
+    |(?P<identifier>[A-Za-z_]\w*)
+    |(?P<integerConstant>\d+)
+    |(?P<stringConstant>"[^"]*")
+    |(?P<mismatch>.)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+# The same grammar for scanning bytes, e.g. a memory-mapped file. Its \s, \w and \b only match ASCII, which is all Jack
+# allows outside string constants.
+TOKEN_REGEX_BYTES: re.Pattern = re.compile(TOKEN_REGEX.pattern.encode("ascii"), re.VERBOSE | re.DOTALL)
+
+SKIPPED_GROUPS: frozenset = frozenset({"whitespace", "line_comment", "block_comment"})
+
+# Token types have small integer codes, the index into this tuple.
+TOKEN_TYPES: tuple = ("keyword", "symbol", "identifier", "integerConstant", "stringConstant")
+TYPE_CODES: dict = {token_type: code for code, token_type in enumerate(TOKEN_TYPES)}
+
+# Kind codes are what the token arrays store: the type codes above for identifiers and constants, then one code for each
+# keyword and symbol. Keyword and symbol values are interned singletons, so they are never sliced out of the source and
+# compare by identity.
+KIND_VALUES: tuple = (None,) * len(TOKEN_TYPES) + tuple(sys.intern(value) for value in KEYWORD_LIST + SYMBOL_LIST)
+KIND_TYPES: tuple = TOKEN_TYPES + ("keyword",) * len(KEYWORD_LIST) + ("symbol",) * len(SYMBOL_LIST)
+# Keyword or symbol text, as str or as bytes -> kind code
+KIND_CODES: dict = {text: code for code, value in enumerate(KIND_VALUES) if value is not None
+                    for text in (value, value.encode("ascii"))}
+
+
+def unexpected_character(match: re.Match) -> ValueError:
+    """
+    Returns the error for a character that starts no token.
+    """
+    character = match.group()
+    if not isinstance(character, str):
+        character = character.decode("utf-8", "replace")
+    return ValueError(f"Unexpected character {character!r} at index {match.start()}")
+
+
+def unexpected_end_of_file(value: str) -> ValueError:
+    """
+    Returns the error for advancing past the last token, which only happens when the code is incomplete.
+    """
+    return ValueError(f"Unexpected end of file after {value!r}")
+
+
+def lex(source: str | bytes | mmap.mmap) -> tuple[array, array, array]:
+    """
+    Lexes a whole source string, or UTF-8 bytes, in one pass.
+    Returns parallel arrays of kind codes, start offsets and lengths. String constants are recorded without quotes.
+    Offsets index into source, so they count bytes for binary source.
+    """
+    token_types = array("B")
+    token_starts = array("L")
+    token_lengths = array("L")
+    pattern = TOKEN_REGEX if isinstance(source, str) else TOKEN_REGEX_BYTES
+    for match in pattern.finditer(source):
+        kind = match.lastgroup
+        if kind in SKIPPED_GROUPS:
+            continue
+        if kind == "mismatch":
+            raise unexpected_character(match)
+
+        start, end = match.span()
+        if kind == "keyword" or kind == "symbol":
+            token_types.append(KIND_CODES[match.group()])
+        else:
+            if kind == "stringConstant":
+                start, end = start + 1, end - 1
+            token_types.append(TYPE_CODES[kind])
+        token_starts.append(start)
+        token_lengths.append(end - start)
+    return token_types, token_starts, token_lengths
+
+
 class Tokenizer:
-    def __init__(self, jack_file):
+    """
+    Represents a tokenizer object.
+    The whole file is lexed once, on first use, into parallel arrays of type codes, start offsets and lengths.
+    advance, peek and has_more_tokens are then just index checks into those arrays.
+    A tokenizer reads jack_file, unless it is given the source; from_source and from_file build one from memory.
+    """
+    def __init__(self, jack_file, source: str | None = None):
         self.jack_file = jack_file
-        with open(self.jack_file, "r") as file:
-            self.open_file = file.read()
+        if source is None:
+            with open(self.jack_file, "r") as file:
+                source = file.read()
+        self.open_file = source
 
         self.current_index = 0
         self.current_token_type = ""
         self.current_token_value = ""
 
+    @classmethod
+    def from_source(cls, source: str | bytes | bytearray | memoryview, name: str = "<source>",
+                    encoding: str = "utf-8") -> "Tokenizer":
+        """
+        Returns a tokenizer for source held in memory. Binary source is decoded once, here; name stands in for the
+        file name in jack_file.
+        """
+        if not isinstance(source, str):
+            source = str(source, encoding)
+        return cls(name, source)
+
+    @classmethod
+    def from_file(cls, file, name: str | None = None, encoding: str = "utf-8") -> "Tokenizer":
+        """
+        Returns a tokenizer for the rest of an open file-like object, in text or binary mode. The name defaults to
+        the file's own name, if it has one.
+        """
+        if name is None:
+            name = getattr(file, "name", "<source>")
+        return cls.from_source(file.read(), name, encoding)
+
+    @property
+    def open_file(self) -> str:
+        """
+        Returns the source text being tokenized.
+        """
+        return self._open_file
+
+    @open_file.setter
+    def open_file(self, source: str):
+        """
+        Replaces the source text. The token stream is rebuilt from the new text the next time it is needed.
+        """
+        self._open_file = source
+        self._reset_stream()
+
     def has_more_tokens(self) -> bool:
         """
-        Checks to see if there are more tokens.
-        The return false should never be hit, so it's pragma'd.
-        This method has the same problem as _remove whitespace which seems to not like to be tested by coverage tools.
-        """
-        i: int = self.current_index
-        while i < len(self.open_file):  # pragma: no cover
-            peek: str = self.open_file[i:i+2]
-            if self.open_file[i].isspace():
-                i += 1
-                continue
-            elif peek == '//':
-                i += 2
-                while i < len(self.open_file) and self.open_file[i] != '\n':
-                    i += 1
-                i += 1
-            elif peek == "/*":
-                i += 2
-                while i < len(self.open_file) - 1:
-                    if self.open_file[i] == "*" and self.open_file[i+1] == "/":
-                        i += 2
-                        break
-                    i += 1
-            else:
-                i += 1
-                return True
-        return False  # pragma: no cover
+        Checks to see if there are more tokens after the current one.
+        """
+        return self.token_index + 1 < len(self._stream())
 
     def advance(self):
         """
-        After checking if we have more tokens, we advance and save the ch.
-        The return should never be hit, so we pragma no cover it for the coverage tester.
-        """
-        self._skip_whitespace_and_comments()
-
-        if self.current_index >= len(self.open_file):
-            return None
-
-        ch = self.open_file[self.current_index]
-
-        # Symbols
-        if ch in SYMBOL_LIST:
-            self.current_index += 1
-            self.current_token_type = "symbol"
-            self.current_token_value = ch
-            print(f"TOKENIZER: {self.current_token_type} | {self.current_token_value}")
-            return self.current_token_type, self.current_token_value
-
-        # Keywords and Identifiers
-        if ch.isalpha() or ch == "_":
-            start = self.current_index
-            # noinspection PyRedundantParentheses
-            while (self.current_index < len(self.open_file) and (self.open_file[self.current_index].isalnum() or self.open_file[self.current_index] == "_")):
-                self.current_index += 1
-            self.current_token_value = self.open_file[start:self.current_index]
-            self.current_token_type = "keyword" if self.current_token_value in KEYWORD_LIST else "identifier"
-            print(f"TOKENIZER: {self.current_token_type} | {self.current_token_value}")
-            return self.current_token_type, self.current_token_value
-
-        # Ints / digits
-        if ch.isdigit():
-            start = self.current_index
-            while self.current_index < len(self.open_file) and self.open_file[self.current_index].isdigit():
-                self.current_index += 1
-            self.current_token_value = self.open_file[start:self.current_index]
-            self.current_token_type = "integerConstant"
-            print(f"TOKENIZER: {self.current_token_type} | {self.current_token_value}")
-            return self.current_token_type, self.current_token_value
-
-        # String constant
-        if ch == '"':
-            self.current_index += 1
-            start = self.current_index
-            while self.current_index < len(self.open_file) and self.open_file[self.current_index] != '"':
-                self.current_index += 1
-            #  The Jack tests expect a string without a trailing space
-            self.current_token_value = self.open_file[start:self.current_index]
-            self.current_token_type = "stringConstant"
-            self.current_index += 1
-            print(f"TOKENIZER: {self.current_token_type} | {self.current_token_value}")
-            return self.current_token_type, self.current_token_value
-
-        return None  # pragma: no cover
-
-    def _skip_whitespace_and_comments(self):
-        """
-        Skips whitespace and comments for the tokenizer.
-        Even though the coverage says it doesn't execute, I know it does by the tests passing.
-        """
-        while self.current_index < len(self.open_file):  # pragma: no cover
-            peek: str = self.open_file[self.current_index:self.current_index + 2]
-            if self.open_file[self.current_index].isspace():
-                self.current_index += 1
-            elif peek == '//':
-                self.current_index += 2
-                while self.current_index < len(self.open_file) and self.open_file[self.current_index] != '\n':
-                    self.current_index += 1
-                self.current_index += 1
-            elif peek == "/*":
-                self.current_index += 2
-                while self.current_index < len(self.open_file) - 1:
-                    if self.open_file[self.current_index] == "*" and self.open_file[self.current_index + 1] == "/":
-                        self.current_index += 2
-                        break
-                    self.current_index += 1
-            else:
-                break
+        Advances to the next token in the stream and saves its type and value.
+        Raises ValueError if there are no more tokens, so a parser waiting for a token that never comes, such as a
+        missing ';', stops instead of looping forever.
+        """
+        token_types = self._stream()
+        if self.token_index + 1 >= len(token_types):
+            self.token_index = len(token_types)
+            self.current_index = len(self._open_file)
+            raise unexpected_end_of_file(self.current_token_value)
+
+        self.token_index += 1
+        self.current_token_type, self.current_token_value = self._token_at(self.token_index)
+        self.current_index = self._token_starts[self.token_index] + self._token_lengths[self.token_index]
+        if self.current_token_type == "stringConstant":
+            self.current_index += 1  # Step over the closing quote
+        if trace.tokens:
+            trace.logger.log(trace.TOKEN_LEVEL, "TOKENIZER: %s | %s", self.current_token_type, self.current_token_value)
+        return self.current_token_type, self.current_token_value
+
+    def peek(self, k: int = 1):
+        """
+        Returns the (type, value) of the token k places after the current one without advancing.
+        Returns None if the stream ends before that.
+        """
+        index = self.token_index + k
+        if 0 <= index < len(self._stream()):
+            return self._token_at(index)
+        return None
+
+    def token(self, index: int) -> tuple[str, str]:
+        """
+        Returns the (type, value) of the token at a position in the token stream, e.g. one referenced by a parse tree.
+        """
+        if not 0 <= index < len(self._stream()):
+            raise IndexError(f"Token index {index} is out of range")
+        return self._token_at(index)
+
+    def _reset_stream(self):
+        """
+        Drops the token arrays so they get rebuilt from open_file.
+        """
+        self._token_types = None
+        self._token_starts = None
+        self._token_lengths = None
+        self.token_index = -1
+
+    def _token_at(self, index: int) -> tuple[str, str]:
+        """
+        Builds the (type, value) pair for a token in the stream. Only identifiers and constants are sliced out of the
+        source.
+        """
+        code = self._token_types[index]
+        value = KIND_VALUES[code]
+        if value is None:
+            start = self._token_starts[index]
+            value = self.open_file[start:start + self._token_lengths[index]]
+        return KIND_TYPES[code], value
+
+    def _stream(self) -> array:
+        """
+        Returns the token type array, lexing open_file into the token arrays first if that hasn't happened yet.
+        """
+        if self._token_types is None:
+            self._token_types, self._token_starts, self._token_lengths = lex(self._open_file)
+        return self._token_types
 
 
     def token_type(self) -> str:
@@ -177,3 +277,162 @@ class Tokenizer:
         if self.current_token_type == "stringConstant":
             return self.current_token_value
         raise ValueError("Current token is not a stringConstant")
+
+
+class RegexTokenizer(Tokenizer):
+    """
+    Streaming tokenizer engine. Instead of lexing the whole file up front, it pulls tokens from a TOKEN_REGEX finditer
+    scanner as they are asked for, and only buffers the tokens peek has looked ahead at.
+    It exposes the same API as Tokenizer, so it can be handed to CompilationEngine without any changes.
+    """
+    token_regex: re.Pattern = TOKEN_REGEX
+
+    def has_more_tokens(self) -> bool:
+        """
+        Checks to see if there are more tokens.
+        The next token is scanned once into the lookahead buffer and stays cached there until advance consumes it,
+        so repeated calls don't rescan whitespace and comments.
+        """
+        return self.peek() is not None
+
+    def advance(self):
+        """
+        Advances to the next token and saves its type and value.
+        Raises ValueError if there are no more tokens.
+        """
+        self._sync_scanner()
+        token = self._lookahead.popleft() if self._lookahead else self._scan()
+        if token is None:
+            self.current_index = self._scanner_index = len(self._open_file)
+            raise unexpected_end_of_file(self.current_token_value)
+
+        self.current_token_type, self.current_token_value, self.current_index = token
+        self._scanner_index = self.current_index
+        self.token_index += 1
+        if trace.tokens:
+            trace.logger.log(trace.TOKEN_LEVEL, "TOKENIZER: %s | %s", self.current_token_type, self.current_token_value)
+        return self.current_token_type, self.current_token_value
+
+    def peek(self, k: int = 1):
+        """
+        Returns the (type, value) of the token k places after the current one without advancing.
+        Returns None if the stream ends before that.
+        """
+        self._sync_scanner()
+        while len(self._lookahead) < k:
+            token = self._scan()
+            if token is None:
+                return None
+            self._lookahead.append(token)
+        return self._lookahead[k - 1][:2]
+
+    def _reset_stream(self):
+        """
+        Drops the scanner and any buffered lookahead so scanning restarts on the new open_file.
+        """
+        super()._reset_stream()
+        self._scanner = None
+        self._scanner_index = -1
+        self._lookahead = deque()
+
+    def _scan(self):
+        """
+        Pulls the next real token from the scanner as (type, value, end index), or None at the end of the file.
+        """
+        for match in self._scanner:
+            kind = match.lastgroup
+            if kind in SKIPPED_GROUPS:
+                continue
+            if kind == "mismatch":
+                raise unexpected_character(match)
+
+            if kind == "keyword" or kind == "symbol":
+                value = KIND_VALUES[KIND_CODES[match.group()]]
+            elif kind == "stringConstant":
+                value = match.group()[1:-1]  # The Jack tests expect a string without its quotes
+            else:
+                value = match.group()
+            return kind, value, match.end()
+        return None
+
+    def _sync_scanner(self):
+        """
+        Makes sure the finditer scanner exists and starts at current_index.
+        The scanner is restarted if current_index was changed from outside since the last advance.
+        """
+        if self._scanner is None or self._scanner_index != self.current_index:
+            self._scanner = self.token_regex.finditer(self._open_file, self.current_index)
+            self._scanner_index = self.current_index
+            self._lookahead.clear()
+
+
+class MmapTokenizer(RegexTokenizer):
+    """
+    Streaming tokenizer for very large files. The file is memory-mapped instead of read and scanned as bytes straight
+    from the mapping, and only the tokens handed out are decoded, so neither the source nor a token stream for all of
+    it is ever held in memory; the mapped pages belong to the file and the OS can drop them at any time. Offsets,
+    current_index included, count bytes. The source must be UTF-8.
+    token(index) still lexes the whole mapping into token arrays the first time it is called.
+    """
+    token_regex: re.Pattern = TOKEN_REGEX_BYTES
+
+    def __init__(self, jack_file, source: str | bytes | None = None):
+        if source is None:
+            with open(jack_file, "rb") as file:
+                try:
+                    # The mapping stays valid after the file is closed.
+                    source = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+                except ValueError:
+                    source = b""  # An empty file can't be mapped
+        super().__init__(jack_file, source)
+
+    @property
+    def open_file(self) -> str:
+        """
+        Returns the whole source text. This decodes all of it, which tokenizing never needs to.
+        """
+        return str(self._open_file, "utf-8")
+
+    @open_file.setter
+    def open_file(self, source: str | bytes | mmap.mmap):
+        """
+        Replaces the source. Text is encoded as UTF-8. The token stream is rebuilt the next time it is needed.
+        """
+        self._open_file = source.encode("utf-8") if isinstance(source, str) else source
+        self._reset_stream()
+
+    def close(self):
+        """
+        Unmaps the file, leaving the tokenizer without a source.
+        """
+        source = self._open_file
+        # The scanner holds a view of the mapping, which has to go before the mapping can be closed.
+        self.open_file = b""
+        if isinstance(source, mmap.mmap):
+            source.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _scan(self):
+        """
+        Scans the next real token as (type, value, end index), decoding its value, or returns None at the end.
+        """
+        token = super()._scan()
+        if token is None or token[1].__class__ is str:
+            return token
+        return token[0], str(token[1], "utf-8"), token[2]
+
+    def _token_at(self, index: int) -> tuple[str, str]:
+        """
+        Decodes the (type, value) pair for a token in the token arrays.
+        """
+        code = self._token_types[index]
+        value = KIND_VALUES[code]
+        if value is None:
+            start = self._token_starts[index]
+            value = str(self._open_file[start:start + self._token_lengths[index]], "utf-8")
+        return KIND_TYPES[code], value
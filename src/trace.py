@@ -0,0 +1,55 @@
+"""
+src/trace.py
+Leveled tracing for the tokenizer and the compilation engine.
+
+Tracing is off by default. The hot loops check the plain module flags (trace.parser, trace.tokens) before building
+any message, so disabled tracing costs a single attribute lookup and never formats a string.
+Levels:
+PARSER_LEVEL: one message per parser decision (statements, terms, expression lists)
+TOKEN_LEVEL: PARSER_LEVEL plus one message per token read by the tokenizer
+"""
+import logging
+import sys
+
+PARSER_LEVEL: int = logging.DEBUG
+TOKEN_LEVEL: int = 5
+logging.addLevelName(TOKEN_LEVEL, "TOKEN")
+
+logger: logging.Logger = logging.getLogger("jack")
+
+# Checked directly by the hot paths; only change these through enable/disable.
+parser: bool = False
+tokens: bool = False
+
+
+def enable(level: int = PARSER_LEVEL, stream=None):
+    """
+    Turns tracing on at the given level, writing to stream (stderr by default).
+    """
+    global parser, tokens
+    disable()
+    handler = logging.StreamHandler(stream if stream is not None else sys.stderr)
+    handler.setFormatter(logging.Formatter("%(levelname)s %(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(level)
+    logger.propagate = False
+    parser = level <= PARSER_LEVEL
+    tokens = level <= TOKEN_LEVEL
+
+
+def disable():
+    """
+    Turns tracing off and removes any handlers added by enable.
+    """
+    global parser, tokens
+    parser = tokens = False
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    logger.setLevel(logging.NOTSET)
+
+
+def level_for_verbosity(verbosity: int) -> int:
+    """
+    Maps the number of --trace flags to a level: once for parser tracing, twice to also trace every token.
+    """
+    return TOKEN_LEVEL if verbosity >= 2 else PARSER_LEVEL
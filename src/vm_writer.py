@@ -0,0 +1,67 @@
+"""
+src/vm_writer.py
+Writes Hack VM commands to a text stream, one command per line.
+"""
+from typing import TextIO
+
+
+class VMWriter:
+    """
+    Represents a VM command writer on top of an open text file.
+    """
+    def __init__(self, stream: TextIO):
+        self.stream = stream
+
+    def write_push(self, segment: str, index: int):
+        """
+        Writes push segment index.
+        """
+        self.stream.write(f"push {segment} {index}\n")
+
+    def write_pop(self, segment: str, index: int):
+        """
+        Writes pop segment index.
+        """
+        self.stream.write(f"pop {segment} {index}\n")
+
+    def write_arithmetic(self, command: str):
+        """
+        Writes an arithmetic or logical command: add, sub, neg, eq, gt, lt, and, or or not.
+        """
+        self.stream.write(f"{command}\n")
+
+    def write_label(self, label: str):
+        """
+        Writes label label.
+        """
+        self.stream.write(f"label {label}\n")
+
+    def write_goto(self, label: str):
+        """
+        Writes goto label.
+        """
+        self.stream.write(f"goto {label}\n")
+
+    def write_if(self, label: str):
+        """
+        Writes if-goto label.
+        """
+        self.stream.write(f"if-goto {label}\n")
+
+    def write_call(self, name: str, n_args: int):
+        """
+        Writes call name nArgs.
+        """
+        self.stream.write(f"call {name} {n_args}\n")
+
+    def write_function(self, name: str, n_locals: int):
+        """
+        Writes function name nLocals.
+        """
+        self.stream.write(f"function {name} {n_locals}\n")
+
+    def write_return(self):
+        """
+        Writes return.
+        """
+        self.stream.write("return\n")
@@ -0,0 +1,51 @@
+"""
+src/watcher.py
+Polls a set of files for content changes, for jack_analyzer's watch mode.
+
+Each poll stats every file. Only files whose modification time or size changed are read, and a file only counts as
+changed if its content hash differs from the last poll, so touching a file or saving it unedited doesn't trigger a
+rebuild. Polling needs nothing outside the standard library and works the same on every platform and filesystem,
+including editors that save by replacing the file.
+"""
+from collections.abc import Callable, Iterable
+import hashlib
+import os
+from pathlib import Path
+
+
+class FileWatcher:
+    """
+    Represents the last seen state of the files returned by list_files, which is called on every poll so new files
+    are picked up.
+    """
+    def __init__(self, list_files: Callable[[], Iterable[Path]]):
+        self.list_files = list_files
+        # path -> (modification time in ns, size, content hash)
+        self.snapshots: dict[Path, tuple[int, int, str]] = {}
+        self.poll()
+
+    def poll(self) -> tuple[list[tuple[Path, float]], list[Path]]:
+        """
+        Returns the files that are new or whose content changed since the last poll, each with its modification time
+        in seconds since the epoch, and the files that have gone.
+        """
+        changed = []
+        seen = set()
+        for path in self.list_files():
+            path = Path(path)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            seen.add(path)
+            previous = self.snapshots.get(path)
+            if previous is not None and previous[:2] == (stat.st_mtime_ns, stat.st_size):
+                continue
+            digest = hashlib.sha256(path.read_bytes()).hexdigest()
+            self.snapshots[path] = (stat.st_mtime_ns, stat.st_size, digest)
+            if previous is None or previous[2] != digest:
+                changed.append((path, stat.st_mtime))
+        removed = [path for path in self.snapshots if path not in seen]
+        for path in removed:
+            del self.snapshots[path]
+        return changed, removed
@@ -0,0 +1,109 @@
+"""
+src/xml_writer.py
+Streams indented XML straight to a file as the compilation engine opens and closes non-terminals, or, with
+TokenXmlWriter, the flat token list of token mode.
+
+The output is byte-identical to building an ElementTree, running element_tree.indent on it and writing it with
+short_empty_elements=False, but nothing is kept in memory apart from the current depth.
+"""
+from typing import TextIO
+
+from src.output_sink import OutputSink
+
+INDENT: str = "  "
+
+
+def escape_text(text: str) -> str:
+    """
+    Escapes text content the same way ElementTree does.
+    """
+    if "&" in text:
+        text = text.replace("&", "&amp;")
+    if "<" in text:
+        text = text.replace("<", "&lt;")
+    if ">" in text:
+        text = text.replace(">", "&gt;")
+    return text
+
+
+class XmlStreamWriter(OutputSink):
+    """
+    Represents a streaming XML writer on top of an open text file.
+    """
+    def __init__(self, stream: TextIO):
+        self.stream = stream
+        self.depth = 0
+        self._indents: list[str] = [""]
+        # True while the most recently opened element has no children yet. Its newline is held back so an element
+        # that stays empty is written as <tag></tag> on one line.
+        self._empty = False
+
+    def start_nonterminal(self, tag: str):
+        """
+        Writes the open tag of a non-terminal.
+        """
+        self._start_child()
+        self.stream.write(f"{self._indent()}<{tag}>")
+        self.depth += 1
+        self._empty = True
+
+    def end_nonterminal(self, tag: str):
+        """
+        Writes the close tag of the innermost open non-terminal.
+        """
+        self.depth -= 1
+        if self._empty:
+            self.stream.write(f"</{tag}>\n")
+            self._empty = False
+        else:
+            self.stream.write(f"{self._indent()}</{tag}>\n")
+
+    def terminal(self, token_type: str, value: str, index: int):
+        """
+        Writes a complete terminal element on its own line, with the value padded like the Jack test files.
+        """
+        self._start_child()
+        self.stream.write(f"{self._indent()}<{token_type}> {escape_text(value)} </{token_type}>\n")
+
+    def _start_child(self):
+        """
+        Ends the parent's open tag line the first time it gets a child.
+        """
+        if self._empty:
+            self.stream.write("\n")
+            self._empty = False
+
+    def _indent(self) -> str:
+        """
+        Returns the indentation for the current depth.
+        """
+        while len(self._indents) <= self.depth:
+            self._indents.append(INDENT * len(self._indents))
+        return self._indents[self.depth]
+
+
+class TokenXmlWriter(OutputSink):
+    """
+    Streams the token list format of the Jack test files (e.g. SquareT.xml): a tokens element holding one unindented
+    terminal per line. It is meant for CompilationEngine's token mode, which sends no other non-terminals.
+    """
+    def __init__(self, stream: TextIO):
+        self.stream = stream
+
+    def start_nonterminal(self, tag: str):
+        """
+        Writes the open tag of the tokens element.
+        """
+        self.stream.write(f"<{tag}>\n")
+
+    def end_nonterminal(self, tag: str):
+        """
+        Writes the close tag of the tokens element.
+        """
+        self.stream.write(f"</{tag}>\n")
+
+    def terminal(self, token_type: str, value: str, index: int):
+        """
+        Writes a token on its own line.
+        """
+        self.stream.write(f"<{token_type}> {escape_text(value)} </{token_type}>\n")
@@ -0,0 +1,61 @@
+"""
+The test suite for atomic output files
+"""
+import stat
+
+import pytest
+
+from src.atomic_file import open_atomic, write_atomic
+
+
+def test_write_atomic(tmp_path):
+    """
+    Test that write_atomic creates missing directories, replaces the target and leaves no temporary files behind.
+    """
+    output_file = tmp_path / "out" / "Main.xml"
+    write_atomic(output_file, b"first")
+    write_atomic(output_file, b"second")
+
+    assert output_file.read_bytes() == b"second"
+    assert [file.name for file in output_file.parent.iterdir()] == ["Main.xml"]
+
+
+def test_open_atomic_text_mode(tmp_path):
+    """
+    Test that open_atomic passes text mode options through to the temporary file.
+    """
+    output_file = tmp_path / "Main.xml"
+    with open_atomic(output_file, "w", encoding="utf-8", newline="\n") as xml_file:
+        xml_file.write("<class>\n</class>\n")
+
+    assert output_file.read_bytes() == b"<class>\n</class>\n"
+
+
+def test_open_atomic_error_keeps_old_file(tmp_path):
+    """
+    Test that an error while writing leaves the previous file untouched and cleans up the temporary file.
+    """
+    output_file = tmp_path / "Main.xml"
+    write_atomic(output_file, b"old")
+    with pytest.raises(RuntimeError):
+        with open_atomic(output_file) as temp_file:
+            temp_file.write(b"partial")
+            raise RuntimeError("compile failed")
+
+    assert output_file.read_bytes() == b"old"
+    assert [file.name for file in tmp_path.iterdir()] == ["Main.xml"]
+
+
+def test_open_atomic_permissions(tmp_path):
+    """
+    Test that a new file gets the same permissions as one made with open, and a replaced file keeps its own.
+    """
+    reference = tmp_path / "reference.xml"
+    reference.write_bytes(b"")
+    output_file = tmp_path / "Main.xml"
+    write_atomic(output_file, b"new")
+    assert stat.S_IMODE(output_file.stat().st_mode) == stat.S_IMODE(reference.stat().st_mode)
+
+    output_file.chmod(0o640)
+    write_atomic(output_file, b"replaced")
+    assert stat.S_IMODE(output_file.stat().st_mode) == 0o640
@@ -0,0 +1,88 @@
+"""
+The test suite for the incremental build cache
+"""
+import pytest
+
+from src.build_cache import BuildCache
+
+
+@pytest.fixture
+def setup_resources(tmp_path):
+    """
+    Sets up a cache directory, a source file and its compiled output.
+    """
+    jack_file = tmp_path / "Main.jack"
+    jack_file.write_text("class Main { }")
+    output_file = tmp_path / "output" / "Main.xml"
+    output_file.parent.mkdir()
+    output_file.write_text("<class></class>\n")
+    yield {
+        "cache_dir": tmp_path / "cache",
+        "jack_file": jack_file,
+        "output_file": output_file,
+    }
+
+
+def test_miss_then_hit(setup_resources):
+    """
+    Test that a file misses until it is stored, and hits after the cache is reloaded from disk.
+    """
+    jack_file, output_file = setup_resources["jack_file"], setup_resources["output_file"]
+    cache = BuildCache(setup_resources["cache_dir"], "1")
+    assert cache.restore(jack_file, output_file) is False
+    cache.store(jack_file, output_file)
+    cache.save()
+
+    reloaded = BuildCache(setup_resources["cache_dir"], "1")
+    assert reloaded.restore(jack_file, output_file) is True
+    assert (reloaded.hits, reloaded.misses) == (1, 0)
+    assert reloaded.statistics() == "Cache: 1 hits, 0 misses (100% hit rate)"
+
+
+def test_hit_restores_output(setup_resources):
+    """
+    Test that a hit rewrites an output file that was deleted since it was cached.
+    """
+    jack_file, output_file = setup_resources["jack_file"], setup_resources["output_file"]
+    cache = BuildCache(setup_resources["cache_dir"], "1")
+    cache.restore(jack_file, output_file)
+    cache.store(jack_file, output_file)
+    output_file.unlink()
+
+    assert cache.restore(jack_file, output_file) is True
+    assert output_file.read_text() == "<class></class>\n"
+
+
+def test_changed_source_misses(setup_resources):
+    """
+    Test that editing the source changes its key and misses.
+    """
+    jack_file, output_file = setup_resources["jack_file"], setup_resources["output_file"]
+    cache = BuildCache(setup_resources["cache_dir"], "1")
+    cache.store(jack_file, output_file)
+    jack_file.write_text("class Main { field int x; }")
+
+    assert cache.restore(jack_file, output_file) is False
+
+
+def test_version_change_drops_entries(setup_resources):
+    """
+    Test that a manifest written by another analyzer version is ignored.
+    """
+    jack_file, output_file = setup_resources["jack_file"], setup_resources["output_file"]
+    cache = BuildCache(setup_resources["cache_dir"], "1")
+    cache.store(jack_file, output_file)
+    cache.save()
+
+    upgraded = BuildCache(setup_resources["cache_dir"], "2")
+    assert upgraded.entries == {}
+    assert upgraded.restore(jack_file, output_file) is False
+
+
+def test_kind_is_part_of_key(setup_resources):
+    """
+    Test that different output kinds of the same source are cached separately.
+    """
+    cache = BuildCache(setup_resources["cache_dir"], "1")
+    jack_file = setup_resources["jack_file"]
+    assert cache.key_for(jack_file, "xml") != cache.key_for(jack_file, "vm")
@@ -0,0 +1,176 @@
+"""
+The test suite for VM code generation
+"""
+import io
+from pathlib import Path
+
+import pytest
+
+from benchmarks.corpus import CorpusOptions, write_corpus
+from src.code_generator import VmSink
+from src.compilation_engine import CompilationEngine
+from src.symbol_table import SymbolTable
+from src.tokenizer import Tokenizer
+
+INPUT_DIR: Path = Path(__file__).parent.parent / "input"
+
+
+@pytest.fixture
+def setup_resources():
+    """
+    Provides a function that compiles Jack source to a list of VM commands.
+    """
+    def compile_source(source: str) -> list[str]:
+        stream = io.StringIO()
+        CompilationEngine(Tokenizer.from_source(source), VmSink(stream)).compile_class()
+        return stream.getvalue().splitlines()
+
+    yield {
+        "compile": compile_source,
+    }
+
+
+def test_function_and_expression(setup_resources):
+    """
+    Test that a function gets its local count and that operators are applied left to right.
+    """
+    commands = setup_resources["compile"]("class Test { function int f(int a) { var int b, c; "
+                                          "let b = a + 2 * 3; return b; } }")
+
+    assert commands == [
+        "function Test.f 2",
+        "push argument 0", "push constant 2", "add", "push constant 3", "call Math.multiply 2",
+        "pop local 0",
+        "push local 0", "return",
+    ]
+
+
+def test_constructor_and_method(setup_resources):
+    """
+    Test that a constructor allocates its fields and a method sets this from argument 0.
+    """
+    commands = setup_resources["compile"]("class Test { field int x, y; static int n; "
+                                          "constructor Test new(int ax) { let x = ax; let n = n + 1; return this; } "
+                                          "method int getX() { return x; } }")
+
+    assert commands == [
+        "function Test.new 0", "push constant 2", "call Memory.alloc 1", "pop pointer 0",
+        "push argument 0", "pop this 0",
+        "push static 0", "push constant 1", "add", "pop static 0",
+        "push pointer 0", "return",
+        "function Test.getX 0", "push argument 0", "pop pointer 0", "push this 0", "return",
+    ]
+
+
+def test_calls(setup_resources):
+    """
+    Test that calls on an object variable and on this pass the object first, and do discards the result.
+    """
+    commands = setup_resources["compile"]("class Test { method void f(Test t) { do t.g(1); do g(2); "
+                                          "do Output.printInt(3); return; } }")
+
+    assert commands == [
+        "function Test.f 0", "push argument 0", "pop pointer 0",
+        "push argument 1", "push constant 1", "call Test.g 2", "pop temp 0",
+        "push pointer 0", "push constant 2", "call Test.g 2", "pop temp 0",
+        "push constant 3", "call Output.printInt 1", "pop temp 0",
+        "push constant 0", "return",
+    ]
+
+
+def test_control_flow(setup_resources):
+    """
+    Test that if, if/else and while get their own labels.
+    """
+    commands = setup_resources["compile"]("class Test { function void f() { var int i; "
+                                          "while (i < 3) { if (i = 1) { let i = 5; } else { let i = i + 1; } } "
+                                          "if (true) { return; } return; } }")
+
+    assert commands == [
+        "function Test.f 1",
+        "label WHILE_EXP0", "push local 0", "push constant 3", "lt", "not", "if-goto WHILE_END0",
+        "push local 0", "push constant 1", "eq", "not", "if-goto IF_ELSE1",
+        "push constant 5", "pop local 0", "goto IF_END1",
+        "label IF_ELSE1", "push local 0", "push constant 1", "add", "pop local 0",
+        "label IF_END1",
+        "goto WHILE_EXP0", "label WHILE_END0",
+        "push constant 0", "not", "not", "if-goto IF_END2", "push constant 0", "return", "label IF_END2",
+        "push constant 0", "return",
+    ]
+
+
+def test_arrays_and_strings(setup_resources):
+    """
+    Test array reads and writes, string constants and unary operators.
+    """
+    commands = setup_resources["compile"]('class Test { function void f(Array a) { let a[1] = -a[2]; '
+                                          'do Output.printString("Hi"); return; } }')
+
+    assert commands == [
+        "function Test.f 0",
+        "push argument 0", "push constant 1", "add",
+        "push argument 0", "push constant 2", "add", "pop pointer 1", "push that 0", "neg",
+        "pop temp 0", "pop pointer 1", "push temp 0", "pop that 0",
+        "push constant 2", "call String.new 1",
+        "push constant 72", "call String.appendChar 2", "push constant 105", "call String.appendChar 2",
+        "call Output.printString 1", "pop temp 0",
+        "push constant 0", "return",
+    ]
+
+
+def test_undefined_variable(setup_resources):
+    """
+    Test that using an undeclared variable is reported.
+    """
+    with pytest.raises(ValueError, match="Undefined variable y in Test.f"):
+        setup_resources["compile"]("class Test { function void f() { let y = 1; return; } }")
+
+
+@pytest.mark.parametrize("class_name, function_count", [("Main", 2), ("Square", 10), ("SquareGame", 4)])
+def test_square(class_name, function_count):
+    """
+    Test that each class of the Square game compiles to one VM function per subroutine.
+    """
+    stream = io.StringIO()
+    jack_file = INPUT_DIR / "full_tests" / "square" / f"{class_name}.jack"
+    CompilationEngine(Tokenizer(jack_file), VmSink(stream)).compile_class()
+    commands = stream.getvalue().splitlines()
+
+    assert sum(command.startswith("function ") for command in commands) == function_count
+    assert commands[0].startswith(f"function {class_name}.")
+
+
+def test_generated_corpus(tmp_path):
+    """
+    Test that a generated class with many variables compiles, reusing one symbol table across classes.
+    """
+    symbols = SymbolTable()
+    for jack_file in write_corpus(tmp_path, 2, CorpusOptions(subroutines=3, fields=50, locals=50)):
+        symbols.clear()
+        stream = io.StringIO()
+        CompilationEngine(Tokenizer(jack_file), VmSink(stream, symbols)).compile_class()
+
+        assert stream.getvalue().count("function ") == 3
+        assert symbols.var_count("field") == 50
+
+
+def test_deeply_nested_expressions(setup_resources):
+    """
+    Test that code is generated for parentheses, unary chains and calls nested far deeper than the recursion limit.
+    """
+    compile_source = setup_resources["compile"]
+    depth = 10_000
+
+    commands = compile_source(f"class A {{ function int f() {{ return {'(' * depth}1{')' * depth}; }} }}")
+    assert commands == ["function A.f 0", "push constant 1", "return"]
+
+    commands = compile_source(f"class A {{ function int f(int x) {{ return {'- ~' * (depth // 2)} x; }} }}")
+    assert commands == ["function A.f 0", "push argument 0", *["not", "neg"] * (depth // 2), "return"]
+
+    calls = depth // 2
+    commands = compile_source(f"class A {{ function int f(int x) {{ var Array a; "
+                              f"return {'A.f(a[' * calls}x{'])' * calls}; }} }}")
+    assert commands[1:4] == ["push local 0"] * 3
+    assert commands.count("call A.f 1") == calls
+    assert commands.count("push that 0") == calls
+    assert commands[-3:] == ["push that 0", "call A.f 1", "return"]
@@ -1,14 +1,19 @@
 """
 Testing document for the compilation engine
 """
+from collections import Counter
 from pathlib import Path
+import sys
 from tokenize import TokenError
 
 import pytest
 
 import xml.etree.ElementTree as element_tree
 from src.compilation_engine import CompilationEngine
-from src.tokenizer import Tokenizer
+from src.tokenizer import Tokenizer, RegexTokenizer
+from src.output_sink import OutputSink
+
+INPUT_DIR: Path = Path(__file__).parent.parent / "input"
 
 @pytest.fixture
 def setup_resources():
@@ -1115,3 +1120,153 @@ def test_compile_all(setup_resources, compile_tests, base_xml):
         read_file = file.read()
 
     assert xml_file == read_file
+
+
+@pytest.mark.parametrize("jack_name", ["square/Main", "square/Square", "square/SquareGame", "ArrayTest/Main"])
+def test_compile_all_regex_tokenizer(jack_name):
+    """
+    Test that the compilation engine produces the same XML when driven by the regex tokenizer engine.
+    """
+    jack_code = INPUT_DIR / "full_tests" / f"{jack_name}.jack"
+    compiler = CompilationEngine(RegexTokenizer(jack_code))
+    compiler.compile_class()
+
+    tree = element_tree.ElementTree(compiler.root)
+    element_tree.indent(tree)
+    xml_str = element_tree.tostring(compiler.root, encoding="unicode", method="html")
+
+    assert xml_str == jack_code.with_suffix(".xml").read_text()
+
+
+def test_compile_term_lookahead_ignores_whitespace(tmp_path):
+    """
+    Test that term lookahead uses the token stream, so whitespace before '.', '(' and '[' doesn't change the parse.
+    """
+    jack_file = tmp_path / "Spaced.jack"
+    jack_file.write_text("class Spaced { function void f() { let x = a [ i ] + foo (1) - c . d ( ); return; } }")
+    compiler = CompilationEngine(Tokenizer(jack_file))
+    compiler.compile_class()
+
+    terms = compiler.root.findall(".//letStatement/expression/term")
+    assert [term.find("identifier").text for term in terms] == [" a ", " foo ", " c "]
+    assert [child.tag for child in terms[0]] == ["identifier", "symbol", "expression", "symbol"]
+    assert [child.tag for child in terms[1]] == ["identifier", "symbol", "expressionList", "symbol"]
+    assert [child.tag for child in terms[2]] == ["identifier", "symbol", "identifier", "symbol", "expressionList",
+                                                  "symbol"]
+
+
+def test_methods_replaced_on_instance():
+    """
+    Test that a string constant spelled like a symbol is still a constant, and that statement methods replaced on an
+    instance are the ones called, as the profiler needs.
+    """
+    compiler = CompilationEngine(Tokenizer.from_source('class A { function void f() { let s = "("; return; } }'))
+    calls = []
+    original = compiler.compile_return_statement
+    compiler.compile_return_statement = lambda: calls.append("return") or original()
+    compiler.compile_class()
+
+    assert compiler.root.find(".//letStatement/expression/term/stringConstant").text == " ( "
+    assert calls == ["return"]
+
+
+class NestingSink(OutputSink):
+    """
+    Checks that every non-terminal is closed in order and counts the events, without keeping the parse.
+    """
+    def __init__(self):
+        self.open: list[str] = []
+        self.depth = 0
+        self.counts: Counter = Counter()
+
+    def start_nonterminal(self, tag: str):
+        self.open.append(tag)
+        self.depth = max(self.depth, len(self.open))
+        self.counts[tag] += 1
+
+    def end_nonterminal(self, tag: str):
+        assert self.open.pop() == tag
+
+    def terminal(self, token_type: str, value: str, index: int):
+        self.counts[value] += 1
+
+
+def compile_nested(expression: str) -> NestingSink:
+    """
+    Compiles a function returning expression into a NestingSink.
+    """
+    sink = NestingSink()
+    source = f"class A {{ function int f() {{ return {expression}; }} }}"
+    CompilationEngine(Tokenizer.from_source(source), sink).compile_class()
+    assert sink.open == []
+    return sink
+
+
+def test_deeply_nested_parentheses():
+    """
+    Test that expressions nested far deeper than the recursion limit compile, with one term and expression per level.
+    """
+    depth = 10_000
+    assert depth > sys.getrecursionlimit()
+
+    sink = compile_nested("(" * depth + "1" + ")" * depth)
+
+    assert sink.counts["expression"] == sink.counts["term"] == depth + 1
+    # Plus the parentheses of f's parameter list.
+    assert sink.counts["("] == sink.counts[")"] == depth + 1
+    assert sink.counts["1"] == 1
+    assert sink.depth > 2 * depth
+
+
+def test_deeply_nested_unary_ops():
+    """
+    Test that a long chain of unary operations nests one term inside another without recursing.
+    """
+    depth = 10_000
+
+    sink = compile_nested("- ~" * (depth // 2) + " x")
+
+    assert sink.counts["term"] == depth + 1
+    assert sink.counts["expression"] == 1
+    assert sink.counts["-"] + sink.counts["~"] == depth
+    assert sink.depth > depth
+
+
+def test_deeply_nested_calls_and_indices():
+    """
+    Test that subroutine calls and array indices nested inside each other 10,000 deep compile.
+    """
+    calls = 5_000
+
+    sink = compile_nested("f(x, a[" * calls + "0" + "])" * calls)
+
+    assert sink.counts["expressionList"] == calls
+    # Two arguments per call, one index per array, and the returned expression.
+    assert sink.counts["expression"] == 3 * calls + 1
+    assert sink.counts[","] == sink.counts["["] == sink.counts["]"] == calls
+    assert sink.depth > 2 * calls
+
+
+def test_compile_nested_expression():
+    """
+    Test that each kind of nested term is closed in the right place when compile_expression is called directly.
+    """
+    tokenizer = Tokenizer.from_source("-(a[1] + f(2, ~x)) * g() ;")
+    tokenizer.advance()
+    compiler = CompilationEngine(tokenizer)
+    compiler.compile_expression()
+
+    expression = compiler.root
+    assert expression.tag == "expression"
+    assert [child.tag for child in expression] == ["term", "symbol", "term"]
+    unary = expression[0]
+    assert [child.tag for child in unary] == ["symbol", "term"]
+    inner = unary[1][1]
+    assert [child.tag for child in inner] == ["term", "symbol", "term"]
+    assert [child.tag for child in inner[0]] == ["identifier", "symbol", "expression", "symbol"]
+    call = inner[2]
+    assert [child.text.strip() for child in call if child.tag != "expressionList"] == ["f", "(", ")"]
+    assert len(call.find("expressionList").findall("expression")) == 2
+    assert call.find("expressionList/expression[2]/term/symbol").text == " ~ "
+    assert [child.tag for child in expression[2]] == ["identifier", "symbol", "expressionList", "symbol"]
+    assert tokenizer.current_token_value == ";"
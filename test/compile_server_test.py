@@ -0,0 +1,159 @@
+"""
+The test suite for the compile server
+"""
+import io
+import json
+from pathlib import Path
+import tempfile
+import threading
+
+import pytest
+
+from src.compile_client import CompileClient
+from src.compile_server import CompileServer, compile_tokenizer
+from src.compilation_engine import CompilationEngine
+from src.tokenizer import Tokenizer
+from src.xml_writer import XmlStreamWriter
+
+INPUT_DIR: Path = Path(__file__).parent.parent / "input"
+
+
+@pytest.fixture
+def setup_resources():
+    """
+    Runs a server on a thread. The socket goes in a short temporary directory, since socket paths have a length limit.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        socket_path = Path(directory) / "server.sock"
+        server = CompileServer(socket_path)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        yield {
+            "socket": socket_path,
+            "server": server,
+        }
+        server.shutdown()
+        thread.join()
+        server.server_close()
+
+
+def test_path_request(setup_resources):
+    """
+    Test that a path request returns the same XML as compiling the file directly.
+    """
+    jack_file = INPUT_DIR / "10" / "Square" / "Square.jack"
+    expected = io.StringIO()
+    CompilationEngine(Tokenizer(jack_file), XmlStreamWriter(expected)).compile_class()
+
+    with CompileClient(setup_resources["socket"]) as client:
+        response = client.request(path=str(jack_file))
+
+    assert response["ok"]
+    assert response["output"] == expected.getvalue()
+    assert response["elapsed_ms"] >= 0
+
+
+def test_source_and_vm_requests(setup_resources):
+    """
+    Test that source text compiles, and that several requests can share one connection, including optimized VM code.
+    """
+    source = "class Main { function int f() { return 2 * 3; } }"
+    with CompileClient(setup_resources["socket"]) as client:
+        xml = client.request(source=source)
+        vm = client.request(source=source, kind="vm")
+        optimized = client.request(source=source, kind="vm", optimize=True)
+
+    assert "<keyword> class </keyword>" in xml["output"]
+    assert vm["output"].splitlines() == ["function Main.f 0", "push constant 2", "push constant 3",
+                                         "call Math.multiply 2", "return"]
+    assert optimized["output"].splitlines() == ["function Main.f 0", "push constant 6", "return"]
+
+
+def test_diagnostics(setup_resources):
+    """
+    Test that lexing errors, bad requests and unreadable files are reported without stopping the server.
+    """
+    with CompileClient(setup_resources["socket"]) as client:
+        lex_error = client.request(source="class Main { function void f() { return #; } }")
+        unknown_kind = client.request(source="class Main { }", kind="asm")
+        missing = client.request(path=str(INPUT_DIR / "Missing.jack"))
+        empty = client.request()
+        client._file.write(b"not json\n")
+        client._file.flush()
+        bad_json = client._file.readline()
+        client._file.write(b"[1, 2]\n")
+        client._file.flush()
+        not_object = json.loads(client._file.readline())
+        still_up = client.request(source="class Main { }")
+
+    assert lex_error["ok"] is False
+    assert lex_error["error"].startswith("ValueError: Unexpected character '#'")
+    assert unknown_kind == {"ok": False, "error": "ValueError: Unknown kind 'asm', expected one of xml, vm",
+                            "elapsed_ms": unknown_kind["elapsed_ms"]}
+    assert missing["error"].startswith("FileNotFoundError")
+    assert empty["error"] == "ValueError: A request needs a 'path' or a 'source'"
+    assert b"Bad request" in bad_json
+    assert not_object == {"ok": False, "error": "Bad request: expected a JSON object, got list"}
+    assert still_up["ok"]
+
+
+def test_incomplete_source(setup_resources):
+    """
+    Test that source missing a ';' or a '}', as an editor sends while code is being typed, gets an error response
+    instead of hanging the request.
+    """
+    with CompileClient(setup_resources["socket"], timeout=5) as client:
+        missing_semicolon = client.request(source="class A { function void f() { let x = 1 } }")
+        missing_brace = client.request(source="class A { function void f() { return; }", kind="vm")
+        still_up = client.request(source="class Main { }")
+
+    assert missing_semicolon["ok"] is False
+    assert missing_semicolon["error"] == "ValueError: Unexpected end of file after '}'"
+    assert missing_brace["error"].startswith("ValueError: Unexpected end of file")
+    assert still_up["ok"]
+
+
+def test_shutdown():
+    """
+    Test that a shutdown request stops the server, and that closing it removes the socket.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        socket_path = Path(directory) / "server.sock"
+        with CompileServer(socket_path) as server:
+            thread = threading.Thread(target=server.serve_forever)
+            thread.start()
+            with CompileClient(socket_path) as client:
+                assert client.request(shutdown=True) == {"ok": True}
+            thread.join(timeout=5)
+            assert not thread.is_alive()
+        assert not socket_path.exists()
+
+
+def test_stale_socket():
+    """
+    Test that a socket left behind by a server that didn't close is replaced, but any other file at the path is kept.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        socket_path = Path(directory) / "server.sock"
+        CompileServer(socket_path).socket.close()
+        assert socket_path.exists()
+        with CompileServer(socket_path) as server:
+            thread = threading.Thread(target=server.serve_forever)
+            thread.start()
+            with CompileClient(socket_path) as client:
+                assert client.request(shutdown=True) == {"ok": True}
+            thread.join(timeout=5)
+
+        regular_file = Path(directory) / "notes.txt"
+        regular_file.write_text("keep me")
+        with pytest.raises(FileExistsError, match="isn't a socket"):
+            CompileServer(regular_file)
+        assert regular_file.read_text() == "keep me"
+
+
+def test_compile_tokenizer():
+    """
+    Test compiling a tokenizer straight to a string.
+    """
+    output = compile_tokenizer(Tokenizer(INPUT_DIR / "ArrayTest" / "Main.jack"), "vm")
+    assert output.startswith("function Main.main 4\n")
@@ -0,0 +1,98 @@
+"""
+The test suite for constant folding
+"""
+import io
+
+import pytest
+
+from src.code_generator import VmSink
+from src.compilation_engine import CompilationEngine
+from src.constant_folder import ConstantFolder, evaluate, to_int16
+from src.tokenizer import Tokenizer
+
+
+@pytest.fixture
+def setup_resources():
+    """
+    Provides a function that compiles `return <expression>;` with folding and returns the body's VM commands and the
+    number of operations removed.
+    """
+    def compile_expression(expression: str) -> tuple[list[str], int]:
+        source = f"class Test {{ function int f(int x) {{ return {expression}; }} }}"
+        stream = io.StringIO()
+        folder = ConstantFolder()
+        CompilationEngine(Tokenizer.from_source(source), VmSink(stream, folder=folder)).compile_class()
+        return stream.getvalue().splitlines()[1:-1], folder.removed
+
+    yield {
+        "compile": compile_expression,
+    }
+
+
+@pytest.mark.parametrize("op, left, right, expected", [
+    ("+", 32767, 1, -32768), ("-", 0, 5, -5), ("*", 300, 300, 24464), ("/", -7, 2, -3), ("/", 7, -2, -3),
+    ("/", 1, 0, None), ("&", 12, 10, 8), ("|", 12, 10, 14), ("<", -1, 0, -1), (">", -1, 0, 0), ("=", 3, 3, -1),
+])
+def test_evaluate(op, left, right, expected):
+    """
+    Test 16-bit arithmetic, truncating division and comparisons, and that division by zero isn't folded.
+    """
+    assert evaluate(op, left, right) == expected
+
+
+def test_to_int16():
+    """
+    Test wrapping to signed 16-bit values.
+    """
+    assert [to_int16(value) for value in (65535, 32768, -32769, 70000)] == [-1, -32768, 32767, 4464]
+
+
+@pytest.mark.parametrize("expression, commands, removed", [
+    ("2 * 16 + 1", ["push constant 33"], 2),
+    ("2 * 16 + 1 + x", ["push constant 33", "push argument 0", "add"], 2),
+    ("x + 2 * 16", ["push argument 0", "push constant 2", "add", "push constant 16", "call Math.multiply 2"], 0),
+    ("3 - 5", ["push constant 2", "neg"], 0),
+    ("(3 - 5) * 2", ["push constant 4", "neg"], 1),
+    ("-(-7)", ["push constant 7"], 2),
+    ("~~x", ["push argument 0"], 2),
+    ("-(-x)", ["push argument 0"], 2),
+    ("x * 1 + 0 - 0", ["push argument 0"], 3),
+    ("0 + x", ["push argument 0"], 1),
+    ("1 * (x)", ["push argument 0"], 1),
+    ("~true", ["push constant 0"], 2),
+    ("x / 0", ["push argument 0", "push constant 0", "call Math.divide 2"], 0),
+    ("5 / 0", ["push constant 5", "push constant 0", "call Math.divide 2"], 0),
+    ("32767 + 1", ["push constant 32767", "push constant 1", "add"], 0),
+    ("1 < 2", ["push constant 1", "neg"], 0),
+])
+def test_folding(setup_resources, expression, commands, removed):
+    """
+    Test that leading constants are folded left to right, identities are removed, and what mustn't fold doesn't.
+    """
+    assert setup_resources["compile"](expression) == (commands, removed)
+
+
+def test_nested_expressions(setup_resources):
+    """
+    Test that expressions inside array indexes and call arguments are folded too.
+    """
+    commands, removed = setup_resources["compile"]("Math.max(x, 4 * 4) + x[2 - 1]")
+
+    assert commands == [
+        "push argument 0", "push constant 16", "call Math.max 2",
+        "push argument 0", "push constant 1", "add", "pop pointer 1", "push that 0",
+        "add",
+    ]
+    assert removed == 2
+
+
+@pytest.mark.parametrize("expression, commands, removed", [
+    ("(" * 10_000 + "2 * 3" + ")" * 10_000, ["push constant 6"], 1),
+    ("- ~" * 5_000 + " 5", ["push constant 5005"], 10_000),
+    ("- -" * 5_000 + " x", ["push argument 0"], 10_000),
+], ids=["parentheses", "unary ops", "double negation"])
+def test_deeply_nested_folding(setup_resources, expression, commands, removed):
+    """
+    Test that expressions and unary chains nested far deeper than the recursion limit are folded.
+    """
+    assert setup_resources["compile"](expression) == (commands, removed)
@@ -0,0 +1,46 @@
+"""
+The test suite for the synthetic benchmark corpus generator
+"""
+import pytest
+
+from benchmarks.corpus import CorpusOptions, generate_class, write_corpus
+from src.compilation_engine import CompilationEngine
+from src.tokenizer import Tokenizer
+
+
+def test_generation_is_deterministic():
+    """
+    Test that the same seed and options always give the same source, and another seed gives different source.
+    """
+    options = CorpusOptions(subroutines=3, statements=5)
+    assert generate_class("A", options, seed=7) == generate_class("A", options, seed=7)
+    assert generate_class("A", options, seed=7) != generate_class("A", options, seed=8)
+
+
+def test_options_scale_output():
+    """
+    Test that the size options actually grow the generated class.
+    """
+    small = generate_class("A", CorpusOptions(subroutines=2, statements=5))
+    large = generate_class("A", CorpusOptions(subroutines=8, statements=20))
+    assert small.count("run") == 2
+    assert large.count("run") == 8
+    assert len(large) > 4 * len(small)
+
+
+@pytest.mark.parametrize("options", [CorpusOptions(subroutines=3),
+                                     CorpusOptions(subroutines=2, expression_depth=12, statement_depth=4),
+                                     CorpusOptions(subroutines=3, comment_lines=50, fields=0),
+                                     CorpusOptions(subroutines=2, fields=40, locals=40)])
+def test_generated_classes_parse(tmp_path, options):
+    """
+    Test that generated classes parse completely, with every token ending up in the parse tree.
+    """
+    for jack_file in write_corpus(tmp_path, 2, options):
+        tokenizer = Tokenizer(jack_file)
+        compiler = CompilationEngine(tokenizer)
+        compiler.compile_class()
+
+        terminals = [element for element in compiler.root.iter() if element.text is not None]
+        assert tokenizer.has_more_tokens() is False
+        assert len(terminals) == tokenizer.token_index + 1
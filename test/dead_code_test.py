@@ -0,0 +1,79 @@
+"""
+The test suite for dead code elimination
+"""
+import io
+
+import pytest
+
+from src.code_generator import VmSink
+from src.compilation_engine import CompilationEngine
+from src.dead_code import DeadCodeEliminator, call_graph, reachable, split_functions
+from src.tokenizer import Tokenizer
+
+
+@pytest.fixture
+def setup_resources(tmp_path):
+    """
+    Writes a small two-class program as .vm files.
+    """
+    main_vm = tmp_path / "Main.vm"
+    main_vm.write_text("function Main.main 0\ncall Util.used 0\npop temp 0\npush constant 0\nreturn\n"
+                       "function Main.unused 0\ncall Util.onlyFromUnused 0\nreturn\n")
+    util_vm = tmp_path / "Util.vm"
+    util_vm.write_text("function Util.used 0\ncall Util.recurse 0\ncall Output.println 0\nreturn\n"
+                       "function Util.recurse 0\ncall Util.recurse 0\nreturn\n"
+                       "function Util.onlyFromUnused 0\npush constant 0\nreturn\n")
+    yield {
+        "main_vm": main_vm,
+        "util_vm": util_vm,
+    }
+
+
+def test_call_graph(setup_resources):
+    """
+    Test that functions are split out and their calls collected, with OS calls left outside the graph.
+    """
+    functions = split_functions(setup_resources["util_vm"].read_text().splitlines())
+    graph = call_graph(functions)
+
+    assert list(functions) == ["Util.used", "Util.recurse", "Util.onlyFromUnused"]
+    assert graph["Util.used"] == {"Util.recurse", "Output.println"}
+    assert reachable(graph, ["Util.used"]) == {"Util.used", "Util.recurse"}
+
+
+def test_prune_program(setup_resources):
+    """
+    Test that functions unreachable from Main.main are removed, including ones only called by other dead code.
+    """
+    dead_code = DeadCodeEliminator()
+
+    assert dead_code.prune_program([setup_resources["main_vm"], setup_resources["util_vm"]])
+    assert sorted(dead_code.subroutines) == ["Main.unused", "Util.onlyFromUnused"]
+    assert "Main.unused" not in setup_resources["main_vm"].read_text()
+    assert setup_resources["util_vm"].read_text().splitlines()[-1] == "return"
+    assert "function Util.recurse 0" in setup_resources["util_vm"].read_text()
+
+
+def test_library_is_left_alone(setup_resources):
+    """
+    Test that a program without Main.main isn't pruned at all.
+    """
+    before = setup_resources["util_vm"].read_text()
+
+    assert not DeadCodeEliminator().prune_program([setup_resources["util_vm"]])
+    assert setup_resources["util_vm"].read_text() == before
+
+
+def test_statements_after_return():
+    """
+    Test that statements after a return are dropped, in nested statement lists too.
+    """
+    tokenizer = Tokenizer.from_source("class Test { function int f(int x) { if (x) { return 1; let x = 2; do g(); } "
+                                      "return x; let x = 3; } }")
+    stream = io.StringIO()
+    dead_code = DeadCodeEliminator()
+    CompilationEngine(tokenizer, VmSink(stream, dead_code=dead_code)).compile_class()
+
+    assert dead_code.statements == 3
+    assert "push constant 2" not in stream.getvalue() and "push constant 3" not in stream.getvalue()
+    assert stream.getvalue().splitlines()[-2:] == ["push argument 0", "return"]
@@ -0,0 +1,363 @@
+"""
+The test suite for the jack_analyzer command line driver
+"""
+from pathlib import Path
+import sys
+
+import pytest
+
+import jack_analyzer
+from src.token_stream import TokenFileTokenizer
+from src.tokenizer import Tokenizer
+
+INPUT_DIR: Path = Path(__file__).parent.parent / "input"
+
+
+@pytest.fixture
+def setup_resources(tmp_path, monkeypatch):
+    """
+    Runs each test from an empty directory so output/ is written there, with a copy of the square sources.
+    """
+    source_dir = tmp_path / "square"
+    source_dir.mkdir()
+    for jack_file in (INPUT_DIR / "full_tests" / "square").glob("*.jack"):
+        (source_dir / jack_file.name).write_text(jack_file.read_text())
+    monkeypatch.chdir(tmp_path)
+    yield {
+        "source_dir": source_dir,
+        "monkeypatch": monkeypatch,
+    }
+
+
+def run_main(setup_resources, *args):
+    """
+    Runs jack_analyzer.main with the given command line arguments.
+    """
+    setup_resources["monkeypatch"].setattr(sys, "argv", ["jack_analyzer.py", *map(str, args)])
+    jack_analyzer.main()
+
+
+def test_check_files_sorted(setup_resources):
+    """
+    Test that the files from a directory come back in a stable, sorted order.
+    """
+    files = jack_analyzer.check_files(setup_resources["source_dir"])
+    assert [file.name for file in files] == ["Main.jack", "Square.jack", "SquareGame.jack"]
+
+
+def test_compile_file_error(setup_resources):
+    """
+    Test that compile_file reports a lexing error instead of raising it.
+    """
+    bad_file = setup_resources["source_dir"] / "Bad.jack"
+    bad_file.write_text("class Bad { # }")
+    jack_file, output_file, elapsed, error, statistics = jack_analyzer.compile_file(bad_file)
+
+    assert jack_file == bad_file
+    assert error.startswith("ValueError")
+    assert not output_file.exists()
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_main_jobs(setup_resources, capsys, jobs):
+    """
+    Test that a directory compiles to the expected XML with one or several worker processes,
+    and that results are reported in file order either way.
+    """
+    run_main(setup_resources, setup_resources["source_dir"], "--jobs", jobs)
+
+    for name in ["Main", "Square", "SquareGame"]:
+        expected = (INPUT_DIR / "full_tests" / "square" / f"{name}.xml").read_text()
+        assert Path("output", "square", f"{name}.xml").read_text() == expected
+
+    report = [line for line in capsys.readouterr().out.splitlines() if " -> " in line]
+    assert [Path(line.split(" -> ")[0]).name for line in report] == ["Main.jack", "Square.jack", "SquareGame.jack"]
+
+
+def test_main_reports_failures(setup_resources, capsys):
+    """
+    Test that a file that fails to compile is reported on stderr and makes the build exit with an error.
+    """
+    (setup_resources["source_dir"] / "Bad.jack").write_text("class Bad { # }")
+    with pytest.raises(SystemExit):
+        run_main(setup_resources, setup_resources["source_dir"], "-j", 2)
+
+    assert "Bad.jack: ValueError" in capsys.readouterr().err
+    assert Path("output", "square", "Main.xml").exists()
+
+
+def test_main_cache(setup_resources, capsys):
+    """
+    Test that a second build reuses every output from the cache, and --no-cache compiles everything again.
+    """
+    run_main(setup_resources, setup_resources["source_dir"])
+    assert "Cache: 0 hits, 3 misses" in capsys.readouterr().out
+
+    Path("output", "square", "Main.xml").unlink()
+    run_main(setup_resources, setup_resources["source_dir"])
+    out = capsys.readouterr().out
+    assert "Cache: 3 hits, 0 misses" in out
+    assert out.count("(cached)") == 3
+    expected = (INPUT_DIR / "full_tests" / "square" / "Main.xml").read_text()
+    assert Path("output", "square", "Main.xml").read_text() == expected
+
+    run_main(setup_resources, setup_resources["source_dir"], "--no-cache")
+    out = capsys.readouterr().out
+    assert "(cached)" not in out and "Cache:" not in out
+
+
+def test_main_check_only(setup_resources, capsys):
+    """
+    Test that --check parses every file without writing output or touching the cache.
+    """
+    run_main(setup_resources, setup_resources["source_dir"], "--check")
+
+    out = capsys.readouterr().out
+    assert out.count(": OK (") == 3
+    assert not Path("output").exists()
+    assert not Path(".jack_cache").exists()
+
+
+def test_main_check_incomplete(setup_resources, capsys):
+    """
+    Test that --check reports a file whose last statement has no ';' and exits with an error, instead of hanging.
+    """
+    (setup_resources["source_dir"] / "Bad.jack").write_text("class Bad { function void f() { let x = 1 } }")
+    with pytest.raises(SystemExit):
+        run_main(setup_resources, setup_resources["source_dir"], "--check")
+
+    captured = capsys.readouterr()
+    assert "Bad.jack: ValueError: Unexpected end of file after '}'" in captured.err
+    assert captured.out.count(": OK (") == 3
+
+
+def test_main_profile(setup_resources, capsys, tmp_path):
+    """
+    Test that --profile prints per-file phase times and a method table, and writes collapsed stacks on request.
+    """
+    collapsed = tmp_path / "stacks.txt"
+    run_main(setup_resources, setup_resources["source_dir"], "--no-cache", "--profile-collapsed", collapsed)
+
+    out = capsys.readouterr().out
+    assert out.count("compile ") >= 3
+    assert "compile_class" in out and "advance" in out
+    assert "Main.jack;compile;compile_class" in collapsed.read_text()
+
+
+def test_main_profile_pstats(setup_resources, capsys, tmp_path):
+    """
+    Test that --profile-pstats writes a stats file that pstats can load, compiling in a single job.
+    """
+    import pstats
+    stats_file = tmp_path / "build.pstats"
+    run_main(setup_resources, setup_resources["source_dir"], "--no-cache", "--jobs", 2, "--profile-pstats", stats_file)
+
+    assert "using 1 job." in capsys.readouterr().out
+    assert pstats.Stats(str(stats_file)).total_calls > 0
+
+
+def test_main_vm(setup_resources, capsys):
+    """
+    Test that --vm writes .vm files instead of XML and caches them separately from the XML.
+    """
+    run_main(setup_resources, setup_resources["source_dir"], "--vm")
+
+    assert Path("output", "square", "Square.vm").read_text().startswith("function Square.new 0\n")
+    assert not Path("output", "square", "Square.xml").exists()
+
+    run_main(setup_resources, setup_resources["source_dir"])
+    run_main(setup_resources, setup_resources["source_dir"], "--vm")
+    assert capsys.readouterr().out.count("(cached)") == 3
+
+
+def test_main_mmap(setup_resources):
+    """
+    Test that --mmap writes the same XML and VM code as reading the files normally.
+    """
+    outputs = {}
+    for extra in ((), ("--mmap",)):
+        for kind in ("xml", "vm"):
+            run_main(setup_resources, setup_resources["source_dir"], "--no-cache", *extra,
+                     *(("--vm",) if kind == "vm" else ()))
+            outputs[extra, kind] = sorted((path.name, path.read_text()) for path in Path("output", "square").glob(f"*.{kind}"))
+
+    assert outputs[(), "xml"] == outputs[("--mmap",), "xml"] and len(outputs[(), "xml"]) == 3
+    assert outputs[(), "vm"] == outputs[("--mmap",), "vm"] and len(outputs[(), "vm"]) == 3
+
+
+def test_main_token_stream(setup_resources):
+    """
+    Test that --token-stream writes .jtok files that load back into the same tokens.
+    """
+    run_main(setup_resources, setup_resources["source_dir"], "--token-stream")
+
+    token_file = Path("output", "square", "Square.jtok")
+    tokenizer = TokenFileTokenizer(token_file)
+    expected = Tokenizer(setup_resources["source_dir"] / "Square.jack")
+    while expected.has_more_tokens():
+        assert tokenizer.advance() == expected.advance()
+    assert tokenizer.has_more_tokens() is False
+    tokenizer.close()
+
+
+def test_main_optimize(setup_resources, capsys):
+    """
+    Test that --optimize reports what it removed and is cached separately from unoptimized VM code.
+    """
+    (setup_resources["source_dir"] / "Const.jack").write_text(
+        "class Const { function int f() { return 2 * 16 + 1; } }")
+    run_main(setup_resources, setup_resources["source_dir"], "--vm", "-O")
+
+    out = capsys.readouterr().out
+    assert "Const.vm (" in out and "2 operations folded, 0 commands removed)" in out
+    assert "Constant folding removed 2 operations; the peephole optimizer removed " in out
+    assert Path("output", "square", "Const.vm").read_text() == "function Const.f 0\npush constant 33\nreturn\n"
+
+    run_main(setup_resources, setup_resources["source_dir"], "--vm")
+    assert "(cached)" not in capsys.readouterr().out
+
+
+def test_main_tokens(setup_resources):
+    """
+    Test that --tokens writes <name>T.xml files identical to the Jack test files.
+    """
+    run_main(setup_resources, setup_resources["source_dir"], "--tokens")
+
+    for name in ("Main", "Square", "SquareGame"):
+        expected = (INPUT_DIR / "full_tests" / "square" / f"{name}T.xml").read_text()
+        assert Path("output", "square", f"{name}T.xml").read_text() == expected
+
+
+def test_outputs_exclusive(setup_resources):
+    """
+    Test that only one of --vm, --tokens and --token-stream can be given.
+    """
+    with pytest.raises(SystemExit):
+        run_main(setup_resources, setup_resources["source_dir"], "--vm", "--tokens")
+
+
+def test_optimize_needs_vm(setup_resources):
+    """
+    Test that --optimize without --vm is rejected.
+    """
+    with pytest.raises(SystemExit):
+        run_main(setup_resources, setup_resources["source_dir"], "--optimize")
+
+
+def test_main_prune(setup_resources, capsys):
+    """
+    Test that --prune removes the square program's uncalled Main.more, and leaves files alone if a file fails.
+    """
+    run_main(setup_resources, setup_resources["source_dir"], "--vm", "--prune")
+
+    assert "Removed 1 unreachable subroutines: Main.more" in capsys.readouterr().out
+    assert "Main.more" not in Path("output", "square", "Main.vm").read_text()
+
+    (setup_resources["source_dir"] / "Bad.jack").write_text("class Bad { # }")
+    with pytest.raises(SystemExit):
+        run_main(setup_resources, setup_resources["source_dir"], "--vm", "--prune")
+    assert "program didn't compile completely" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("options", [("--vm",), ("--vm", "-O")])
+def test_main_deeply_nested(setup_resources, options):
+    """
+    Test that VM code, optimized or not, is generated for parentheses nested far deeper than the recursion limit.
+    """
+    program_dir = setup_resources["source_dir"].parent / "deep"
+    program_dir.mkdir()
+    depth = 10_000
+    (program_dir / "Main.jack").write_text(
+        f"class Main {{ function int main() {{ return {'(' * depth}1 + 2{')' * depth}; }} }}")
+
+    run_main(setup_resources, program_dir, *options)
+
+    commands = Path("output", "deep", "Main.vm").read_text().splitlines()
+    if "-O" in options:
+        assert commands == ["function Main.main 0", "push constant 3", "return"]
+    else:
+        assert commands == ["function Main.main 0", "push constant 1", "push constant 2", "add", "return"]
+
+
+def test_main_watch(setup_resources, capsys):
+    """
+    Test that --watch recompiles a file edited after the first build, reports the latency and stops on Ctrl+C.
+    """
+    main_file = setup_resources["source_dir"] / "Main.jack"
+    polls = []
+
+    def sleep(seconds):
+        polls.append(seconds)
+        if len(polls) == 1:
+            main_file.write_text(main_file.read_text().replace("game.run();", "game.run(); do game.run();"))
+        elif len(polls) == 3:
+            raise KeyboardInterrupt
+
+    setup_resources["monkeypatch"].setattr(jack_analyzer.time, "sleep", sleep)
+    run_main(setup_resources, setup_resources["source_dir"], "--watch", "--poll-interval", 0.01)
+
+    out = capsys.readouterr().out
+    assert out.count("Main.jack -> ") == 2 and out.count("Square.jack -> ") == 1
+    assert "Rebuilt 1/1 changed files; save to output took" in out
+    assert out.rstrip().endswith("Stopped watching.")
+    assert Path("output", "square", "Main.xml").read_text().count("> run <") == 2
+
+
+def test_main_watch_incomplete_save(setup_resources, capsys):
+    """
+    Test that --watch reports a file saved halfway through an edit, ending in a statement with no ';', and keeps
+    watching until the file is fixed.
+    """
+    main_file = setup_resources["source_dir"] / "Main.jack"
+    original = main_file.read_text()
+    polls = []
+
+    def sleep(seconds):
+        polls.append(seconds)
+        if len(polls) == 1:
+            main_file.write_text(original[:original.index("game.run();") + len("game.run()")])
+        elif len(polls) == 2:
+            main_file.write_text(original.replace("game.run();", "game.run(); do game.run();"))
+        elif len(polls) == 3:
+            raise KeyboardInterrupt
+
+    setup_resources["monkeypatch"].setattr(jack_analyzer.time, "sleep", sleep)
+    run_main(setup_resources, setup_resources["source_dir"], "--watch", "--poll-interval", 0.01)
+
+    captured = capsys.readouterr()
+    assert "Main.jack: ValueError: Unexpected end of file after ')'" in captured.err
+    assert "Rebuilt 0/1 changed files." in captured.out
+    assert "Rebuilt 1/1 changed files; save to output took" in captured.out
+    assert captured.out.rstrip().endswith("Stopped watching.")
+    assert Path("output", "square", "Main.xml").read_text().count("> run <") == 2
+
+
+@pytest.mark.parametrize("cache_args", [(), ("--no-cache",)])
+def test_main_watch_prune(setup_resources, capsys, cache_args):
+    """
+    Test that --watch --prune brings back a subroutine that an edit made reachable again, whether the unchanged files
+    are restored from the build cache or recompiled.
+    """
+    program_dir = setup_resources["source_dir"].parent / "program"
+    program_dir.mkdir()
+    main_file = program_dir / "Main.jack"
+    main_file.write_text("class Main { function void main() { do A.g(); return; } }")
+    (program_dir / "A.jack").write_text("class A { function void f() { return; } function void g() { return; } }")
+    polls = []
+
+    def sleep(seconds):
+        polls.append(seconds)
+        if len(polls) == 1:
+            main_file.write_text(main_file.read_text().replace("A.g()", "A.f()"))
+        elif len(polls) == 3:
+            raise KeyboardInterrupt
+
+    setup_resources["monkeypatch"].setattr(jack_analyzer.time, "sleep", sleep)
+    run_main(setup_resources, program_dir, "--vm", "--prune", "--watch", "--poll-interval", 0.01, *cache_args)
+
+    out = capsys.readouterr().out
+    assert "Removed 1 unreachable subroutines: A.f" in out
+    assert "Removed 1 unreachable subroutines: A.g" in out
+    a_vm = Path("output", "program", "A.vm").read_text()
+    assert "function A.f" in a_vm and "function A.g" not in a_vm
+    assert "call A.f" in Path("output", "program", "Main.vm").read_text()
@@ -0,0 +1,109 @@
+"""
+The test suite for the compact parse tree
+"""
+from pathlib import Path
+
+import pytest
+
+from src.compilation_engine import CompilationEngine
+from src.jack_ast import AstSink, NonTerminal, replay, to_xml
+from src.output_sink import OutputSink
+from src.tokenizer import Tokenizer, RegexTokenizer
+
+INPUT_DIR: Path = Path(__file__).parent.parent / "input"
+
+
+class CountingSink(OutputSink):
+    """
+    Counts the events it receives and the deepest nesting seen.
+    """
+    def __init__(self):
+        self.depth = self.max_depth = self.terminals = 0
+
+    def start_nonterminal(self, tag: str):
+        self.depth += 1
+        self.max_depth = max(self.max_depth, self.depth)
+
+    def end_nonterminal(self, tag: str):
+        self.depth -= 1
+
+    def terminal(self, token_type: str, value: str, index: int):
+        self.terminals += 1
+
+
+@pytest.fixture
+def setup_resources(tmp_path):
+    """
+    Compiles a small class into a compact tree.
+    """
+    jack_file = tmp_path / "Small.jack"
+    jack_file.write_text('class Small { function void f() { do Output.printString("hi"); return; } }')
+    tokenizer = Tokenizer(jack_file)
+    compiler = CompilationEngine(tokenizer, AstSink())
+    compiler.compile_class()
+    yield {
+        "tokenizer": tokenizer,
+        "root": compiler.root,
+    }
+
+
+def test_terminals_are_token_indexes(setup_resources):
+    """
+    Test that the tree keeps token indexes for terminals rather than copies of the token text.
+    """
+    root = setup_resources["root"]
+    assert root.kind == "class"
+    assert root.children[:3] == [0, 1, 2]
+    subroutine = root.children[3]
+    assert subroutine.kind == "subroutineDec"
+    assert [child if isinstance(child, int) else child.kind for child in subroutine.children] == [
+        3, 4, 5, 6, "parameterList", 7, "subroutineBody"]
+    assert setup_resources["tokenizer"].token(5) == ("identifier", "f")
+
+
+def test_nodes_are_slotted(setup_resources):
+    """
+    Test that nodes have no per-instance dict and no parent pointer.
+    """
+    root = setup_resources["root"]
+    assert not hasattr(root, "__dict__")
+    assert NonTerminal.__slots__ == ("kind", "children")
+
+
+def test_string_constant_round_trip(setup_resources):
+    """
+    Test that serializing looks the string constant up in the token stream.
+    """
+    xml = to_xml(setup_resources["root"], setup_resources["tokenizer"])
+    assert "<stringConstant> hi </stringConstant>" in xml
+
+
+@pytest.mark.parametrize("jack_name", ["square/Main", "square/Square", "square/SquareGame", "ArrayTest/Main"])
+@pytest.mark.parametrize("tokenizer_class", [Tokenizer, RegexTokenizer])
+def test_to_xml_matches_golden_files(jack_name, tokenizer_class):
+    """
+    Test that the compact tree serializes to exactly the golden XML.
+    """
+    jack_file = INPUT_DIR / "full_tests" / f"{jack_name}.jack"
+    tokenizer = tokenizer_class(jack_file)
+    compiler = CompilationEngine(tokenizer, AstSink())
+    compiler.compile_class()
+
+    assert to_xml(compiler.root, tokenizer) == jack_file.with_suffix(".xml").read_text()
+
+
+def test_replay_deep_tree(setup_resources):
+    """
+    Test that replaying doesn't recurse, so trees deeper than the recursion limit serialize.
+    """
+    root = NonTerminal("class")
+    node = root
+    for _ in range(5000):
+        child = NonTerminal("term")
+        node.children.append(child)
+        node = child
+    node.children.append(0)
+
+    sink = CountingSink()
+    replay(root, setup_resources["tokenizer"], sink)
+    assert (sink.max_depth, sink.terminals, sink.depth) == (5001, 1, 0)
@@ -0,0 +1,118 @@
+"""
+The test suite for the compilation engine's output sinks
+"""
+import io
+from pathlib import Path
+
+import pytest
+
+import xml.etree.ElementTree as element_tree
+from src.compilation_engine import CompilationEngine
+from src.output_sink import ElementTreeSink, NullSink, OutputSink
+from src.tokenizer import Tokenizer
+from src.xml_writer import XmlStreamWriter
+
+INPUT_DIR: Path = Path(__file__).parent.parent / "input"
+
+
+class RecordingSink(OutputSink):
+    """
+    Records every event it receives.
+    """
+    def __init__(self):
+        self.events = []
+
+    def start_nonterminal(self, tag: str):
+        self.events.append(("start", tag))
+
+    def end_nonterminal(self, tag: str):
+        self.events.append(("end", tag))
+
+    def terminal(self, token_type: str, value: str, index: int):
+        self.events.append((token_type, value, index))
+
+
+@pytest.fixture
+def setup_resources(tmp_path):
+    """
+    Sets up a small class to compile.
+    """
+    jack_file = tmp_path / "Small.jack"
+    jack_file.write_text("class Small { function void f() { return; } }")
+    yield {
+        "jack_file": jack_file,
+    }
+
+
+def test_sink_is_abstract():
+    """
+    Test that a sink has to implement every event.
+    """
+    with pytest.raises(TypeError):
+        OutputSink()
+
+
+def test_events_nest_and_carry_token_index(setup_resources):
+    """
+    Test that the engine reports properly nested events with each token's stream index.
+    """
+    sink = RecordingSink()
+    CompilationEngine(Tokenizer(setup_resources["jack_file"]), sink).compile_class()
+
+    assert sink.events == [
+        ("start", "class"),
+        ("keyword", "class", 0), ("identifier", "Small", 1), ("symbol", "{", 2),
+        ("start", "subroutineDec"),
+        ("keyword", "function", 3), ("keyword", "void", 4), ("identifier", "f", 5), ("symbol", "(", 6),
+        ("start", "parameterList"), ("end", "parameterList"),
+        ("symbol", ")", 7),
+        ("start", "subroutineBody"),
+        ("symbol", "{", 8),
+        ("start", "statements"),
+        ("start", "returnStatement"), ("keyword", "return", 9), ("symbol", ";", 10), ("end", "returnStatement"),
+        ("end", "statements"),
+        ("symbol", "}", 11),
+        ("end", "subroutineBody"),
+        ("end", "subroutineDec"),
+        ("symbol", "}", 12),
+        ("end", "class"),
+    ]
+
+
+def test_element_tree_sink_is_default(setup_resources):
+    """
+    Test that the engine builds an ElementTree by default and exposes it as root.
+    """
+    compiler = CompilationEngine(Tokenizer(setup_resources["jack_file"]))
+    compiler.compile_class()
+
+    assert isinstance(compiler.sink, ElementTreeSink)
+    assert compiler.root.tag == "class"
+    assert compiler.root.find("subroutineDec/subroutineBody/statements/returnStatement/keyword").text == " return "
+
+
+def test_null_sink(setup_resources):
+    """
+    Test that a null sink parses without keeping anything.
+    """
+    compiler = CompilationEngine(Tokenizer(setup_resources["jack_file"]), NullSink())
+    compiler.compile_class()
+
+    assert compiler.root is None
+    assert compiler.tokenizer.has_more_tokens() is False
+
+
+@pytest.mark.parametrize("jack_name", ["square/Main", "square/Square", "square/SquareGame", "ArrayTest/Main"])
+def test_sinks_agree(jack_name):
+    """
+    Test that the ElementTree and streaming sinks describe the same parse.
+    """
+    jack_file = INPUT_DIR / "full_tests" / f"{jack_name}.jack"
+    compiler = CompilationEngine(Tokenizer(jack_file), ElementTreeSink())
+    compiler.compile_class()
+    element_tree.indent(compiler.root)
+
+    stream = io.StringIO()
+    CompilationEngine(Tokenizer(jack_file), XmlStreamWriter(stream)).compile_class()
+
+    assert stream.getvalue() == element_tree.tostring(compiler.root, encoding="unicode", short_empty_elements=False)
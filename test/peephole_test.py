@@ -0,0 +1,102 @@
+"""
+The test suite for the VM peephole optimizer
+"""
+import io
+
+import pytest
+
+from src.code_generator import VmSink
+from src.compilation_engine import CompilationEngine
+from src.peephole import PATTERNS, PeepholeOptimizer
+from src.tokenizer import Tokenizer
+
+
+@pytest.fixture
+def setup_resources():
+    """
+    Creates an optimizer with every pattern.
+    """
+    yield {
+        "optimizer": PeepholeOptimizer(),
+    }
+
+
+@pytest.mark.parametrize("commands, expected", [
+    (["push local 0", "pop local 0", "return"], ["return"]),
+    (["push argument 0", "not", "push local 1", "pop local 1", "not", "return"], ["push argument 0", "return"]),
+    (["push argument 0", "neg", "neg", "return"], ["push argument 0", "return"]),
+    (["push constant 0", "if-goto L", "return"], ["return"]),
+    (["push constant 0", "not", "if-goto L", "push constant 1", "label L", "return"], ["return"]),
+    (["push constant 5", "not", "if-goto L", "push constant 1", "label L", "return"], ["return"]),
+    (["return", "push constant 0", "return"], ["return"]),
+    (["goto L", "label L", "return"], ["return"]),
+])
+def test_patterns(setup_resources, commands, expected):
+    """
+    Test each pattern, including matches exposed by an earlier match and jumps left pointing at the next label.
+    """
+    assert setup_resources["optimizer"].optimize_function(commands) == expected
+
+
+def test_branches_on_values_are_kept(setup_resources):
+    """
+    Test that a branch on a computed value isn't inverted or removed, since not is bitwise.
+    """
+    commands = ["push argument 0", "not", "if-goto ELSE", "push constant 1", "return", "label ELSE",
+                "push constant 2", "return"]
+
+    assert setup_resources["optimizer"].optimize_function(list(commands)) == commands
+
+
+def test_thread_jumps(setup_resources):
+    """
+    Test that jumps to a goto go straight to its target, and the unused label is dropped.
+    """
+    commands = ["label LOOP", "push argument 0", "if-goto A", "push constant 1", "return", "label A", "goto LOOP"]
+
+    assert setup_resources["optimizer"].optimize_function(commands) == [
+        "label LOOP", "push argument 0", "if-goto LOOP", "push constant 1", "return",
+    ]
+
+
+def test_optimize_splits_functions(setup_resources):
+    """
+    Test that labels are treated as local to their function.
+    """
+    optimizer = setup_resources["optimizer"]
+    commands = ["function A.f 0", "goto L", "label L", "push constant 0", "return",
+                "function A.g 0", "label L", "push constant 0", "return"]
+
+    assert optimizer.optimize(commands) == ["function A.f 0", "push constant 0", "return",
+                                            "function A.g 0", "push constant 0", "return"]
+    assert optimizer.statistics == {"goto_next": 1, "unused_labels": 2}
+    assert optimizer.removed == 3
+
+
+def test_configurable_patterns():
+    """
+    Test that only the chosen patterns run and unknown names are rejected.
+    """
+    optimizer = PeepholeOptimizer(["double_not"])
+
+    assert optimizer.optimize_function(["not", "not", "push local 0", "pop local 0"]) == ["push local 0", "pop local 0"]
+    assert set(PATTERNS) > {"double_not"}
+    with pytest.raises(ValueError):
+        PeepholeOptimizer(["no_such_pattern"])
+
+
+def test_vm_sink(tmp_path):
+    """
+    Test that VmSink optimizes each subroutine before writing it.
+    """
+    jack_file = tmp_path / "Test.jack"
+    jack_file.write_text("class Test { function int f(int x) { if (x) { return 1; } else { return 2; } } }")
+    stream = io.StringIO()
+    optimizer = PeepholeOptimizer()
+    CompilationEngine(Tokenizer(jack_file), VmSink(stream, peephole=optimizer)).compile_class()
+
+    assert stream.getvalue().splitlines() == [
+        "function Test.f 0", "push argument 0", "not", "if-goto IF_ELSE0", "push constant 1", "return",
+        "label IF_ELSE0", "push constant 2", "return",
+    ]
+    assert optimizer.statistics == {"unreachable": 1, "unused_labels": 1}
@@ -0,0 +1,78 @@
+"""
+The test suite for the compile profiler
+"""
+from pathlib import Path
+import pickle
+
+import pytest
+
+from src.compilation_engine import CompilationEngine
+from src.output_sink import NullSink
+from src.profiler import Profiler
+from src.tokenizer import Tokenizer
+
+INPUT_DIR: Path = Path(__file__).parent.parent / "input"
+
+
+@pytest.fixture
+def setup_resources():
+    """
+    Profiles a compile of Square.jack.
+    """
+    profiler = Profiler("Square.jack")
+    engine = profiler.instrument(CompilationEngine(Tokenizer(INPUT_DIR / "full_tests" / "square" / "Square.jack"),
+                                                   NullSink()))
+    with profiler.phase("compile"):
+        engine.compile_class()
+    yield {
+        "profiler": profiler,
+        "engine": engine,
+    }
+
+
+def test_call_counts(setup_resources):
+    """
+    Test that every instrumented method is counted once per call.
+    """
+    methods = setup_resources["profiler"].methods
+
+    assert methods["compile_class"][1] == 1
+    assert methods["advance"][1] == methods["sink.terminal"][1]
+    assert methods["sink.start_nonterminal"][1] == methods["sink.end_nonterminal"][1]
+    assert methods["compile_expression"][1] > 0
+
+
+def test_self_times_add_up(setup_resources):
+    """
+    Test that method self times never exceed the phase they ran in, and match the collapsed stacks.
+    """
+    profiler = setup_resources["profiler"]
+    method_total = sum(seconds for seconds, calls in profiler.methods.values())
+
+    assert method_total <= profiler.phases["compile"][0]
+    assert sum(profiler.stacks.values()) == pytest.approx(profiler.phases["compile"][0])
+
+
+def test_collapsed_stacks(setup_resources):
+    """
+    Test that collapsed stacks nest methods under the file and phase frames.
+    """
+    lines = setup_resources["profiler"].collapsed_stacks().splitlines()
+
+    assert all(line.startswith("Square.jack;compile") for line in lines)
+    assert any(line.startswith("Square.jack;compile;compile_class;compile_subroutine;") for line in lines)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+
+
+def test_merge(setup_resources):
+    """
+    Test that merging a pickled profile doubles the counts.
+    """
+    profiler = setup_resources["profiler"]
+    merged = Profiler()
+    merged.merge(pickle.loads(pickle.dumps(profiler.to_dict())))
+    merged.merge(profiler)
+
+    assert merged.methods["compile_class"][1] == 2
+    assert merged.phases["compile"][1] == 2
+    assert "compile_expression" in merged.report()
@@ -0,0 +1,98 @@
+"""
+The test suite for the symbol table
+"""
+import sys
+
+import pytest
+
+from src.symbol_table import SymbolTable
+
+
+@pytest.fixture
+def setup_resources():
+    """
+    Creates a table with two fields, a static and one subroutine's variables.
+    """
+    symbols = SymbolTable()
+    symbols.define("x", "int", "field")
+    symbols.define("y", "int", "field")
+    symbols.define("count", "int", "static")
+    symbols.start_subroutine()
+    symbols.define("this", "Point", "arg")
+    symbols.define("other", "Point", "arg")
+    symbols.define("x", "boolean", "var")
+    yield {
+        "symbols": symbols,
+    }
+
+
+def test_indexes_per_kind(setup_resources):
+    """
+    Test that each kind is numbered separately from 0.
+    """
+    symbols = setup_resources["symbols"]
+
+    assert symbols.index_of("y") == 1
+    assert symbols.index_of("count") == 0
+    assert symbols.index_of("other") == 1
+    assert symbols.var_count("field") == 2
+    assert symbols.var_count("arg") == 2
+
+
+def test_subroutine_scope_shadows_class_scope(setup_resources):
+    """
+    Test that a local variable hides a field of the same name.
+    """
+    symbols = setup_resources["symbols"]
+
+    symbol = symbols.lookup("x")
+    assert (symbol.type, symbol.kind, symbol.index, symbol.segment) == ("boolean", "var", 0, "local")
+    assert symbols.kind_of("y") == "field"
+    assert symbols.type_of("other") == "Point"
+
+
+def test_start_subroutine(setup_resources):
+    """
+    Test that starting a subroutine forgets the previous one's variables but keeps the class's.
+    """
+    symbols = setup_resources["symbols"]
+    symbols.start_subroutine()
+
+    assert symbols.kind_of("other") is None
+    assert symbols.var_count("arg") == 0
+    assert symbols.lookup("x").segment == "this"
+
+
+def test_errors(setup_resources):
+    """
+    Test that redefinitions, unknown kinds and unknown names are rejected.
+    """
+    symbols = setup_resources["symbols"]
+
+    with pytest.raises(ValueError):
+        symbols.define("other", "int", "var")
+    with pytest.raises(ValueError):
+        symbols.define("z", "int", "local")
+    with pytest.raises(KeyError):
+        symbols.index_of("missing")
+
+
+def test_clear(setup_resources):
+    """
+    Test that clear empties both scopes and restarts every kind's numbering.
+    """
+    symbols = setup_resources["symbols"]
+    symbols.clear()
+
+    assert symbols.lookup("y") is None and symbols.lookup("other") is None
+    assert symbols.define("z", "int", "field").index == 0
+
+
+def test_names_interned(setup_resources):
+    """
+    Test that defined names are interned, so lookups with an interned identifier hit by identity.
+    """
+    symbols = setup_resources["symbols"]
+    name = "".join(["co", "unt"])
+
+    assert symbols.lookup(name).name is sys.intern(name)
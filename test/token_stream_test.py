@@ -0,0 +1,117 @@
+"""
+The test suite for the binary token stream format
+"""
+from array import array
+import io
+from pathlib import Path
+import struct
+import sys
+
+import pytest
+
+from src.compilation_engine import CompilationEngine
+from src.token_stream import HEADER, TokenFileTokenizer, encode_tokens, write_tokens
+from src.tokenizer import MmapTokenizer, Tokenizer
+from src.xml_writer import XmlStreamWriter
+
+INPUT_DIR: Path = Path(__file__).parent.parent / "input"
+
+
+def compile_xml(tokenizer: Tokenizer) -> str:
+    """
+    Returns the parse tree XML of the class in tokenizer.
+    """
+    stream = io.StringIO()
+    CompilationEngine(tokenizer, XmlStreamWriter(stream)).compile_class()
+    return stream.getvalue()
+
+
+@pytest.mark.parametrize("name", ["Main", "Square", "SquareGame"])
+def test_round_trip(tmp_path, name):
+    """
+    Test that a saved token stream compiles to the same XML as its source.
+    """
+    jack_file = INPUT_DIR / "10" / "Square" / f"{name}.jack"
+    token_file = tmp_path / f"{name}.jtok"
+    write_tokens(MmapTokenizer(jack_file), token_file)
+
+    with TokenFileTokenizer(token_file) as tokenizer:
+        assert compile_xml(tokenizer) == compile_xml(Tokenizer(jack_file))
+
+
+def test_layout():
+    """
+    Test the header, the fixed-width records and that each distinct value is stored once in the string table.
+    """
+    data = encode_tokens(Tokenizer.from_source('let x = x + "é";'))
+
+    assert HEADER.unpack_from(data) == (b"JTOK", 1, 0, 7, 9)
+    records = struct.unpack_from("<21I", data, HEADER.size)
+    assert records[:6] == (0, 0, 3, 2, 3, 1)
+    assert records[9:12] == records[3:6]
+    assert data[HEADER.size + 84:] == 'letx=+é;'.encode("utf-8")
+
+
+def test_big_endian(monkeypatch):
+    """
+    Test the byte swapping a big-endian machine does. Pretending to be one here swaps the records on the way out and
+    again on the way in, so they come back as the same tokens.
+    """
+    source = 'do f("hi", 1);'
+    little = encode_tokens(Tokenizer.from_source(source))
+    expected = [TokenFileTokenizer("<memory>", little).token(index) for index in range(8)]
+    monkeypatch.setattr(sys, "byteorder", "big")
+    big = encode_tokens(Tokenizer.from_source(source))
+
+    swapped = array("I", little[HEADER.size:HEADER.size + 96])
+    swapped.byteswap()
+    assert big[HEADER.size:HEADER.size + 96] == swapped.tobytes()
+    assert [TokenFileTokenizer("<memory>", big).token(index) for index in range(8)] == expected
+
+
+def test_buffer(tmp_path):
+    """
+    Test loading from a buffer in memory, reading tokens in any order, and replacing the stream with source text.
+    """
+    tokenizer = TokenFileTokenizer("<memory>", encode_tokens(Tokenizer.from_source('do f("hi", 1);')))
+
+    assert tokenizer.token(3) == ("stringConstant", "hi")
+    assert tokenizer.peek(2) == ("identifier", "f")
+    assert [tokenizer.advance() for _ in range(2)] == [("keyword", "do"), ("identifier", "f")]
+    assert tokenizer.has_more_tokens() is True
+
+    tokenizer.open_file = "return;"
+    assert tokenizer.advance() == ("keyword", "return")
+
+    empty = TokenFileTokenizer("<memory>", encode_tokens(Tokenizer.from_source("")))
+    assert empty.has_more_tokens() is False
+    with pytest.raises(ValueError, match="Unexpected end of file"):
+        empty.advance()
+
+
+@pytest.mark.parametrize("data, message", [
+    (b"JTOK", "too short"),
+    (HEADER.pack(b"XML!", 1, 0, 0, 0), "not a token stream"),
+    (HEADER.pack(b"JTOK", 2, 0, 0, 0), "format version 2"),
+    (HEADER.pack(b"JTOK", 1, 0, 1, 0), "truncated"),
+])
+def test_invalid(data, message):
+    """
+    Test that buffers that aren't a complete token stream are rejected.
+    """
+    with pytest.raises(ValueError, match=message):
+        TokenFileTokenizer("<memory>", data)
+
+
+def test_close(tmp_path):
+    """
+    Test that closing a mapped token file releases it, even after tokens were read.
+    """
+    token_file = tmp_path / "Test.jtok"
+    write_tokens(Tokenizer.from_source("class Test { }"), token_file)
+    tokenizer = TokenFileTokenizer(token_file)
+    tokenizer.advance()
+    tokenizer.close()
+
+    assert tokenizer._map.closed
+    assert tokenizer.has_more_tokens() is False
@@ -1,10 +1,15 @@
 """
 The test suite for the Jack tokenizer
 """
+import io
 from pathlib import Path
+import xml.etree.ElementTree as et
+
 import pytest
 
-from src.tokenizer import Tokenizer
+from src.tokenizer import KIND_CODES, KIND_VALUES, MmapTokenizer, Tokenizer, RegexTokenizer
+
+INPUT_DIR: Path = Path(__file__).parent.parent / "input"
 
 @pytest.fixture
 def setup_resources():
@@ -340,5 +345,249 @@ def test_multiple_tokens(setup_resources):
     assert tokens == expected
 
 
+@pytest.fixture
+def regex_resources():
+    """
+    Sets up a regex tokenizer on a file relative to the repository.
+    """
+    tokenizer = RegexTokenizer(INPUT_DIR / "ArrayTest" / "Main.jack")
+    yield {
+        "tokenizer": tokenizer,
+    }
+
+
+def collect_tokens(tokenizer) -> list[tuple[str, str]]:
+    """
+    Runs a tokenizer to the end and returns every (type, value) pair.
+    """
+    tokens = []
+    while tokenizer.has_more_tokens():
+        tokenizer.advance()
+        tokens.append((tokenizer.token_type(), tokenizer.current_token_value))
+    return tokens
+
+
+def golden_tokens(token_file: Path) -> list[tuple[str, str]]:
+    """
+    Returns the (type, value) pairs in a *T.xml token file from the Jack test suite.
+    Each value is written with one space on either side, and the XML escapes are undone by the parser.
+    """
+    return [(element.tag, element.text[1:-1]) for element in et.parse(token_file).getroot()]
+
+
+@pytest.mark.parametrize("tokenizer_class", [Tokenizer, RegexTokenizer, MmapTokenizer])
+@pytest.mark.parametrize("jack_file", sorted(jack_file for jack_file in INPUT_DIR.rglob("*.jack")
+                                              if jack_file.with_name(f"{jack_file.stem}T.xml").exists()), ids=str)
+def test_tokenizers_match_golden_tokens(jack_file, tokenizer_class):
+    """
+    Test that every tokenizer produces the token stream in the Jack test suite's *T.xml file for each source file.
+    """
+    assert collect_tokens(tokenizer_class(jack_file)) == golden_tokens(jack_file.with_name(f"{jack_file.stem}T.xml"))
+
+
+def test_regex_tokenizer_comments_and_strings(regex_resources):
+    """
+    Test that the regex engine skips both comment styles and strips quotes from string constants.
+    """
+    tokenizer = regex_resources["tokenizer"]
+    tokenizer.open_file = '/** doc */ let classes = "a // b"; // trailing\n/* block\n */ x'
+    assert collect_tokens(tokenizer) == [
+        ("keyword", "let"),
+        ("identifier", "classes"),
+        ("symbol", "="),
+        ("stringConstant", "a // b"),
+        ("symbol", ";"),
+        ("identifier", "x"),
+    ]
+
+
+def test_regex_tokenizer_end_of_file(regex_resources):
+    """
+    Test that the regex engine reports no more tokens once the input is used up, and raises if asked for another.
+    """
+    tokenizer = regex_resources["tokenizer"]
+    tokenizer.open_file = "x // only a comment left"
+    assert tokenizer.advance() == ("identifier", "x")
+    assert tokenizer.has_more_tokens() is False
+    with pytest.raises(ValueError, match="Unexpected end of file after 'x'"):
+        tokenizer.advance()
 
 
+def test_regex_tokenizer_unexpected_character(regex_resources):
+    """
+    Test that characters outside the Jack grammar raise instead of looping forever.
+    """
+    tokenizer = regex_resources["tokenizer"]
+    tokenizer.open_file = "let x = #;"
+    with pytest.raises(ValueError):
+        collect_tokens(tokenizer)
+
+
+@pytest.mark.parametrize("tokenizer_class", [Tokenizer, RegexTokenizer])
+def test_peek_does_not_advance(tokenizer_class):
+    """
+    Test that peek looks ahead any number of tokens without moving the current token.
+    """
+    tokenizer = tokenizer_class(INPUT_DIR / "ArrayTest" / "Main.jack")
+    tokenizer.open_file = "do  game . run ( ) ;"
+    tokenizer.advance()
+
+    assert tokenizer.peek() == ("identifier", "game")
+    assert tokenizer.peek(2) == ("symbol", ".")
+    assert tokenizer.peek(6) == ("symbol", ";")
+    assert tokenizer.peek(7) is None
+    assert tokenizer.current_token_value == "do"
+    assert tokenizer.advance() == ("identifier", "game")
+    assert tokenizer.peek() == ("symbol", ".")
+
+
+@pytest.mark.parametrize("tokenizer_class", [Tokenizer, RegexTokenizer])
+def test_has_more_tokens_after_peek(tokenizer_class):
+    """
+    Test that has_more_tokens only looks at the token stream, not at what peek has buffered.
+    """
+    tokenizer = tokenizer_class(INPUT_DIR / "ArrayTest" / "Main.jack")
+    tokenizer.open_file = "a /* last comment */"
+    tokenizer.advance()
+    assert tokenizer.peek() is None
+    assert tokenizer.has_more_tokens() is False
+
+
+def test_token_arrays_are_compact():
+    """
+    Test that the token stream is stored as parallel kind/start/length arrays, with strings stored without quotes.
+    Keywords and symbols have a kind code each; other tokens have their type code.
+    """
+    tokenizer = Tokenizer(INPUT_DIR / "ArrayTest" / "Main.jack")
+    tokenizer.open_file = 'let s = "hi";'
+    tokenizer.has_more_tokens()
+
+    assert list(tokenizer._token_types) == [KIND_CODES["let"], 2, KIND_CODES["="], 4, KIND_CODES[";"]]
+    assert list(tokenizer._token_starts) == [0, 4, 6, 9, 12]
+    assert list(tokenizer._token_lengths) == [3, 1, 1, 2, 1]
+
+
+def test_regex_has_more_tokens_is_cached(regex_resources, monkeypatch):
+    """
+    Test that repeated has_more_tokens calls scan past comments once, and only advance invalidates the result.
+    """
+    tokenizer = regex_resources["tokenizer"]
+    tokenizer.open_file = "/* a long header */ // and a line comment\n class Main"
+    scans = []
+    original_scan = tokenizer._scan
+    monkeypatch.setattr(tokenizer, "_scan", lambda: scans.append(1) or original_scan())
+
+    for _ in range(5):
+        assert tokenizer.has_more_tokens() is True
+    assert len(scans) == 1
+
+    assert tokenizer.advance() == ("keyword", "class")
+    assert len(scans) == 1
+    assert tokenizer.has_more_tokens() is True
+    assert len(scans) == 2
+
+
+@pytest.mark.parametrize("tokenizer_class", [Tokenizer, RegexTokenizer])
+def test_token_by_index(tokenizer_class):
+    """
+    Test that any token in the stream can be looked up by its index, regardless of the current position.
+    """
+    tokenizer = tokenizer_class(INPUT_DIR / "ArrayTest" / "Main.jack")
+    tokenizer.open_file = 'let s = "hi";'
+    tokenizer.advance()
+
+    assert tokenizer.token(3) == ("stringConstant", "hi")
+    assert tokenizer.token(0) == ("keyword", "let")
+    with pytest.raises(IndexError):
+        tokenizer.token(5)
+
+
+@pytest.mark.parametrize("tokenizer_class", [Tokenizer, RegexTokenizer])
+@pytest.mark.parametrize("source", ['let s = "hé";', b'let s = "h\xc3\xa9";', bytearray(b'let s = "h\xc3\xa9";'),
+                                    memoryview(b'let s = "h\xc3\xa9";')])
+def test_from_source(tokenizer_class, source):
+    """
+    Test that text, bytes, bytearrays and memoryviews are tokenized without a file, binary ones decoded as UTF-8.
+    """
+    tokenizer = tokenizer_class.from_source(source, "Test.jack")
+
+    assert isinstance(tokenizer, tokenizer_class)
+    assert tokenizer.jack_file == "Test.jack"
+    assert tokenizer.open_file == 'let s = "hé";'
+    tokens = [tokenizer.advance() for _ in range(5)]
+    assert tokens[3] == ("stringConstant", "hé")
+    assert tokenizer.has_more_tokens() is False
+
+
+def test_from_file():
+    """
+    Test that open files are read in text or binary mode, keeping their name.
+    """
+    jack_file = INPUT_DIR / "ArrayTest" / "Main.jack"
+    with open(jack_file, "rb") as file:
+        binary = Tokenizer.from_file(file)
+    with open(jack_file, "r") as file:
+        text = Tokenizer.from_file(file, name="Main")
+
+    assert binary.jack_file == str(jack_file)
+    assert text.jack_file == "Main"
+    assert binary.open_file.replace("\r\n", "\n") == text.open_file == Tokenizer(jack_file).open_file
+    assert Tokenizer.from_file(io.BytesIO(b"class")).advance() == ("keyword", "class")
+
+
+def test_mmap_tokens_match(tmp_path):
+    """
+    Test that a memory-mapped file gives the same tokens as reading it, with offsets counted in bytes.
+    """
+    jack_file = tmp_path / "Test.jack"
+    jack_file.write_bytes('class Test { /* é */ function void f() { do Output.printString("héllo"); return; } }'
+                          .encode("utf-8"))
+    expected = Tokenizer(jack_file)
+    with MmapTokenizer(jack_file) as tokenizer:
+        while expected.has_more_tokens():
+            assert tokenizer.has_more_tokens() is True
+            assert tokenizer.advance() == expected.advance()
+            if tokenizer.current_token_value == "héllo":
+                assert tokenizer.current_index == expected.current_index + 2
+        assert tokenizer.has_more_tokens() is False
+        assert tokenizer.token(14) == ("stringConstant", "héllo")
+        assert tokenizer.open_file == expected.open_file
+
+
+def test_mmap_edge_cases(tmp_path):
+    """
+    Test empty files, replacing the source with text, lexing errors, and closing the mapping mid-stream.
+    """
+    jack_file = tmp_path / "Empty.jack"
+    jack_file.write_bytes(b"")
+    tokenizer = MmapTokenizer(jack_file)
+    assert tokenizer.has_more_tokens() is False
+
+    tokenizer.open_file = "let x = 1;"
+    assert tokenizer.advance() == ("keyword", "let")
+
+    jack_file.write_bytes(b"class # { }")
+    with MmapTokenizer(jack_file) as tokenizer:
+        assert tokenizer.advance() == ("keyword", "class")
+        with pytest.raises(ValueError, match="Unexpected character '#' at index 6"):
+            tokenizer.has_more_tokens()
+
+    jack_file.write_bytes(b"class Test { }")
+    with MmapTokenizer(jack_file) as tokenizer:
+        assert tokenizer.has_more_tokens() is True
+    assert tokenizer.has_more_tokens() is False
+
+
+@pytest.mark.parametrize("tokenizer_class", [Tokenizer, RegexTokenizer, MmapTokenizer])
+def test_interned_values(tokenizer_class):
+    """
+    Test that every keyword and symbol is handed out as the same interned object, from any tokenizer and by token().
+    """
+    tokenizer = tokenizer_class(INPUT_DIR / "ArrayTest" / "Main.jack")
+    index = 0
+    while tokenizer.has_more_tokens():
+        token_type, value = tokenizer.advance()
+        if token_type in ("keyword", "symbol"):
+            assert value is KIND_VALUES[KIND_CODES[value]]
+            assert tokenizer.token(index)[1] is value
+        index += 1
@@ -0,0 +1,76 @@
+"""
+The test suite for tracing
+"""
+import io
+from pathlib import Path
+
+import pytest
+
+from src import trace
+from src.compilation_engine import CompilationEngine
+from src.tokenizer import Tokenizer
+
+INPUT_DIR: Path = Path(__file__).parent.parent / "input"
+
+
+@pytest.fixture
+def setup_resources():
+    """
+    Sets up a compilation engine and makes sure tracing is turned back off afterwards.
+    """
+    compilation = CompilationEngine(Tokenizer(INPUT_DIR / "ArrayTest" / "Main.jack"))
+    yield {
+        "compilation": compilation,
+    }
+    trace.disable()
+
+
+def test_trace_off_by_default(setup_resources, capsys):
+    """
+    Test that nothing is traced or printed when tracing is off.
+    """
+    compilation = setup_resources["compilation"]
+    compilation.compile_class()
+
+    assert trace.parser is False and trace.tokens is False
+    assert capsys.readouterr().out == ""
+
+
+def test_trace_parser_level(setup_resources):
+    """
+    Test that the parser level traces parser decisions but not individual tokens.
+    """
+    compilation = setup_resources["compilation"]
+    stream = io.StringIO()
+    trace.enable(trace.PARSER_LEVEL, stream)
+    compilation.compile_class()
+
+    assert "STATEMENT: let" in stream.getvalue()
+    assert "TOKENIZER:" not in stream.getvalue()
+
+
+def test_trace_token_level(setup_resources):
+    """
+    Test that the token level traces every token as well.
+    """
+    compilation = setup_resources["compilation"]
+    stream = io.StringIO()
+    trace.enable(trace.level_for_verbosity(2), stream)
+    compilation.compile_class()
+
+    assert "TOKENIZER: keyword | class" in stream.getvalue()
+    assert "STATEMENT: let" in stream.getvalue()
+
+
+def test_trace_disable(setup_resources):
+    """
+    Test that disable stops tracing and removes the handler.
+    """
+    compilation = setup_resources["compilation"]
+    stream = io.StringIO()
+    trace.enable(trace.TOKEN_LEVEL, stream)
+    trace.disable()
+    compilation.compile_class()
+
+    assert stream.getvalue() == ""
+    assert trace.logger.handlers == []
@@ -0,0 +1,41 @@
+"""
+The test suite for the VM command writer
+"""
+import io
+
+import pytest
+
+from src.vm_writer import VMWriter
+
+
+@pytest.fixture
+def setup_resources():
+    """
+    Creates a writer on top of an in-memory stream.
+    """
+    stream = io.StringIO()
+    yield {
+        "stream": stream,
+        "writer": VMWriter(stream),
+    }
+
+
+def test_commands(setup_resources):
+    """
+    Test that every command is written on its own line in VM syntax.
+    """
+    writer = setup_resources["writer"]
+    writer.write_function("Main.main", 2)
+    writer.write_push("constant", 7)
+    writer.write_pop("local", 1)
+    writer.write_arithmetic("neg")
+    writer.write_label("LOOP0")
+    writer.write_if("END0")
+    writer.write_goto("LOOP0")
+    writer.write_call("Math.multiply", 2)
+    writer.write_return()
+
+    assert setup_resources["stream"].getvalue().splitlines() == [
+        "function Main.main 2", "push constant 7", "pop local 1", "neg", "label LOOP0", "if-goto END0",
+        "goto LOOP0", "call Math.multiply 2", "return",
+    ]
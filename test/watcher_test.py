@@ -0,0 +1,47 @@
+"""
+The test suite for the file watcher
+"""
+import os
+
+import pytest
+
+from src.watcher import FileWatcher
+
+
+@pytest.fixture
+def setup_resources(tmp_path):
+    """
+    Watches a directory holding two .jack files.
+    """
+    for name in ("A", "B"):
+        (tmp_path / f"{name}.jack").write_text(f"class {name} {{ }}")
+    yield {
+        "directory": tmp_path,
+        "watcher": FileWatcher(lambda: sorted(tmp_path.glob("*.jack"))),
+    }
+
+
+def test_no_changes(setup_resources):
+    """
+    Test that nothing is reported when nothing changed, including when a file is touched without being edited.
+    """
+    a_file = setup_resources["directory"] / "A.jack"
+    os.utime(a_file, ns=(0, 0))
+
+    assert setup_resources["watcher"].poll() == ([], [])
+
+
+def test_changed_new_and_removed(setup_resources):
+    """
+    Test that edited and new files are reported as changed with their modification time, and deleted ones as gone.
+    """
+    directory = setup_resources["directory"]
+    (directory / "A.jack").write_text("class A { field int x; }")
+    (directory / "C.jack").write_text("class C { }")
+    (directory / "B.jack").unlink()
+
+    changed, removed = setup_resources["watcher"].poll()
+    assert [path.name for path, modified in changed] == ["A.jack", "C.jack"]
+    assert changed[0][1] == os.stat(directory / "A.jack").st_mtime
+    assert [path.name for path in removed] == ["B.jack"]
+    assert setup_resources["watcher"].poll() == ([], [])
@@ -0,0 +1,93 @@
+"""
+The test suite for the streaming XML writer
+"""
+import io
+from pathlib import Path
+
+import pytest
+
+import xml.etree.ElementTree as element_tree
+from src.compilation_engine import CompilationEngine
+from src.tokenizer import Tokenizer
+from src.xml_writer import TokenXmlWriter, XmlStreamWriter
+
+INPUT_DIR: Path = Path(__file__).parent.parent / "input"
+
+
+@pytest.fixture
+def setup_resources():
+    """
+    Sets up a writer on an in-memory stream.
+    """
+    stream = io.StringIO()
+    yield {
+        "stream": stream,
+        "writer": XmlStreamWriter(stream),
+    }
+
+
+def test_nested_elements(setup_resources):
+    """
+    Test that children are indented two spaces per level and empty non-terminals stay on one line.
+    """
+    writer = setup_resources["writer"]
+    writer.start_nonterminal("class")
+    writer.terminal("keyword", "class", 0)
+    writer.start_nonterminal("parameterList")
+    writer.end_nonterminal("parameterList")
+    writer.start_nonterminal("statements")
+    writer.terminal("symbol", ";", 1)
+    writer.end_nonterminal("statements")
+    writer.end_nonterminal("class")
+
+    assert setup_resources["stream"].getvalue() == """<class>
+  <keyword> class </keyword>
+  <parameterList></parameterList>
+  <statements>
+    <symbol> ; </symbol>
+  </statements>
+</class>
+"""
+
+
+def test_escaping(setup_resources):
+    """
+    Test that markup characters in text are escaped.
+    """
+    writer = setup_resources["writer"]
+    writer.terminal("symbol", "<", 0)
+    writer.terminal("symbol", "&", 1)
+    writer.terminal("symbol", ">", 2)
+
+    assert setup_resources["stream"].getvalue() == ("<symbol> &lt; </symbol>\n<symbol> &amp; </symbol>\n"
+                                                    "<symbol> &gt; </symbol>\n")
+
+
+@pytest.mark.parametrize("jack_file", sorted((INPUT_DIR / "full_tests").rglob("*.jack")), ids=str)
+def test_matches_element_tree_output(jack_file):
+    """
+    Test that streaming a compile gives exactly the bytes the ElementTree indent-and-write path gives.
+    """
+    compiler = CompilationEngine(Tokenizer(jack_file))
+    compiler.compile_class()
+    tree = element_tree.ElementTree(compiler.root)
+    element_tree.indent(tree)
+    expected = io.BytesIO()
+    tree.write(expected, encoding="utf-8", short_empty_elements=False)
+
+    stream = io.StringIO()
+    CompilationEngine(Tokenizer(jack_file), XmlStreamWriter(stream)).compile_class()
+
+    assert stream.getvalue().encode("utf-8") == expected.getvalue()
+
+
+@pytest.mark.parametrize("name", ["Main", "Square", "SquareGame"])
+def test_token_mode(name):
+    """
+    Test that token mode into a TokenXmlWriter matches the Jack test files' token lists.
+    """
+    stream = io.StringIO()
+    CompilationEngine(Tokenizer(INPUT_DIR / "10" / "Square" / f"{name}.jack"),
+                      TokenXmlWriter(stream)).compile_class(token_mode=True)
+
+    assert stream.getvalue() == (INPUT_DIR / "10" / "Square" / f"{name}T.xml").read_text()